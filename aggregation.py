@@ -0,0 +1,238 @@
+import numpy as np
+import pandas as pd
+
+# Neighborhood sentiment summary shared by sentiment-analysis.py, the
+# streaming path and the benchmarks. Produces the rows written to
+# neighborhood_sentiment_summary.csv.
+#
+# NeighborhoodAggregator keeps only per-neighborhood counters, so it can be
+# fed one chunk of posts at a time; summarize_neighborhoods is the one-shot
+# version over a whole DataFrame. Both give the same summary for the same
+# posts, in any order. update_table / summarize_post_table do the same from
+# a compact post_table.PostTable.
+#
+# When the posts carry a cluster_id (see near_dupes.py), a cluster of
+# near-duplicate posts counts as one incident per neighborhood: the earliest
+# post of the cluster that mentions the neighborhood is the one counted.
+# Posts without a cluster_id are their own cluster and go straight into the
+# counters, so only clustered posts are held in memory as incidents.
+#
+# Risk ratings use an empirical-Bayes smoothed fear ratio: every
+# neighborhood's counts are pulled toward a beta prior fitted (method of
+# moments) to all neighborhoods, so a 2-of-3 area isn't rated like a
+# 200-of-300 one. ci_low / ci_high are the matching posterior interval,
+# quantiles of Beta(fear + alpha, total - fear + beta) read off one batched
+# matrix of beta draws for all neighborhoods. With few posts the prior is
+# weak, so "High Risk" also needs the interval's low end to be at the Medium
+# level: 3 fearful posts out of 3 is a lead, not an established pattern.
+# The summary is ranked by that low end too.
+
+SENTIMENTS = ["Negative/Fear", "Neutral/Concern", "Positive/Reassuring"]
+SUMMARY_COLUMNS = ["neighborhood", "total_posts", "negative_fear", "neutral_concern",
+                   "positive_reassuring", "negative_ratio", "smoothed_ratio", "ci_low",
+                   "ci_high", "total_safety_score", "risk_rating", "color"]
+
+MIN_RATED_POSTS = 3
+POSTERIOR_SAMPLES = 4000
+CI_LEVEL = 0.90
+POSTERIOR_SEED = 0
+# bounds on the prior's weight, in pseudo-posts
+PRIOR_STRENGTH = (2.0, 200.0)
+
+HIGH_RATIO = 0.5
+MEDIUM_RATIO = 0.3
+
+def risk_rating(total, neg_ratio, ci_low):
+    if total < MIN_RATED_POSTS:
+        return "Insufficient Data", "gray"
+    if neg_ratio >= HIGH_RATIO and ci_low >= MEDIUM_RATIO:
+        return "High Risk", "red"
+    if neg_ratio >= MEDIUM_RATIO:
+        return "Medium Risk", "orange"
+    return "Lower Risk", "green"
+
+# ---- SMOOTHED RATIOS ----
+def beta_prior(fear, totals):
+    # method of moments over neighborhoods with enough posts; the spread of
+    # their raw ratios minus the binomial noise expected at their sizes is
+    # the real between-neighborhood variance
+    fear, totals = np.asarray(fear, dtype=float), np.asarray(totals, dtype=float)
+    rated = totals >= MIN_RATED_POSTS
+    if rated.sum() < 2:
+        rated = totals > 0
+    if not rated.any():
+        return 1.0, 1.0
+    ratios = fear[rated] / totals[rated]
+    mean = min(max(ratios.mean(), 0.01), 0.99)
+    between = ratios.var() - (mean * (1 - mean) / totals[rated]).mean()
+    strength = mean * (1 - mean) / between - 1 if between > 0 else PRIOR_STRENGTH[1]
+    strength = float(np.clip(strength, *PRIOR_STRENGTH))
+    return mean * strength, (1 - mean) * strength
+
+def add_risk_intervals(summary_df, samples=POSTERIOR_SAMPLES, level=CI_LEVEL, seed=POSTERIOR_SEED):
+    # adds smoothed_ratio / ci_low / ci_high and re-rates risk on the smoothed
+    # ratio and its interval; only needs the total_posts and negative_fear columns
+    df = summary_df.copy()
+    totals = df["total_posts"].to_numpy(dtype=np.int64)
+    fear = df["negative_fear"].to_numpy(dtype=np.int64)
+    alpha, beta = beta_prior(fear, totals)
+    smoothed = (fear + alpha) / (totals + alpha + beta)
+
+    # the posterior is already shrunk toward the prior, so its quantiles are
+    # the interval as-is; one (neighborhoods x samples) draw, in name order
+    # so the result doesn't depend on row order
+    order = np.argsort(df["neighborhood"].to_numpy(dtype=str), kind="stable")
+    rng = np.random.default_rng(seed)
+    draws = np.empty((len(df), samples))
+    draws[order] = rng.beta((fear + alpha)[order, None], (totals - fear + beta)[order, None],
+                            size=(len(df), samples))
+    tail = (1 - level) / 2
+    low, high = np.quantile(draws, [tail, 1 - tail], axis=1) if len(df) else ([], [])
+
+    df["smoothed_ratio"] = np.round(smoothed, 3)
+    df["ci_low"] = np.round(low, 3)
+    df["ci_high"] = np.round(high, 3)
+    ratings = [risk_rating(t, s, lo) for t, s, lo in zip(totals, smoothed, df["ci_low"])]
+    df["risk_rating"] = [r for r, _ in ratings]
+    df["color"] = [c for _, c in ratings]
+    return df
+
+class NeighborhoodAggregator:
+    def __init__(self):
+        self.counts = {}
+        # (cluster, neighborhood) -> ((date, url), sentiment, safety_score)
+        # of the post currently representing that incident
+        self.incidents = {}
+        self.clustered_mentions = 0
+        self.posts = 0
+
+    @staticmethod
+    def _add(counts, n, sentiment, safety_score):
+        if n not in counts:
+            counts[n] = {
+                "Negative/Fear": 0,
+                "Neutral/Concern": 0,
+                "Positive/Reassuring": 0,
+                "total": 0,
+                "total_safety_score": 0
+            }
+        counts[n][sentiment] += 1
+        counts[n]["total"] += 1
+        counts[n]["total_safety_score"] += int(safety_score)
+
+    def update(self, df):
+        if "cluster_id" in df:
+            self._update_clustered(df)
+            return
+        for neighborhoods, sentiment, safety_score in zip(
+                df["neighborhoods_mentioned"], df["sentiment"], df["safety_score"]):
+            self.posts += 1
+            for n in neighborhoods:
+                self._add(self.counts, n, sentiment, safety_score)
+
+    def _update_clustered(self, df):
+        for neighborhoods, sentiment, safety_score, cluster, date, url in zip(
+                df["neighborhoods_mentioned"], df["sentiment"], df["safety_score"],
+                df["cluster_id"], df["date"], df["url"]):
+            self.posts += 1
+            # posts missing from the cluster file are their own cluster
+            if pd.isna(cluster):
+                for n in neighborhoods:
+                    self._add(self.counts, n, sentiment, safety_score)
+                continue
+            key = int(cluster)
+            self.clustered_mentions += len(neighborhoods)
+            for n in neighborhoods:
+                current = self.incidents.get((key, n))
+                if current is None or (date, url) < current[0]:
+                    self.incidents[(key, n)] = ((date, url), sentiment, safety_score)
+
+    def update_table(self, table):
+        # same as update() for a post_table.PostTable, counted with bincount
+        # over the flat neighborhood codes instead of row by row
+        posts, codes = table.neighborhood_pairs()
+        self.posts += len(table)
+        if (table.cluster_id >= 0).any():
+            self._update_table_clustered(table, posts, codes)
+            return
+        self._count_pairs(table, posts, codes)
+
+    def _count_pairs(self, table, posts, codes):
+        labels = list(table.sentiment.categories)
+        sentiment = table.sentiment.codes[posts].astype(np.int64)
+        size = len(table.neighborhood_names)
+        by_sentiment = np.bincount(codes * len(labels) + sentiment,
+                                   minlength=size * len(labels)).reshape(size, len(labels))
+        scores = np.bincount(codes, weights=table.safety_score[posts], minlength=size)
+        for i in np.flatnonzero(by_sentiment.sum(axis=1)):
+            n = table.neighborhood_names[i]
+            if n not in self.counts:
+                self.counts[n] = {s: 0 for s in SENTIMENTS}
+                self.counts[n].update(total=0, total_safety_score=0)
+            for j, label in enumerate(labels):
+                if by_sentiment[i, j]:
+                    self.counts[n][label] += int(by_sentiment[i, j])
+            self.counts[n]["total"] += int(by_sentiment[i].sum())
+            self.counts[n]["total_safety_score"] += int(scores[i])
+
+    def _update_table_clustered(self, table, posts, codes):
+        # posts without a cluster are counted directly, as in _update_clustered
+        unclustered = table.cluster_id[posts] < 0
+        self._count_pairs(table, posts[unclustered], codes[unclustered])
+        posts, codes = posts[~unclustered], codes[~unclustered]
+        self.clustered_mentions += len(codes)
+        # earliest (date, url) mention per (cluster, neighborhood)
+        _, url_rank = np.unique(table.url.astype(str), return_inverse=True)
+        key = table.cluster_id[posts]
+        order = np.lexsort((url_rank[posts], table.date[posts], codes, key))
+        group = np.stack([key, codes])[:, order]
+        first = order[np.r_[True, (group[:, 1:] != group[:, :-1]).any(axis=0)]] if len(order) else order
+        sentiment = np.asarray(table.sentiment)
+        for p, c in zip(posts[first], codes[first]):
+            url, date = table.url[p], table.date[p]
+            incident = (int(table.cluster_id[p]), table.neighborhood_names[c])
+            current = self.incidents.get(incident)
+            if current is None or (date, url) < current[0]:
+                self.incidents[incident] = ((date, url), sentiment[p], table.safety_score[p])
+
+    def duplicate_mentions(self):
+        # neighborhood mentions folded into another post's incident
+        return self.clustered_mentions - len(self.incidents)
+
+    def summary(self):
+        counts = {n: dict(c) for n, c in self.counts.items()}
+        for (_, n), (_, sentiment, safety_score) in self.incidents.items():
+            self._add(counts, n, sentiment, safety_score)
+
+        rows = []
+        for n, c in counts.items():
+            total = c["total"]
+            neg = c["Negative/Fear"]
+            neg_ratio = neg / total if total > 0 else 0
+
+            rows.append({
+                "neighborhood": n,
+                "total_posts": total,
+                "negative_fear": neg,
+                "neutral_concern": c["Neutral/Concern"],
+                "positive_reassuring": c["Positive/Reassuring"],
+                "negative_ratio": round(neg_ratio, 2),
+                "total_safety_score": c["total_safety_score"],
+            })
+
+        summary_df = add_risk_intervals(pd.DataFrame(rows, columns=SUMMARY_COLUMNS[:6] + ["total_safety_score"]))
+        summary_df = summary_df[SUMMARY_COLUMNS]
+        # ties broken by name so the order doesn't depend on which post was seen first
+        return summary_df.sort_values(["ci_low", "smoothed_ratio", "neighborhood"],
+                                      ascending=[False, False, True], kind="mergesort",
+                                      ignore_index=True)
+
+def summarize_neighborhoods(df):
+    aggregator = NeighborhoodAggregator()
+    aggregator.update(df)
+    return aggregator.summary()
+
+def summarize_post_table(table):
+    aggregator = NeighborhoodAggregator()
+    aggregator.update_table(table)
+    return aggregator.summary()
@@ -0,0 +1,61 @@
+import pandas as pd
+from cooccurrence import write_outputs as write_cooccurrence
+from instrumentation import stage
+from snippets import SNIPPETS_PATH, build_snippets
+from tagging import extract_neighborhood_mentions, extract_safety_flags
+
+# ---- LOAD DATA ----
+with stage("extract.load_csv") as s:
+    df = pd.read_csv("chicago_safety_reddit.csv")
+    df["combined"] = df["title"].fillna("") + " " + df["text"].fillna("")
+    s.add(len(df))
+print(f"Total posts loaded: {len(df)}")
+
+# ---- APPLY ----
+print("Extracting neighborhoods and safety flags...")
+with stage("extract.tag_neighborhoods", items=len(df), memory=False):
+    # match offsets are kept for the snippets; the CSV only gets the names
+    mentions = df.apply(extract_neighborhood_mentions, axis=1)
+    df["neighborhoods_mentioned"] = mentions.apply(lambda found: [n for n, _, _ in found])
+with stage("extract.tag_safety_flags", items=len(df), memory=False):
+    df["safety_flags"] = df["combined"].apply(extract_safety_flags)
+df["safety_score"] = df["safety_flags"].apply(len)
+
+# keep only posts with at least one neighborhood
+df_located = df[df["neighborhoods_mentioned"].apply(len) > 0].copy()
+df_located = df_located.sort_values("safety_score", ascending=False)
+
+# ---- SAVE ----
+with stage("extract.save_csv", items=len(df_located)):
+    df_located.to_csv("chicago_safety_located.csv", index=False)
+
+# context around each neighborhood mention, cut from the offsets found above
+with stage("extract.snippets", items=len(df_located)):
+    snippets = build_snippets(df_located, mentions[df_located.index])
+    snippets.to_csv(SNIPPETS_PATH, index=False)
+
+# sparse post x neighborhood / post x keyword matrices and each area's top concerns
+with stage("extract.cooccurrence", items=len(df_located)):
+    write_cooccurrence(df_located)
+
+print(f"\nTotal posts: {len(df)}")
+print(f"Posts with Chicago neighborhoods: {len(df_located)}")
+
+print(f"\nTop 10 posts by safety concern:\n")
+for _, row in df_located.head(10).iterrows():
+    print(f"Title: {row['title']}")
+    print(f"Neighborhoods: {row['neighborhoods_mentioned']}")
+    print(f"Safety flags: {row['safety_flags']}")
+    print(f"Score: {row['safety_score']}")
+    print("---")
+
+# ---- NEIGHBORHOOD FREQUENCY ----
+from collections import Counter
+neighborhood_counts = Counter()
+for neighborhoods in df_located["neighborhoods_mentioned"]:
+    for n in neighborhoods:
+        neighborhood_counts[n] += 1
+
+print(f"\nTop 20 most mentioned Chicago neighborhoods:")
+for neighborhood, count in neighborhood_counts.most_common(20):
+    print(f"  {neighborhood}: {count} posts")
\ No newline at end of file
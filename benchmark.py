@@ -0,0 +1,360 @@
+import argparse
+import ast
+import json
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import numpy as np
+import pandas as pd
+
+from instrumentation import environment
+from neighborhoods import ambiguous, chicago_neighborhoods, safety_keywords
+
+# Synthetic-corpus benchmarks for every pipeline stage.
+#
+#   python benchmark.py --sizes 10k,100k              # compare with the baseline
+#   python benchmark.py --sizes 10k --save-baseline   # record a new baseline
+#   python benchmark.py --sizes 1M --stages tag,aggregate
+#
+# Each stage runs in a fresh (spawned) process so its peak RSS is its own.
+# Sentiment uses a tiny keyword stand-in with the same call interface as the
+# transformers pipeline, so the benchmark measures our code, not the model.
+#
+# Throughput only means something on the machine it was measured on, so the
+# baseline is local (benchmark_baseline.json is not committed) and records
+# instrumentation.environment(); against a baseline from another machine
+# only peak RSS is compared.
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+BASELINE_PATH = os.path.join(ROOT, "benchmark_baseline.json")
+DEFAULT_TOLERANCE = 0.25
+# stages faster than this are too noisy for throughput comparisons
+MIN_COMPARABLE_WALL_S = 0.05
+
+SUBREDDITS = ["chicago", "AskChicago", "TwoXChromosomes", "AskWomen"]
+SUBREDDIT_WEIGHTS = [0.5, 0.25, 0.15, 0.10]
+FILLER = ("walking home from the train last night and the street was quiet "
+          "anyone know if this area is fine for a new apartment I moved here "
+          "recently and want advice about the bus stop near work after class").split()
+DATE_RANGE = (1640995200, 1759276800)  # 2022-01-01 .. 2025-10-01
+
+
+# ---- SYNTHETIC CORPUS ----
+def generate_corpus(n, seed=0):
+    rng = np.random.default_rng(seed)
+    names = np.array(chicago_neighborhoods + ambiguous * 2)
+    keywords = np.array(safety_keywords)
+    filler = np.array(FILLER)
+
+    n_names = rng.choice([0, 1, 1, 2, 3], size=n)
+    n_keywords = rng.choice([0, 1, 2, 3], size=n)
+    n_filler = rng.integers(10, 120, size=n)
+    mentions_chicago = rng.random(n) < 0.5
+
+    titles, texts = [], []
+    for i in range(n):
+        picked = list(rng.choice(names, size=n_names[i]))
+        flags = list(rng.choice(keywords, size=n_keywords[i]))
+        words = list(rng.choice(filler, size=n_filler[i])) + picked + flags
+        rng.shuffle(words)
+        if mentions_chicago[i]:
+            words.append("chicago")
+        titles.append(" ".join(picked[:1] + flags[:1] + words[:6]))
+        texts.append(" ".join(words))
+
+    return pd.DataFrame({
+        "title": titles,
+        "text": texts,
+        "subreddit": rng.choice(SUBREDDITS, size=n, p=SUBREDDIT_WEIGHTS),
+        "score": rng.integers(0, 500, size=n),
+        "date": rng.integers(*DATE_RANGE, size=n),
+        "num_comments": rng.integers(0, 200, size=n),
+        "url": [f"https://reddit.com/r/synthetic/comments/{i:x}" for i in range(n)],
+    })
+
+
+class TinySentimentModel:
+    # keyword stand-in with the transformers pipeline call signature
+    FEAR = {"scared", "followed", "attacked", "unsafe", "terrified", "gun", "stalked"}
+    CALM = {"fine", "quiet", "advice"}
+
+    def __call__(self, texts, batch_size=None):
+        results = []
+        for text in texts:
+            words = set(text.lower().split())
+            if len(words & self.FEAR) >= 1:
+                results.append({"label": "LABEL_0", "score": 0.91})
+            elif len(words & self.CALM) >= 2:
+                results.append({"label": "LABEL_2", "score": 0.77})
+            else:
+                results.append({"label": "LABEL_1", "score": 0.64})
+        return results
+
+
+# ---- STAGES ----
+# each stage reads its input from workdir, times only its core work and
+# returns the number of items processed
+
+def read_posts(path):
+    df = pd.read_csv(path)
+    for col in ("neighborhoods_mentioned", "safety_flags"):
+        if col in df:
+            df[col] = df[col].apply(ast.literal_eval)
+    return df
+
+
+def stage_tag(workdir):
+    from snippets import build_snippets
+    from tagging import extract_neighborhood_mentions, extract_safety_flags
+    df = pd.read_csv(os.path.join(workdir, "raw.csv"))
+    start = time.perf_counter()
+    df["combined"] = df["title"].fillna("") + " " + df["text"].fillna("")
+    mentions = df.apply(extract_neighborhood_mentions, axis=1)
+    df["neighborhoods_mentioned"] = mentions.apply(lambda found: [n for n, _, _ in found])
+    df["safety_flags"] = df["combined"].apply(extract_safety_flags)
+    df["safety_score"] = df["safety_flags"].apply(len)
+    located = df[df["neighborhoods_mentioned"].apply(len) > 0]
+    build_snippets(located, mentions[located.index])
+    wall = time.perf_counter() - start
+    located.to_csv(os.path.join(workdir, "located.csv"), index=False)
+    return wall, len(df)
+
+
+def stage_sentiment(workdir):
+    from sentiment import BATCH_SIZE, score_texts
+    df = read_posts(os.path.join(workdir, "located.csv"))
+    model = TinySentimentModel()
+    start = time.perf_counter()
+    texts = (df["title"].fillna("") + " " + df["text"].fillna("")).tolist()
+    sentiments, confidences = [], []
+    for i in range(0, len(texts), BATCH_SIZE):
+        labels, confs = score_texts(texts[i:i + BATCH_SIZE], model)
+        sentiments.extend(labels)
+        confidences.extend(confs)
+    df["sentiment"] = sentiments
+    df["confidence"] = confidences
+    wall = time.perf_counter() - start
+    df.to_csv(os.path.join(workdir, "sentiment.csv"), index=False)
+    return wall, len(df)
+
+
+def stage_aggregate(workdir):
+    from aggregation import summarize_post_table
+    from post_table import PostTable
+    table = PostTable.load(os.path.join(workdir, "sentiment.csv"))
+    start = time.perf_counter()
+    summary = summarize_post_table(table)
+    wall = time.perf_counter() - start
+    summary.to_csv(os.path.join(workdir, "summary.csv"), index=False)
+    return wall, len(table)
+
+
+def stage_time(workdir):
+    from post_table import PostTable
+    from temporal_cube import build_cube
+    table = PostTable.load(os.path.join(workdir, "sentiment.csv"))
+    start = time.perf_counter()
+    build_cube(table)
+    return time.perf_counter() - start, len(table)
+
+
+def stage_map(workdir):
+    from map_builder import build_map
+    summary = pd.read_csv(os.path.join(workdir, "summary.csv"))
+    start = time.perf_counter()
+    build_map(summary).get_root().render()
+    return time.perf_counter() - start, len(summary)
+
+
+def stage_dashboard(workdir):
+    from dashboard import render_html
+    summary = pd.read_csv(os.path.join(workdir, "summary.csv"))
+    start = time.perf_counter()
+    render_html(summary, "benchmark")
+    return time.perf_counter() - start, len(summary)
+
+
+def stage_stream(workdir):
+    # the whole tag -> sentiment -> aggregate chain in constant memory; its
+    # peak RSS should stay roughly flat as the corpus grows
+    # peak RSS is measured here, so keep tracemalloc off even if the caller
+    # exported HERSAFE_TRACEMALLOC=1 (read when instrumentation is imported)
+    os.environ["HERSAFE_TRACEMALLOC"] = "0"
+    from streaming import stream_pipeline
+    start = time.perf_counter()
+    total, _, _ = stream_pipeline(
+        TinySentimentModel(),
+        input_path=os.path.join(workdir, "raw.csv"),
+        located_path=os.path.join(workdir, "stream_located.csv"),
+        sentiment_path=os.path.join(workdir, "stream_sentiment.csv"),
+        summary_path=os.path.join(workdir, "stream_summary.csv"),
+        snippets_path=os.path.join(workdir, "stream_snippets.csv"),
+        clusters_path=os.path.join(workdir, "clusters.csv"),
+        matrices_path=os.path.join(workdir, "stream_matrices.npz"),
+        concerns_path=os.path.join(workdir, "stream_concerns.csv"),
+        progress=False)
+    return time.perf_counter() - start, total
+
+
+STAGES = {
+    "tag": stage_tag,
+    "sentiment": stage_sentiment,
+    "aggregate": stage_aggregate,
+    "time": stage_time,
+    "map": stage_map,
+    "dashboard": stage_dashboard,
+    "stream": stage_stream,
+}
+# stages that only need raw.csv rather than an earlier stage's output
+STANDALONE = {"stream"}
+
+
+def peak_rss_bytes():
+    # on Linux ru_maxrss survives exec, so a spawned child would report the
+    # parent's peak (e.g. the generated corpus); VmHWM is the child's own
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    scale = 1 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+
+def run_in_child(name, workdir):
+    sys.path.insert(0, ROOT)
+    # instrumented stages (stream) would otherwise leave a report per run
+    # in run_reports/ from instrumentation's atexit hook
+    os.environ["HERSAFE_REPORTS"] = "0"
+    wall, items = STAGES[name](workdir)
+    peak = peak_rss_bytes()
+    return {
+        "wall_s": round(wall, 4),
+        "items": items,
+        "items_per_s": round(items / wall, 1) if wall > 0 else None,
+        "peak_rss_mb": round(peak / 2**20, 1),
+    }
+
+
+# ---- RUNNER ----
+def parse_size(text):
+    text = text.strip().lower()
+    factor = {"k": 1_000, "m": 1_000_000}.get(text[-1], 1)
+    return int(float(text.rstrip("km")) * factor)
+
+
+def run_size(label, n, stages, seed):
+    workdir = tempfile.mkdtemp(prefix=f"hersafe-bench-{label}-")
+    try:
+        start = time.perf_counter()
+        generate_corpus(n, seed).to_csv(os.path.join(workdir, "raw.csv"), index=False)
+        print(f"\n== {label} posts (generated in {time.perf_counter() - start:.1f}s) ==")
+
+        results = {}
+        spawn = get_context("spawn")
+        # later stages read earlier stages' outputs, so run the whole chain up
+        # to the last selected stage but only report the selected ones
+        order = [s for s in STAGES if s not in STANDALONE]
+        chained = [order.index(s) for s in stages if s in order]
+        to_run = order[:max(chained) + 1] if chained else []
+        to_run += [s for s in stages if s in STANDALONE]
+        for name in to_run:
+            with ProcessPoolExecutor(max_workers=1, mp_context=spawn) as pool:
+                result = pool.submit(run_in_child, name, workdir).result()
+            if name in stages:
+                results[name] = result
+                print(f"  {name:<10} {result['wall_s']:>9.3f}s  "
+                      f"{result['items_per_s'] or 0:>12,.0f} items/s  "
+                      f"{result['peak_rss_mb']:>8.1f} MB peak RSS")
+        return results
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def compare(results, baseline, tolerance, same_machine=True):
+    regressions = []
+    for size, stages in results.items():
+        for name, r in stages.items():
+            base = baseline.get(size, {}).get(name)
+            if not base:
+                continue
+            comparable = same_machine and base.get("items_per_s") \
+                and base["wall_s"] >= MIN_COMPARABLE_WALL_S
+            if comparable and r["items_per_s"] is not None \
+                    and r["items_per_s"] < base["items_per_s"] * (1 - tolerance):
+                regressions.append(f"{size}/{name}: throughput {r['items_per_s']:,.0f}/s "
+                                   f"vs baseline {base['items_per_s']:,.0f}/s")
+            if r["peak_rss_mb"] > base["peak_rss_mb"] * (1 + tolerance):
+                regressions.append(f"{size}/{name}: peak RSS {r['peak_rss_mb']} MB "
+                                   f"vs baseline {base['peak_rss_mb']} MB")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the HerSafe pipeline on synthetic data")
+    parser.add_argument("--sizes", default="10k", help="comma-separated corpus sizes, e.g. 10k,100k,1M")
+    parser.add_argument("--stages", default="all", help="comma-separated subset of: " + ",".join(STAGES))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="allowed fractional slowdown / memory growth before flagging")
+    parser.add_argument("--output", help="also write the results JSON here")
+    args = parser.parse_args()
+
+    stages = list(STAGES) if args.stages == "all" else [s.strip() for s in args.stages.split(",")]
+    unknown = [s for s in stages if s not in STAGES]
+    if unknown:
+        parser.error(f"unknown stage(s): {', '.join(unknown)}")
+
+    results = {}
+    for label in [s.strip() for s in args.sizes.split(",") if s.strip()]:
+        results[label] = run_size(label, parse_size(label), stages, args.seed)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    env = environment()
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    same_machine = baseline.get("environment") == env
+
+    if args.save_baseline:
+        # results from another machine aren't kept next to this one's
+        if not same_machine:
+            baseline = {"environment": env, "sizes": {}}
+        for size, stage_results in results.items():
+            baseline["sizes"].setdefault(size, {}).update(stage_results)
+        with open(args.baseline, "w") as f:
+            json.dump(baseline, f, indent=2)
+        print(f"\nBaseline saved to {os.path.relpath(args.baseline)}")
+        return
+
+    if not baseline:
+        print("\nNo baseline yet; run with --save-baseline to record one.")
+        return
+    if not same_machine:
+        print("\nBaseline was recorded in another environment; comparing peak RSS only.")
+    regressions = compare(results, baseline.get("sizes", {}), args.tolerance, same_machine)
+    if regressions:
+        print("\nREGRESSIONS:")
+        for r in regressions:
+            print(f"  - {r}")
+        sys.exit(1)
+    print("\nNo regressions against baseline.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+import argparse
+import os
+import subprocess
+import sys
+
+# Startup budget check for visualizations.py. test_import_time.py runs it
+# under pytest; by hand:
+#
+#   python check_import_time.py
+#
+# Imports the module under `python -X importtime` and fails (exit 1) if the
+# cumulative import time goes over budget or if any of the heavy plotting
+# libraries are pulled in eagerly again.
+
+MODULE = "visualizations"
+BUDGET_MS = 50
+HEAVY_MODULES = ["pandas", "numpy", "matplotlib", "seaborn", "wordcloud", "plotly"]
+
+
+def import_profile(module):
+    here = os.path.dirname(os.path.abspath(__file__))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=here, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        sys.exit(f"import {module} failed:\n{result.stderr}")
+
+    # lines look like: "import time:   self [us] | cumulative | imported package"
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((name.rstrip(), int(cumulative_us)))
+    return rows
+
+
+def measure(module=MODULE, runs=3):
+    # -> (best cumulative import time in ms, heavy modules imported eagerly);
+    # the best of several runs smooths out noise
+    best_ms = None
+    for _ in range(runs):
+        rows = import_profile(module)
+        total_ms = next(us for name, us in rows if name.strip() == module) / 1000
+        best_ms = total_ms if best_ms is None else min(best_ms, total_ms)
+    top_level = {name.strip().split(".")[0] for name, _ in rows}
+    return best_ms, [m for m in HEAVY_MODULES if m in top_level]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fail if visualizations.py startup regresses")
+    parser.add_argument("--budget-ms", type=float, default=BUDGET_MS)
+    parser.add_argument("--runs", type=int, default=3,
+                        help="take the best of several runs to smooth out noise")
+    args = parser.parse_args()
+
+    best_ms, eager = measure(MODULE, args.runs)
+
+    print(f"import {MODULE}: {best_ms:.1f} ms (budget {args.budget_ms:.0f} ms)")
+    failed = False
+    if best_ms > args.budget_ms:
+        print("FAIL: import time over budget")
+        failed = True
+    if eager:
+        print(f"FAIL: heavy modules imported at startup: {', '.join(eager)}")
+        failed = True
+    if not failed:
+        print("OK")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+import argparse
+import ast
+import os
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+from neighborhoods import chicago_neighborhoods, safety_keywords
+
+# ---- SPARSE NEIGHBORHOOD x KEYWORD CO-OCCURRENCE ----
+# The tagging stage (analysis.py, or streaming.py chunk by chunk) saves two
+# binary CSR matrices over the located posts, in the same row order as
+# chicago_safety_located.csv:
+#
+#   P[post, neighborhood] = 1 if the post mentions the neighborhood
+#   K[post, keyword]      = 1 if the post contains the safety keyword
+#
+# Everything per neighborhood then comes from sparse products:
+#
+#   C = P.T @ K                            neighborhood x keyword post counts
+#   profile = C / row sums                 each area's keyword mix
+#   tfidf = profile * idf(keyword)         keywords that set an area apart
+#
+# and the top TOP_N keywords by tf-idf become neighborhood_top_concerns.csv,
+# which the map popups and dashboard read as-is.
+#
+#   python cooccurrence.py      # recompute the concerns from the saved matrices
+
+MATRICES_PATH = "post_matrices.npz"
+CONCERNS_PATH = "neighborhood_top_concerns.csv"
+TOP_N = 3
+
+NEIGHBORHOODS = list(dict.fromkeys(chicago_neighborhoods))
+KEYWORDS = list(dict.fromkeys(safety_keywords))
+
+
+# ---- MATRICES ----
+def indicator_matrix(lists, vocabulary):
+    # list of label lists -> binary CSR (rows x len(vocabulary)), built from
+    # flat offsets; labels missing from the vocabulary are appended to it
+    index = {label: i for i, label in enumerate(vocabulary)}
+    rows = [list(dict.fromkeys(labels)) for labels in lists]
+    for labels in rows:
+        for label in labels:
+            if label not in index:
+                index[label] = len(vocabulary)
+                vocabulary.append(label)
+    indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+    np.cumsum([len(labels) for labels in rows], out=indptr[1:])
+    indices = np.fromiter((index[label] for labels in rows for label in labels),
+                          dtype=np.int32, count=int(indptr[-1]))
+    data = np.ones(len(indices), dtype=np.int32)
+    return sp.csr_matrix((data, indices, indptr), shape=(len(rows), len(vocabulary)))
+
+
+def build_matrices(neighborhood_lists, flag_lists):
+    neighborhoods, keywords = list(NEIGHBORHOODS), list(KEYWORDS)
+    P = indicator_matrix(neighborhood_lists, neighborhoods)
+    K = indicator_matrix(flag_lists, keywords)
+    return P, K, neighborhoods, keywords
+
+
+class MatrixBuilder:
+    # the same matrices as build_matrices, fed one chunk of located posts at a
+    # time (streaming.py); the vocabularies are shared across chunks so the
+    # columns line up, and only the nonzero indices are kept
+    def __init__(self):
+        self.neighborhoods, self.keywords = list(NEIGHBORHOODS), list(KEYWORDS)
+        self.urls = []
+        self.parts = []
+
+    def update(self, df):
+        self.urls.extend(df["url"])
+        self.parts.append((indicator_matrix(df["neighborhoods_mentioned"], self.neighborhoods),
+                           indicator_matrix(df["safety_flags"], self.keywords)))
+
+    def matrices(self):
+        # -> (P, K); earlier chunks are widened to the final vocabularies
+        def stack(blocks, cols):
+            for m in blocks:
+                m.resize(m.shape[0], cols)
+            return sp.vstack(blocks, format="csr") if blocks else sp.csr_matrix((0, cols), dtype=np.int32)
+        P = stack([p for p, _ in self.parts], len(self.neighborhoods))
+        K = stack([k for _, k in self.parts], len(self.keywords))
+        return P, K
+
+    def write(self, matrices_path=MATRICES_PATH, concerns_path=CONCERNS_PATH):
+        P, K = self.matrices()
+        save_matrices(self.urls, P, K, self.neighborhoods, self.keywords, matrices_path)
+        concerns = top_concerns(P, K, self.neighborhoods, self.keywords)
+        concerns.to_csv(concerns_path, index=False)
+        return concerns
+
+
+def save_matrices(urls, P, K, neighborhoods, keywords, path=MATRICES_PATH):
+    np.savez_compressed(
+        path,
+        urls=np.array(urls, dtype=str),
+        neighborhoods=np.array(neighborhoods, dtype=str),
+        keywords=np.array(keywords, dtype=str),
+        p_indptr=P.indptr, p_indices=P.indices,
+        k_indptr=K.indptr, k_indices=K.indices,
+    )
+
+
+def load_matrices(path=MATRICES_PATH):
+    data = np.load(path, allow_pickle=False)
+    neighborhoods, keywords = data["neighborhoods"].tolist(), data["keywords"].tolist()
+    n = len(data["urls"])
+
+    def csr(prefix, cols):
+        indices = data[f"{prefix}_indices"]
+        return sp.csr_matrix((np.ones(len(indices), dtype=np.int32), indices, data[f"{prefix}_indptr"]),
+                             shape=(n, cols))
+
+    return data["urls"].tolist(), csr("p", len(neighborhoods)), csr("k", len(keywords)), neighborhoods, keywords
+
+
+# ---- CONCERNS ----
+def keyword_counts(P, K):
+    # neighborhood x keyword: number of posts mentioning both
+    return (P.T @ K).tocsr()
+
+
+def keyword_profiles(C):
+    # each row scaled to sum to 1
+    totals = np.asarray(C.sum(axis=1)).ravel()
+    scale = np.divide(1.0, totals, out=np.zeros(len(totals)), where=totals > 0)
+    return sp.diags(scale) @ C
+
+
+def concern_tfidf(C):
+    # keyword share within the neighborhood, weighted down for keywords that
+    # show up in most neighborhoods
+    profiles = keyword_profiles(C)
+    n_areas = max(int((np.asarray(C.sum(axis=1)).ravel() > 0).sum()), 1)
+    df = np.asarray((C > 0).sum(axis=0)).ravel()
+    idf = np.log((1 + n_areas) / (1 + df)) + 1
+    return (profiles @ sp.diags(idf)).tocsr()
+
+
+def top_concerns(P, K, neighborhoods, keywords, top_n=TOP_N):
+    C = keyword_counts(P, K)
+    weights = concern_tfidf(C)
+    posts = np.asarray(P.sum(axis=0)).ravel()
+    # posts with at least one safety keyword, per neighborhood
+    flagged = P.T @ (np.diff(K.indptr) > 0).astype(np.int32)
+
+    rows = []
+    for i, n in enumerate(neighborhoods):
+        if posts[i] == 0:
+            continue
+        start, end = weights.indptr[i], weights.indptr[i + 1]
+        cols, w = weights.indices[start:end], weights.data[start:end]
+        best = cols[np.lexsort((cols, -w))][:top_n]
+        rows.append({
+            "neighborhood": n,
+            "total_posts": int(posts[i]),
+            "flagged_posts": int(flagged[i]),
+            "top_concerns": ", ".join(f"{keywords[k]} ({C[i, k]})" for k in best),
+        })
+    return pd.DataFrame(rows, columns=["neighborhood", "total_posts", "flagged_posts", "top_concerns"])
+
+
+def load_concerns(path=CONCERNS_PATH):
+    # neighborhood -> "followed (4), catcall (2), ..." or None if not built
+    if not os.path.exists(path):
+        return None
+    concerns = pd.read_csv(path).dropna(subset=["top_concerns"])
+    return dict(zip(concerns["neighborhood"], concerns["top_concerns"]))
+
+
+def write_outputs(df, matrices_path=MATRICES_PATH, concerns_path=CONCERNS_PATH):
+    # called by the tagging stage with the located posts
+    builder = MatrixBuilder()
+    builder.update(df)
+    return builder.write(matrices_path, concerns_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Neighborhood x safety-keyword concerns")
+    parser.add_argument("--matrices", default=MATRICES_PATH)
+    parser.add_argument("--located", default="chicago_safety_located.csv",
+                        help="used to build the matrices if they don't exist yet")
+    parser.add_argument("--output", default=CONCERNS_PATH)
+    args = parser.parse_args()
+
+    if os.path.exists(args.matrices):
+        urls, P, K, neighborhoods, keywords = load_matrices(args.matrices)
+        concerns = top_concerns(P, K, neighborhoods, keywords)
+        concerns.to_csv(args.output, index=False)
+    else:
+        df = pd.read_csv(args.located, usecols=["url", "neighborhoods_mentioned", "safety_flags"])
+        for col in ("neighborhoods_mentioned", "safety_flags"):
+            df[col] = df[col].apply(ast.literal_eval)
+        concerns = write_outputs(df, args.matrices, args.output)
+
+    print(concerns.sort_values("flagged_posts", ascending=False).head(15).to_string(index=False))
+    print(f"\nSaved {args.output}")
+
+
+if __name__ == "__main__":
+    main()
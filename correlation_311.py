@@ -0,0 +1,261 @@
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from instrumentation import stage
+from neighborhoods import community_areas, neighborhood_community_area
+from post_table import PostTable
+from temporal_cube import BUCKET_LABELS, HOUR_BUCKET, local_seconds
+
+# ---- 311 REQUESTS vs REDDIT FEAR ----
+# soremo.ipynb saves City of Chicago 311 requests to chicago_311_requests.csv.
+# Both sources are binned onto one (community area, week, time-of-day bucket)
+# grid with a single bincount each:
+#
+#   requests[type, area, week, bucket]   311 requests of each sr_type
+#   fear[area, week, bucket]             fearful posts mentioning the area
+#
+# and, per (sr_type, area), we compute
+#
+#   r             Pearson correlation over the area's week x bucket cells
+#   r_lag_k       correlation of weekly counts with the 311 series k weeks
+#                 earlier (k = 0..MAX_LAG), i.e. requests leading fear
+#   best_lag      the lag with the highest r_lag_k
+#   p_value       permutation p-value of best_lag_r: how often shuffling the
+#                 area's weekly fear series gives a best r (over every sr_type
+#                 and lag) at least as high, so the search over types and
+#                 lags is accounted for
+#   fear_weeks    weeks in which the area has any fearful post
+#
+# all as array reductions over the whole grid. Area 0 is the whole city.
+# Posts are placed by their neighborhoods' community areas (neighborhoods.py)
+# and converted to Chicago local time (temporal_cube.local_seconds, the clock
+# the time charts use too) to match 311's created_date. Only the weeks the
+# 311 extract covers are compared.
+#
+#   python correlation_311.py
+#   python correlation_311.py --types "Street Light Out Complaint,Alley Light Out Complaint"
+#
+# Reddit posts per area-week are sparse and the best of many lags and types
+# is always somewhat positive, so read best_lag_r together with p_value and
+# fear_weeks; the dashboard only shows significant links (dashboard.load_links).
+
+REQUESTS_PATH = "chicago_311_requests.csv"
+SENTIMENT_PATH = "chicago_safety_sentiment.csv"
+OUTPUT_PATH = "correlation_311.csv"
+
+FEAR = "Negative/Fear"
+N_AREAS = max(community_areas) + 1      # index 0 is the citywide total
+N_BUCKETS = len(BUCKET_LABELS)
+MAX_LAG = 4
+# sr_types compared when --types isn't given
+MAX_TYPES = 20
+MIN_REQUESTS = 100
+# shuffles of the weekly fear series behind p_value
+PERMUTATIONS = 999
+PERMUTATION_SEED = 0
+PERMUTATION_BATCH = 50
+
+LAG_COLUMNS = [f"r_lag_{k}" for k in range(MAX_LAG + 1)]
+OUTPUT_COLUMNS = ["sr_type", "community_area", "area", "requests", "fear_posts", "fear_weeks",
+                  "weeks", "r"] + LAG_COLUMNS + ["best_lag", "best_lag_r", "p_value"]
+
+
+# ---- LOADING ----
+def load_requests(path=REQUESTS_PATH):
+    # -> (sr_type Categorical, local unix seconds, community area) arrays
+    df = pd.read_csv(path, usecols=["sr_type", "created_date", "community_area"],
+                     dtype={"sr_type": "category"})
+    created = pd.to_datetime(df["created_date"], format="ISO8601")
+    keep = created.notna().to_numpy()
+    seconds = created.to_numpy(dtype="datetime64[s]").astype(np.int64)
+    area = pd.to_numeric(df["community_area"], errors="coerce").fillna(0).to_numpy(dtype=np.int64, copy=True)
+    area[(area < 0) | (area >= N_AREAS)] = 0
+    return df["sr_type"].array[keep], seconds[keep], area[keep]
+
+
+def week_and_bucket(seconds):
+    # weeks start on Monday; 1970-01-01 was a Thursday
+    week = (seconds // 86400 + 3) // 7
+    bucket = HOUR_BUCKET[(seconds // 3600) % 24].astype(np.int64)
+    return week, bucket
+
+
+# ---- BINNING ----
+def request_grid(type_codes, seconds, area, n_types, first_week, n_weeks):
+    week, bucket = week_and_bucket(seconds)
+    week -= first_week
+    keep = (type_codes >= 0) & (week >= 0) & (week < n_weeks)
+    flat = ((type_codes[keep] * N_AREAS + area[keep]) * n_weeks + week[keep]) * N_BUCKETS + bucket[keep]
+    grid = np.bincount(flat, minlength=n_types * N_AREAS * n_weeks * N_BUCKETS)
+    grid = grid.reshape(n_types, N_AREAS, n_weeks, N_BUCKETS)
+    # slot 0 held requests without a community area; make it the city total
+    grid[:, 0] = grid.sum(axis=1)
+    return grid
+
+
+def fear_grid(table, first_week, n_weeks):
+    area_of = np.array([neighborhood_community_area.get(n, 0) for n in table.neighborhood_names],
+                       dtype=np.int64)
+    posts, codes = table.neighborhood_pairs()
+    areas = area_of[codes] if len(codes) else np.zeros(0, dtype=np.int64)
+    fearful = np.asarray(table.sentiment == FEAR)
+    keep = fearful[posts] & (areas > 0)
+    # a post naming two neighborhoods of one area counts once there
+    pairs = np.unique(posts[keep] * N_AREAS + areas[keep])
+    posts, areas = pairs // N_AREAS, pairs % N_AREAS
+
+    week, bucket = week_and_bucket(local_seconds(table.date)[posts])
+    week -= first_week
+    keep = (week >= 0) & (week < n_weeks)
+    flat = (areas[keep] * n_weeks + week[keep]) * N_BUCKETS + bucket[keep]
+    grid = np.bincount(flat, minlength=N_AREAS * n_weeks * N_BUCKETS).reshape(N_AREAS, n_weeks, N_BUCKETS)
+    # the city total counts each fearful post once, however many areas it names
+    city_posts = np.flatnonzero(fearful)
+    week, bucket = week_and_bucket(local_seconds(table.date[city_posts]))
+    week -= first_week
+    keep = (week >= 0) & (week < n_weeks)
+    grid[0] = np.bincount(week[keep] * N_BUCKETS + bucket[keep],
+                          minlength=n_weeks * N_BUCKETS).reshape(n_weeks, N_BUCKETS)
+    return grid
+
+
+# ---- CORRELATION ----
+def correlate(x, y):
+    # Pearson r along the last axis, broadcasting; NaN where either side is flat
+    x = x - x.mean(axis=-1, keepdims=True)
+    y = y - y.mean(axis=-1, keepdims=True)
+    num = (x * y).sum(axis=-1)
+    den = np.sqrt((x * x).sum(axis=-1) * (y * y).sum(axis=-1))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(den > 0, num / np.where(den > 0, den, 1), np.nan)
+
+
+def best_lag_r(weekly, fear_weekly, n_lags):
+    # max over sr_types and lags of the lagged r, per area; fear_weekly may
+    # carry leading batch axes
+    n_weeks = weekly.shape[-1]
+    best = np.full(fear_weekly.shape[:-1], -np.inf)
+    for k in range(n_lags):
+        r = correlate(weekly[..., :n_weeks - k], fear_weekly[..., None, :, k:])
+        best = np.fmax(best, np.nanmax(np.where(np.isnan(r), -np.inf, r), axis=-2))
+    return best
+
+
+def permutation_p_values(weekly, fear_weekly, n_lags, observed, permutations=PERMUTATIONS,
+                         seed=PERMUTATION_SEED):
+    # the weeks of each area's fear series are shuffled independently; the
+    # best r of a shuffle is compared with every observed r of that area
+    rng = np.random.default_rng(seed)
+    exceed = np.zeros(observed.shape, dtype=np.int64)
+    for start in range(0, permutations, PERMUTATION_BATCH):
+        batch = min(PERMUTATION_BATCH, permutations - start)
+        shuffled = rng.permuted(np.broadcast_to(fear_weekly, (batch,) + fear_weekly.shape), axis=-1)
+        null = best_lag_r(weekly, shuffled, n_lags)
+        exceed += (null[:, None, :] >= observed[None]).sum(axis=0)
+    return (exceed + 1) / (permutations + 1)
+
+
+def correlation_table(requests, fear, type_names, max_lag=MAX_LAG):
+    n_types, _, n_weeks, _ = requests.shape
+    cells = requests.reshape(n_types, N_AREAS, -1).astype(float)
+    fear_cells = fear.reshape(N_AREAS, -1).astype(float)
+    r = correlate(cells, fear_cells[None])
+
+    # weekly series; lag k pairs requests in week w with fear in week w + k
+    weekly = requests.sum(axis=-1).astype(float)
+    fear_weekly = fear.sum(axis=-1).astype(float)
+    lags = np.full((max_lag + 1, n_types, N_AREAS), np.nan)
+    n_lags = min(max_lag, n_weeks - 2) + 1
+    for k in range(n_lags):
+        lags[k] = correlate(weekly[..., :n_weeks - k], fear_weekly[None, :, k:])
+    scored = np.where(np.isnan(lags), -np.inf, lags)
+    best = scored.argmax(axis=0)
+    best_r = np.take_along_axis(lags, best[None], axis=0)[0]
+    p_value = np.where(np.isnan(best_r), 1.0,
+                       permutation_p_values(weekly, fear_weekly, n_lags, np.nan_to_num(best_r)))
+    fear_weeks = (fear_weekly > 0).sum(axis=-1)
+
+    t, a = np.meshgrid(np.arange(n_types), np.arange(N_AREAS), indexing="ij")
+    out = pd.DataFrame({
+        "sr_type": np.asarray(type_names, dtype=object)[t.ravel()],
+        "community_area": a.ravel(),
+        "area": [community_areas.get(i, "Citywide") for i in a.ravel()],
+        "requests": requests.sum(axis=(2, 3)).ravel(),
+        "fear_posts": np.broadcast_to(fear.sum(axis=(1, 2)), (n_types, N_AREAS)).ravel(),
+        "fear_weeks": np.broadcast_to(fear_weeks, (n_types, N_AREAS)).ravel(),
+        "weeks": n_weeks,
+        "r": np.round(r.ravel(), 3),
+    })
+    for k in range(max_lag + 1):
+        out[f"r_lag_{k}"] = np.round(lags[k].ravel(), 3)
+    out["best_lag"] = np.where(np.isnan(best_r), np.nan, best).ravel()
+    out["best_lag_r"] = np.round(best_r.ravel(), 3)
+    out["p_value"] = p_value.ravel()
+    out = out[out["requests"] > 0]
+    return out.sort_values(["community_area", "best_lag_r", "sr_type"],
+                           ascending=[True, False, True], na_position="last", ignore_index=True)
+
+
+def choose_types(sr_type, wanted=None):
+    # codes into the returned names; -1 for requests that aren't compared
+    counts = pd.Series(sr_type).value_counts()
+    if wanted:
+        names = [t for t in wanted if t in counts.index]
+    else:
+        names = counts[counts >= MIN_REQUESTS].index[:MAX_TYPES].tolist()
+    lookup = np.full(len(sr_type.categories), -1, dtype=np.int64)
+    for i, name in enumerate(names):
+        lookup[sr_type.categories.get_loc(name)] = i
+    codes = np.where(sr_type.codes >= 0, lookup[sr_type.codes], -1)
+    return codes, names
+
+
+def correlate_311(sr_type, seconds, area, table, wanted=None, max_lag=MAX_LAG):
+    codes, names = choose_types(sr_type, wanted)
+    if not names or not len(seconds):
+        return pd.DataFrame(columns=OUTPUT_COLUMNS)
+    first_week, last_week = week_and_bucket(np.array([seconds.min(), seconds.max()]))[0]
+    n_weeks = int(last_week - first_week + 1)
+    requests = request_grid(codes, seconds, area, len(names), first_week, n_weeks)
+    fear = fear_grid(table, first_week, n_weeks)
+    return correlation_table(requests, fear, names, max_lag)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Correlate 311 requests with fearful Reddit posts")
+    parser.add_argument("--requests", default=REQUESTS_PATH, help="311 CSV saved by soremo.ipynb")
+    parser.add_argument("--posts", default=SENTIMENT_PATH)
+    parser.add_argument("--output", default=OUTPUT_PATH)
+    parser.add_argument("--types", default="", help="comma-separated sr_types (default: the most common)")
+    parser.add_argument("--max-lag", type=int, default=MAX_LAG, help="weeks of 311 lead to test")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.requests):
+        print(f"{args.requests} not found; save the 311 extract from soremo.ipynb first")
+        return
+
+    with stage("correlate.load_311") as s:
+        sr_type, seconds, area = load_requests(args.requests)
+        s.add(len(seconds))
+    with stage("correlate.load_posts") as s:
+        table = PostTable.load(args.posts)
+        s.add(len(table))
+    wanted = [t.strip() for t in args.types.split(",") if t.strip()]
+    with stage("correlate.grid", items=len(seconds)):
+        corr = correlate_311(sr_type, seconds, area, table, wanted, args.max_lag)
+    corr.to_csv(args.output, index=False)
+
+    city = corr[corr["community_area"] == 0]
+    print(f"{corr['sr_type'].nunique()} request types x {corr['community_area'].nunique() - 1} areas "
+          f"over {corr['weeks'].max() if len(corr) else 0} weeks")
+    print("\nCitywide, strongest 311 leads of fearful posts:")
+    print(city.head(10)[["sr_type", "requests", "fear_posts", "r", "best_lag", "best_lag_r", "p_value"]]
+          .to_string(index=False))
+    print(f"\nSaved {args.output}")
+
+
+if __name__ == "__main__":
+    main()
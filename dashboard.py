@@ -1,105 +1,362 @@
+import argparse
+import base64
+import gzip
+import hashlib
+import json
+import os
+import re
+
 import pandas as pd
 
-df = pd.read_csv("neighborhood_sentiment_summary.csv")
-df = df[df["risk_rating"] != "Insufficient Data"]
-df = df.sort_values("negative_ratio", ascending=False)
-
-high = df[df["risk_rating"] == "High Risk"]
-medium = df[df["risk_rating"] == "Medium Risk"]
-low = df[df["risk_rating"] == "Lower Risk"]
-
-def make_rows(data):
-    rows = ""
-    for _, r in data.iterrows():
-        rows += f"""
-        <tr>
-            <td><b>{r['neighborhood']}</b></td>
-            <td>{r['total_posts']}</td>
-            <td style='color:#ff6b6b'>{r['negative_fear']}</td>
-            <td style='color:#ffd93d'>{r['neutral_concern']}</td>
-            <td style='color:#6bcb77'>{r['positive_reassuring']}</td>
-            <td>{int(r['negative_ratio']*100)}%</td>
-        </tr>"""
-    return rows
-
-html = f"""<!DOCTYPE html>
+import aggregation
+import neighborhoods
+from aggregation import add_risk_intervals
+from instrumentation import stage
+from neighborhoods import neighborhood_community_area
+
+SUMMARY_PATH = "neighborhood_sentiment_summary.csv"
+OUTPUT_PATH = "hersafe_dashboard.html"
+# optional: written by rolling_risk.py; adds the "rising risk" markers
+ROLLING_PATH = "neighborhood_rolling_risk.csv"
+# optional: written by the tagging stage (cooccurrence.py); adds "top concerns"
+CONCERNS_PATH = "neighborhood_top_concerns.csv"
+# optional: written by correlation_311.py; adds the "311" markers
+LINKS_PATH = "correlation_311.csv"
+# a 311 link is only shown when it is significant after correcting for every
+# type and lag tried, positive enough to matter, and the area's fearful posts
+# are spread over enough weeks that one busy week can't make it
+MAX_LINK_P = 0.05
+MIN_LINK_R = 0.3
+MIN_LINK_FEAR_WEEKS = 4
+
+# columns shipped to the browser, in payload order
+COLUMNS = ["neighborhood", "total_posts", "negative_fear", "neutral_concern",
+           "positive_reassuring", "negative_ratio", "smoothed_ratio", "ci_low", "ci_high",
+           "risk_rating"]
+ROLLING_COLUMNS = ["fear_ratio_30d", "trend_30d", "rising"]
+# the page depends on this file (template, columns, payload and link rules)
+# and on the smoothing and community-area code it calls
+CODE_PATHS = [__file__, aggregation.__file__, neighborhoods.__file__]
+
+# The page is static: the data travels as one gzipped, base64-encoded JSON
+# payload that the browser decompresses and renders into a virtualized table,
+# so page size and render cost stay small however many rows there are.
+TEMPLATE = """<!DOCTYPE html>
 <html>
 <head>
     <meta charset="UTF-8">
+    <meta name="hersafe-data-hash" content="__HASH__">
     <title>HerSafe Chicago - Safety Dashboard</title>
     <style>
-        * {{ margin: 0; padding: 0; box-sizing: border-box; }}
-        body {{ background: #0f0f1a; color: #eee; font-family: 'Segoe UI', Arial, sans-serif; padding: 30px; }}
-        h1 {{ text-align: center; font-size: 2.2em; color: #fff; margin-bottom: 5px; }}
-        .subtitle {{ text-align: center; color: #aaa; margin-bottom: 40px; font-size: 1em; }}
-
-        .stats-row {{ display: flex; justify-content: center; gap: 20px; margin-bottom: 40px; flex-wrap: wrap; }}
-        .stat-box {{ background: #1a1a2e; border-radius: 12px; padding: 20px 30px; text-align: center; min-width: 150px; }}
-        .stat-box .number {{ font-size: 2.5em; font-weight: bold; }}
-        .stat-box .label {{ font-size: 0.85em; color: #aaa; margin-top: 5px; }}
-        .red {{ color: #ff6b6b; }} .orange {{ color: #ffa94d; }}
-        .green {{ color: #6bcb77; }} .white {{ color: #fff; }}
-
-        .section {{ margin-bottom: 35px; }}
-        .section h2 {{ font-size: 1.3em; margin-bottom: 12px; padding: 8px 15px;
-                       border-radius: 8px; display: inline-block; }}
-        .high-title {{ background: rgba(255,107,107,0.15); color: #ff6b6b; }}
-        .med-title  {{ background: rgba(255,169,77,0.15);  color: #ffa94d; }}
-        .low-title  {{ background: rgba(107,203,119,0.15); color: #6bcb77; }}
-
-        table {{ width: 100%; border-collapse: collapse; background: #1a1a2e; border-radius: 10px; overflow: hidden; }}
-        th {{ background: #16213e; padding: 12px 15px; text-align: left; font-size: 0.85em; color: #aaa; text-transform: uppercase; }}
-        td {{ padding: 11px 15px; border-bottom: 1px solid #222; font-size: 0.95em; }}
-        tr:last-child td {{ border-bottom: none; }}
-        tr:hover td {{ background: #16213e; }}
-
-        .footer {{ text-align: center; color: #555; margin-top: 40px; font-size: 0.85em; }}
+        * { margin: 0; padding: 0; box-sizing: border-box; }
+        body { background: #0f0f1a; color: #eee; font-family: 'Segoe UI', Arial, sans-serif; padding: 30px; }
+        h1 { text-align: center; font-size: 2.2em; color: #fff; margin-bottom: 5px; }
+        .subtitle { text-align: center; color: #aaa; margin-bottom: 40px; font-size: 1em; }
+
+        .stats-row { display: flex; justify-content: center; gap: 20px; margin-bottom: 40px; flex-wrap: wrap; }
+        .stat-box { background: #1a1a2e; border-radius: 12px; padding: 20px 30px; text-align: center; min-width: 150px; }
+        .stat-box .number { font-size: 2.5em; font-weight: bold; }
+        .stat-box .label { font-size: 0.85em; color: #aaa; margin-top: 5px; }
+        .red { color: #ff6b6b; } .orange { color: #ffa94d; }
+        .green { color: #6bcb77; } .white { color: #fff; } .gray { color: #888; }
+
+        .filters { display: flex; gap: 15px; align-items: center; flex-wrap: wrap; margin-bottom: 15px; }
+        .filters input[type=text], .filters input[type=number] {
+            background: #1a1a2e; color: #eee; border: 1px solid #333; border-radius: 8px; padding: 8px 12px; }
+        .filters label { font-size: 0.9em; color: #ccc; cursor: pointer; }
+        .count { margin-left: auto; color: #888; font-size: 0.85em; }
+
+        .grid-row { display: grid; grid-template-columns: 2.4fr 1fr 1fr 1fr 1fr 1fr 1.3fr 2.4fr; align-items: center; }
+        .head { background: #16213e; border-radius: 10px 10px 0 0; }
+        .head div { padding: 12px 15px; font-size: 0.85em; color: #aaa; text-transform: uppercase; cursor: pointer; user-select: none; }
+        .head div.sorted { color: #fff; }
+        .viewport { height: 600px; overflow-y: auto; background: #1a1a2e; border-radius: 0 0 10px 10px; position: relative; }
+        .viewport .row { position: absolute; left: 0; right: 0; height: 42px; border-bottom: 1px solid #222; }
+        .viewport .row:hover { background: #16213e; }
+        .viewport .row div { padding: 0 15px; font-size: 0.95em; white-space: nowrap; overflow: hidden; text-overflow: ellipsis; }
+
+        .ci { color: #777; font-size: 0.8em; margin-left: 4px; }
+        .rising-badge { color: #ff6b6b; font-size: 0.8em; margin-left: 6px; }
+        .link-badge { color: #74c0fc; font-size: 0.8em; margin-left: 6px; cursor: help; }
+        .hidden { display: none; }
+
+        .footer { text-align: center; color: #555; margin-top: 40px; font-size: 0.85em; }
     </style>
 </head>
 <body>
     <h1>HerSafe Chicago</h1>
-    <p class="subtitle">Community Safety Signals from Reddit &middot; {len(df)} neighborhoods analyzed &middot; {df['total_posts'].sum()} posts</p>
+    <p class="subtitle" id="subtitle">Loading&hellip;</p>
 
     <div class="stats-row">
-        <div class="stat-box"><div class="number red">{len(high)}</div><div class="label">High Risk Neighborhoods</div></div>
-        <div class="stat-box"><div class="number orange">{len(medium)}</div><div class="label">Medium Risk Neighborhoods</div></div>
-        <div class="stat-box"><div class="number green">{len(low)}</div><div class="label">Lower Risk Neighborhoods</div></div>
-        <div class="stat-box"><div class="number white">{df['total_posts'].sum()}</div><div class="label">Total Posts Analyzed</div></div>
-        <div class="stat-box"><div class="number white">{df['negative_fear'].sum()}</div><div class="label">Fearful Posts Detected</div></div>
-    </div>
-
-    <div class="section">
-        <h2 class="high-title">High Risk Neighborhoods</h2>
-        <table>
-            <tr><th>Neighborhood</th><th>Total Posts</th><th>Fearful</th><th>Concerned</th><th>Reassuring</th><th>Fear %</th></tr>
-            {make_rows(high)}
-        </table>
+        <div class="stat-box"><div class="number red" id="stat-high">-</div><div class="label">High Risk Neighborhoods</div></div>
+        <div class="stat-box"><div class="number orange" id="stat-medium">-</div><div class="label">Medium Risk Neighborhoods</div></div>
+        <div class="stat-box"><div class="number green" id="stat-low">-</div><div class="label">Lower Risk Neighborhoods</div></div>
+        <div class="stat-box"><div class="number white" id="stat-posts">-</div><div class="label">Total Posts Analyzed</div></div>
+        <div class="stat-box"><div class="number white" id="stat-fear">-</div><div class="label">Fearful Posts Detected</div></div>
+        <div class="stat-box hidden" id="rising-box"><div class="number red" id="stat-rising">-</div><div class="label">Rising Risk (30 days)</div></div>
     </div>
 
-    <div class="section">
-        <h2 class="med-title">Medium Risk Neighborhoods</h2>
-        <table>
-            <tr><th>Neighborhood</th><th>Total Posts</th><th>Fearful</th><th>Concerned</th><th>Reassuring</th><th>Fear %</th></tr>
-            {make_rows(medium)}
-        </table>
+    <div class="filters">
+        <input type="text" id="search" placeholder="Search neighborhood...">
+        <label><input type="checkbox" class="risk" value="High Risk" checked> High</label>
+        <label><input type="checkbox" class="risk" value="Medium Risk" checked> Medium</label>
+        <label><input type="checkbox" class="risk" value="Lower Risk" checked> Lower</label>
+        <label><input type="checkbox" class="risk" value="Insufficient Data"> Insufficient data</label>
+        <label class="hidden" id="rising-filter"><input type="checkbox" id="rising-only"> Rising risk only</label>
+        <label>Min posts <input type="number" id="min-posts" value="0" min="0" style="width:80px"></label>
+        <span class="count" id="count"></span>
     </div>
 
-    <div class="section">
-        <h2 class="low-title">Lower Risk Neighborhoods</h2>
-        <table>
-            <tr><th>Neighborhood</th><th>Total Posts</th><th>Fearful</th><th>Concerned</th><th>Reassuring</th><th>Fear %</th></tr>
-            {make_rows(low)}
-        </table>
+    <div class="grid-row head" id="head">
+        <div data-col="neighborhood">Neighborhood</div>
+        <div data-col="total_posts">Total Posts</div>
+        <div data-col="negative_fear">Fearful</div>
+        <div data-col="neutral_concern">Concerned</div>
+        <div data-col="positive_reassuring">Reassuring</div>
+        <div data-col="smoothed_ratio" class="sorted" title="Smoothed toward the city-wide rate; 90% interval in grey">Fear % &#9660;</div>
+        <div data-col="risk_rating">Risk</div>
+        <div data-col="top_concerns">Top Concerns</div>
     </div>
+    <div class="viewport" id="viewport"><div id="spacer"></div></div>
 
     <div class="footer">
         HerSafe &middot; Data sourced from Reddit community posts &middot; For research purposes only
     </div>
+
+    <script id="payload" type="application/octet-stream">__PAYLOAD__</script>
+    <script>
+    const ROW_HEIGHT = 42, OVERSCAN = 10;
+    const RISK_CLASS = {"High Risk": "red", "Medium Risk": "orange", "Lower Risk": "green", "Insufficient Data": "gray"};
+    let columns = [], rows = [], view = [];
+    let sortCol = "smoothed_ratio", sortDesc = true;
+
+    async function loadPayload() {
+        const b64 = document.getElementById("payload").textContent.trim();
+        const bytes = Uint8Array.from(atob(b64), c => c.charCodeAt(0));
+        const stream = new Blob([bytes]).stream().pipeThrough(new DecompressionStream("gzip"));
+        return JSON.parse(await new Response(stream).text());
+    }
+
+    function col(name) { return columns.indexOf(name); }
+
+    function renderStats() {
+        const risk = col("risk_rating"), total = col("total_posts"), fear = col("negative_fear");
+        const rated = rows.filter(r => r[risk] !== "Insufficient Data");
+        const count = label => rated.filter(r => r[risk] === label).length;
+        const posts = rated.reduce((s, r) => s + r[total], 0);
+        document.getElementById("stat-high").textContent = count("High Risk");
+        document.getElementById("stat-medium").textContent = count("Medium Risk");
+        document.getElementById("stat-low").textContent = count("Lower Risk");
+        document.getElementById("stat-posts").textContent = posts;
+        document.getElementById("stat-fear").textContent = rated.reduce((s, r) => s + r[fear], 0);
+        document.getElementById("subtitle").innerHTML =
+            `Community Safety Signals from Reddit &middot; ${rated.length} neighborhoods analyzed &middot; ${posts} posts`;
+        if (col("rising") >= 0) {
+            document.getElementById("stat-rising").textContent = rows.filter(r => r[col("rising")]).length;
+            document.getElementById("rising-box").classList.remove("hidden");
+            document.getElementById("rising-filter").classList.remove("hidden");
+        }
+    }
+
+    function applyFilters() {
+        const q = document.getElementById("search").value.trim().toLowerCase();
+        const minPosts = Number(document.getElementById("min-posts").value) || 0;
+        const risks = new Set([...document.querySelectorAll(".risk:checked")].map(c => c.value));
+        const risingOnly = document.getElementById("rising-only").checked;
+        const name = col("neighborhood"), risk = col("risk_rating"), total = col("total_posts"), rising = col("rising");
+        const s = col(sortCol), dir = sortDesc ? -1 : 1;
+        view = rows.filter(r => risks.has(r[risk]) && r[total] >= minPosts
+                                && (!risingOnly || r[rising])
+                                && (!q || r[name].toLowerCase().includes(q)));
+        view.sort((a, b) => (a[s] < b[s] ? -1 : a[s] > b[s] ? 1 : 0) * dir);
+        document.getElementById("count").textContent = `${view.length} of ${rows.length} neighborhoods`;
+        document.getElementById("spacer").style.height = (view.length * ROW_HEIGHT) + "px";
+        renderRows(true);
+    }
+
+    let lastStart = -1;
+    function renderRows(force) {
+        const viewport = document.getElementById("viewport");
+        const start = Math.max(0, Math.floor(viewport.scrollTop / ROW_HEIGHT) - OVERSCAN);
+        if (!force && start === lastStart) return;
+        lastStart = start;
+        const end = Math.min(view.length, start + Math.ceil(viewport.clientHeight / ROW_HEIGHT) + 2 * OVERSCAN);
+        const c = name => col(name);
+        let html = "";
+        for (let i = start; i < end; i++) {
+            const r = view[i];
+            const risk = r[c("risk_rating")];
+            const concerns = c("top_concerns") >= 0 ? r[c("top_concerns")] : "";
+            const badge = c("rising") >= 0 && r[c("rising")]
+                ? `<span class="rising-badge" title="30-day fear ${Math.round(r[c("fear_ratio_30d")] * 100)}%, up ${Math.round(r[c("trend_30d")] * 100)} pts on 90 days">&#9650; rising</span>`
+                : "";
+            const link = c("link_311") >= 0 && r[c("link_311")]
+                ? `<span class="link-badge" title="Tracks 311 requests in its community area: ${escapeHtml(r[c("link_311")])}">311</span>`
+                : "";
+            html += `<div class="grid-row row" style="top:${i * ROW_HEIGHT}px;line-height:${ROW_HEIGHT}px">`
+                + `<div><b>${escapeHtml(r[c("neighborhood")])}</b>${badge}${link}</div>`
+                + `<div>${r[c("total_posts")]}</div>`
+                + `<div style="color:#ff6b6b">${r[c("negative_fear")]}</div>`
+                + `<div style="color:#ffd93d">${r[c("neutral_concern")]}</div>`
+                + `<div style="color:#6bcb77">${r[c("positive_reassuring")]}</div>`
+                + `<div title="raw ${pct(r[c("negative_ratio")])}% of ${r[c("total_posts")]} posts">${pct(r[c("smoothed_ratio")])}%`
+                + `<span class="ci">${pct(r[c("ci_low")])}&ndash;${pct(r[c("ci_high")])}</span></div>`
+                + `<div class="${RISK_CLASS[risk] || ""}">${escapeHtml(risk)}</div>`
+                + `<div style="color:#aaa" title="${escapeHtml(concerns)}">${escapeHtml(concerns)}</div></div>`;
+        }
+        document.getElementById("spacer").innerHTML = html;
+    }
+
+    function pct(x) { return Math.round(x * 100); }
+
+    function escapeHtml(s) {
+        return String(s).replace(/[&<>"']/g, ch => ({"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;", "'": "&#39;"}[ch]));
+    }
+
+    function bindControls() {
+        document.getElementById("search").addEventListener("input", applyFilters);
+        document.getElementById("min-posts").addEventListener("input", applyFilters);
+        document.getElementById("rising-only").addEventListener("change", applyFilters);
+        document.querySelectorAll(".risk").forEach(c => c.addEventListener("change", applyFilters));
+        document.getElementById("viewport").addEventListener("scroll", () => requestAnimationFrame(() => renderRows(false)));
+        document.querySelectorAll("#head div").forEach(h => h.addEventListener("click", () => {
+            const name = h.dataset.col;
+            sortDesc = name === sortCol ? !sortDesc : name !== "neighborhood";
+            sortCol = name;
+            document.querySelectorAll("#head div").forEach(o => {
+                o.classList.toggle("sorted", o === h);
+                o.innerHTML = o.innerHTML.replace(/ [\\u25B2\\u25BC]$/, "");
+            });
+            h.innerHTML += sortDesc ? " &#9660;" : " &#9650;";
+            applyFilters();
+        }));
+    }
+
+    loadPayload().then(data => {
+        columns = data.columns;
+        rows = data.rows;
+        renderStats();
+        bindControls();
+        applyFilters();
+    });
+    </script>
 </body>
 </html>"""
 
-with open("hersafe_dashboard.html", "w", encoding="utf-8") as f:
-    f.write(html)
+HASH_RE = re.compile(r'<meta name="hersafe-data-hash" content="([0-9a-f]+)">')
+
+
+def content_hash(summary_bytes, *optional_bytes):
+    # the code is part of the hash so layout or payload changes still regenerate
+    h = hashlib.sha256()
+    h.update(summary_bytes)
+    for data in optional_bytes:
+        h.update(hashlib.sha256(data).digest())
+    for path in CODE_PATHS:
+        h.update(hashlib.sha256(read_optional(path)).digest())
+    return h.hexdigest()
+
+
+def existing_hash(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        head = f.read(2048)
+    match = HASH_RE.search(head)
+    return match.group(1) if match else None
+
+
+def load_links(path=LINKS_PATH, max_p=MAX_LINK_P, min_r=MIN_LINK_R, min_fear_weeks=MIN_LINK_FEAR_WEEKS):
+    # community area -> its strongest significant 311 link, e.g.
+    # "Street Light Out Complaint: r 0.42, 2 wk ahead"; None if not computed
+    if not os.path.exists(path):
+        return None
+    corr = pd.read_csv(path)
+    if "p_value" not in corr:
+        # written before the significance test; nothing in it can be trusted
+        return {}
+    corr = corr[(corr["p_value"] <= max_p) & (corr["best_lag_r"] >= min_r)
+                & (corr["fear_weeks"] >= min_fear_weeks)]
+    best = corr.sort_values("best_lag_r", ascending=False).drop_duplicates("community_area")
+    return {int(row.community_area): f"{row.sr_type}: r {row.best_lag_r:.2f}"
+            + (f", {int(row.best_lag)} wk ahead" if row.best_lag else ", same week")
+            for row in best.itertuples()}
+
+
+def build_payload(df, rolling=None, concerns=None, links=None):
+    columns = list(COLUMNS)
+    if "smoothed_ratio" not in df:
+        # summaries written before smoothing was added
+        df = add_risk_intervals(df)
+    df = df[columns]
+    if rolling is not None:
+        df = df.merge(rolling[["neighborhood"] + ROLLING_COLUMNS], on="neighborhood", how="left")
+        df["rising"] = df["rising"].fillna(False).astype(bool)
+        # NaN isn't valid JSON; no recent posts means no 30-day ratio
+        df[["fear_ratio_30d", "trend_30d"]] = df[["fear_ratio_30d", "trend_30d"]].fillna(0)
+        columns += ROLLING_COLUMNS
+    if concerns is not None:
+        df = df.merge(concerns[["neighborhood", "top_concerns"]], on="neighborhood", how="left")
+        df["top_concerns"] = df["top_concerns"].fillna("")
+        columns.append("top_concerns")
+    if links is not None:
+        # links: {community area: "Street Light Out Complaint: r 0.42, ..."}
+        areas = df["neighborhood"].map(neighborhood_community_area)
+        df["link_311"] = areas.map(links).fillna("")
+        columns.append("link_311")
+    df = df.sort_values("smoothed_ratio", ascending=False)
+    data = {"columns": columns, "rows": df.values.tolist()}
+    raw = json.dumps(data, separators=(",", ":")).encode("utf-8")
+    return base64.b64encode(gzip.compress(raw, mtime=0)).decode("ascii")
+
+
+def render_html(df, digest, rolling=None, concerns=None, links=None):
+    payload = build_payload(df, rolling, concerns, links)
+    return TEMPLATE.replace("__HASH__", digest).replace("__PAYLOAD__", payload)
+
+
+def read_optional(path):
+    if not os.path.exists(path):
+        return b""
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the HerSafe dashboard")
+    parser.add_argument("--input", default=SUMMARY_PATH)
+    parser.add_argument("--rolling", default=ROLLING_PATH, help="rolling-risk CSV, used if present")
+    parser.add_argument("--concerns", default=CONCERNS_PATH, help="top-concerns CSV, used if present")
+    parser.add_argument("--links", default=LINKS_PATH, help="311 correlation CSV, used if present")
+    parser.add_argument("--output", default=OUTPUT_PATH)
+    parser.add_argument("--force", action="store_true", help="rebuild even if the data is unchanged")
+    args = parser.parse_args()
+
+    with open(args.input, "rb") as f:
+        summary_bytes = f.read()
+    rolling_bytes = read_optional(args.rolling)
+    concerns_bytes = read_optional(args.concerns)
+    links_bytes = read_optional(args.links)
+    digest = content_hash(summary_bytes, rolling_bytes, concerns_bytes, links_bytes)
+
+    if not args.force and existing_hash(args.output) == digest:
+        print(f"Summary unchanged, {args.output} is up to date")
+        return
+
+    with stage("dashboard.build") as s:
+        df = pd.read_csv(args.input)
+        rolling = pd.read_csv(args.rolling) if rolling_bytes else None
+        concerns = pd.read_csv(args.concerns) if concerns_bytes else None
+        links = load_links(args.links) if links_bytes else None
+        html = render_html(df, digest, rolling, concerns, links)
+        s.add(len(df))
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        f.write(html)
+
+    print(f"Dashboard saved as {args.output}")
+    print("Open it in your browser!")
+
 
-print("Dashboard saved as hersafe_dashboard.html")
-print("Open it in your browser!")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
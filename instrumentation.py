@@ -0,0 +1,189 @@
+import atexit
+import cProfile
+import io
+import json
+import os
+import platform
+import pstats
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+# Lightweight per-stage instrumentation shared by the pipeline scripts.
+#
+#   with stage("extract.tag_neighborhoods", items=len(df)):
+#       ...
+#
+# Every stage records wall time and items/sec, plus its tracemalloc peak
+# memory when HERSAFE_TRACEMALLOC=1 (off by default: tracing slows
+# allocation-heavy stages several times over). At exit each process writes its records to run_reports/<run_id>/; pipeline.py
+# merges them into one run_reports/<run_id>.json per run.
+#
+# Environment:
+#   HERSAFE_RUN_ID=<id>        group records from several processes (set by pipeline.py)
+#   HERSAFE_PROFILE=<stage>    run that stage under cProfile and dump a .prof file
+#   HERSAFE_TRACEMALLOC=1      record per-stage peak memory (pipeline.py --memory)
+#   HERSAFE_REPORTS=0          don't write run_reports/ at exit (benchmark.py children)
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+REPORT_DIR = os.path.join(ROOT, "run_reports")
+
+SCRIPT = os.path.splitext(os.path.basename(sys.argv[0] or "interactive"))[0]
+RUN_ID = os.environ.get("HERSAFE_RUN_ID") or time.strftime("%Y%m%d-%H%M%S") + f"-{SCRIPT}"
+PROFILE_STAGE = os.environ.get("HERSAFE_PROFILE", "")
+TRACE_MEMORY = os.environ.get("HERSAFE_TRACEMALLOC", "0") == "1"
+
+_records = []
+# peak bytes seen so far by each enclosing stage; nested stages reset the
+# tracemalloc peak, so the outer stage folds their peaks back in on exit
+_peak_stack = []
+
+
+def _record(name, wall, items, peak_bytes, extra=None):
+    rec = {
+        "stage": name,
+        "script": SCRIPT,
+        "pid": os.getpid(),
+        "wall_s": round(wall, 4),
+        "items": items,
+        "items_per_s": round(items / wall, 1) if items and wall > 0 else None,
+        "peak_mem_mb": round(peak_bytes / 2**20, 2) if peak_bytes is not None else None,
+    }
+    if extra:
+        rec.update(extra)
+    _records.append(rec)
+    return rec
+
+
+class StageHandle:
+    def __init__(self, items):
+        self.items = items or 0
+
+    def add(self, n=1):
+        self.items += n
+
+
+@contextmanager
+def stage(name, items=None, memory=True):
+    memory = memory and TRACE_MEMORY
+    started_tracing = False
+    if memory:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            started_tracing = True
+        elif _peak_stack:
+            _peak_stack[-1] = max(_peak_stack[-1], tracemalloc.get_traced_memory()[1])
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        _peak_stack.append(0)
+
+    profiler = cProfile.Profile() if PROFILE_STAGE and name == PROFILE_STAGE else None
+    handle = StageHandle(items)
+    start = time.perf_counter()
+    if profiler:
+        profiler.enable()
+    try:
+        yield handle
+    finally:
+        if profiler:
+            profiler.disable()
+        wall = time.perf_counter() - start
+
+        peak = None
+        if memory:
+            inner_peak = _peak_stack.pop()
+            peak = max(inner_peak, tracemalloc.get_traced_memory()[1]) - base
+            if _peak_stack:
+                _peak_stack[-1] = max(_peak_stack[-1], base + peak)
+            if started_tracing:
+                tracemalloc.stop()
+
+        extra = _dump_profile(name, profiler) if profiler else None
+        rec = _record(name, wall, handle.items, peak, extra)
+        rate = f", {rec['items_per_s']:.0f} items/s" if rec["items_per_s"] else ""
+        mem = f", peak {rec['peak_mem_mb']} MB" if rec["peak_mem_mb"] is not None else ""
+        print(f"  [timing] {name}: {wall:.2f}s{rate}{mem}")
+
+
+def _dump_profile(name, profiler):
+    os.makedirs(os.path.join(REPORT_DIR, RUN_ID), exist_ok=True)
+    path = os.path.join(REPORT_DIR, RUN_ID, f"{SCRIPT}-{name}.prof")
+    profiler.dump_stats(path)
+    out = io.StringIO()
+    pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(15)
+    return {"profile": os.path.relpath(path, ROOT), "profile_top": out.getvalue()}
+
+
+def records():
+    return list(_records)
+
+
+def flush():
+    # safe to call repeatedly (e.g. from pool workers after each task); forked
+    # workers inherit the parent's records, so only this process's are written
+    pid = os.getpid()
+    mine = [r for r in _records if r["pid"] == pid]
+    if not mine:
+        return None
+    os.makedirs(os.path.join(REPORT_DIR, RUN_ID), exist_ok=True)
+    path = os.path.join(REPORT_DIR, RUN_ID, f"{SCRIPT}-{pid}.json")
+    with open(path, "w") as f:
+        json.dump({"script": SCRIPT, "pid": pid, "stages": mine}, f, indent=2)
+    return path
+
+
+def cpu_model():
+    # platform.processor() is often empty on Linux
+    try:
+        with open("/proc/cpuinfo") as f:
+            for line in f:
+                if line.startswith("model name"):
+                    return line.split(":", 1)[1].strip()
+    except OSError:
+        pass
+    return platform.processor()
+
+
+def environment():
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu": cpu_model(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def merge_run(run_id, pipeline_stages=None):
+    # combine every process's records for a run into run_reports/<run_id>.json
+    run_dir = os.path.join(REPORT_DIR, run_id)
+    stages = []
+    if os.path.isdir(run_dir):
+        for fname in sorted(os.listdir(run_dir)):
+            if fname.endswith(".json"):
+                with open(os.path.join(run_dir, fname)) as f:
+                    stages.extend(json.load(f)["stages"])
+    report = {
+        "run_id": run_id,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "environment": environment(),
+        "pipeline": pipeline_stages or [],
+        "stages": stages,
+    }
+    os.makedirs(REPORT_DIR, exist_ok=True)
+    path = os.path.join(REPORT_DIR, f"{run_id}.json")
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+    return path
+
+
+def _at_exit():
+    if os.environ.get("HERSAFE_REPORTS") == "0":
+        return
+    path = flush()
+    # standalone script runs get their own merged report right away
+    if path and not os.environ.get("HERSAFE_RUN_ID"):
+        print(f"  [timing] report saved to {os.path.relpath(merge_run(RUN_ID), ROOT)}")
+
+
+atexit.register(_at_exit)
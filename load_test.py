@@ -0,0 +1,123 @@
+import argparse
+import http.client
+import random
+import threading
+import time
+from urllib.parse import quote, urlparse
+
+from neighborhoods import neighborhood_coords
+
+# Open-loop load test for neighborhood_service.py: requests are scheduled at
+# a fixed rate regardless of how fast the server answers, and latency is
+# measured from the scheduled send time so queueing delay is not hidden.
+#
+#   python neighborhood_service.py &
+#   python load_test.py --qps 500 --duration 20
+
+# Chicago bounding box for random "where am I" points
+LAT_RANGE = (41.65, 42.02)
+LON_RANGE = (-87.85, -87.53)
+
+
+def build_queries(n, hot_fraction, seed):
+    rng = random.Random(seed)
+    names = list(neighborhood_coords)
+    # a small set of popular spots that should mostly be served from cache
+    hot = [f"/nearest?lat={lat:.4f}&lon={lon:.4f}&k=5"
+           for lat, lon in neighborhood_coords.values()]
+
+    queries = []
+    for _ in range(n):
+        r = rng.random()
+        if r < hot_fraction:
+            queries.append(rng.choice(hot))
+        elif r < hot_fraction + (1 - hot_fraction) / 2:
+            lat = rng.uniform(*LAT_RANGE)
+            lon = rng.uniform(*LON_RANGE)
+            queries.append(f"/nearest?lat={lat:.5f}&lon={lon:.5f}&k={rng.randint(1, 10)}")
+        else:
+            queries.append("/neighborhood/" + quote(rng.choice(names)))
+    return queries
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return float("nan")
+    i = min(len(sorted_values) - 1, int(round(p / 100 * (len(sorted_values) - 1))))
+    return sorted_values[i]
+
+
+def run(base_url, qps, duration, workers, hot_fraction, seed):
+    url = urlparse(base_url)
+    total = int(qps * duration)
+    queries = build_queries(total, hot_fraction, seed)
+
+    latencies = []
+    errors = [0]
+    next_index = [0]
+    lock = threading.Lock()
+    start = time.perf_counter() + 0.2
+
+    def worker():
+        conn = http.client.HTTPConnection(url.hostname, url.port or 80, timeout=10)
+        local = []
+        while True:
+            with lock:
+                i = next_index[0]
+                next_index[0] += 1
+            if i >= total:
+                break
+            scheduled = start + i / qps
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            try:
+                conn.request("GET", queries[i])
+                resp = conn.getresponse()
+                resp.read()
+                if resp.status >= 500:
+                    with lock:
+                        errors[0] += 1
+            except (OSError, http.client.HTTPException):
+                with lock:
+                    errors[0] += 1
+                conn.close()
+                conn = http.client.HTTPConnection(url.hostname, url.port or 80, timeout=10)
+                continue
+            local.append(time.perf_counter() - scheduled)
+        conn.close()
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(workers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    print(f"Target QPS:   {qps}")
+    print(f"Achieved QPS: {len(latencies) / elapsed:.1f}")
+    print(f"Requests:     {len(latencies)} ok, {errors[0]} errors")
+    print(f"p50 latency:  {percentile(latencies, 50) * 1000:.2f} ms")
+    print(f"p99 latency:  {percentile(latencies, 99) * 1000:.2f} ms")
+    print(f"max latency:  {percentile(latencies, 100) * 1000:.2f} ms")
+    return latencies, errors[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the neighborhood lookup service")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--qps", type=float, default=200)
+    parser.add_argument("--duration", type=float, default=10, help="seconds")
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--hot-fraction", type=float, default=0.6,
+                        help="share of queries drawn from a small repeated set")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    run(args.url, args.qps, args.duration, args.workers, args.hot_fraction, args.seed)
+
+
+if __name__ == "__main__":
+    main()
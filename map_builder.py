@@ -0,0 +1,103 @@
+from html import escape
+from urllib.parse import urlencode
+
+import folium
+
+from aggregation import add_risk_intervals
+from neighborhoods import neighborhood_coords
+
+# Folium map of the neighborhood sentiment summary, used by safety-map.py and
+# the benchmarks.
+
+# popups link to the local search service (neighborhood_service.py)
+SEARCH_URL = "http://127.0.0.1:8000/search"
+
+def posts_link(search_url, label, **params):
+    query = urlencode(dict(params, format="html", k=20))
+    return f"<a href='{search_url}?{query}' target='_blank'>{label}</a>"
+
+def quote_html(q):
+    # one snippet from snippets.py with the neighborhood mention in bold
+    s, start, end = q["snippet"], q["mention_start"], q["mention_end"]
+    return (f"<div style='font-size:11px;color:#555;margin:3px 0'>“{escape(s[:start])}"
+            f"<b>{escape(s[start:end])}</b>{escape(s[end:])}”</div>")
+
+# ---- LEGEND ----
+legend_html = """
+<div style="position: fixed; bottom: 30px; left: 30px; z-index: 1000;
+     background-color: #1a1a1a; padding: 15px; border-radius: 10px;
+     color: white; font-family: Arial; font-size: 13px; 
+     border: 1px solid #444;">
+    <b style="font-size:15px">HerSafe Chicago</b><br>
+    <i style="font-size:11px">Reddit Community Safety Signals</i><br><br>
+    🔴 High Risk (smoothed fear ratio &ge;50%,<br>
+    &nbsp;&nbsp;&nbsp;&nbsp;&nbsp;interval low end &ge;30%)<br>
+    🟠 Medium Risk (smoothed &ge;30%)<br>
+    🟢 Lower Risk (smoothed &lt;30%)<br>
+    ⚫ Insufficient Data (&lt;3 posts)<br><br>
+    <i style="font-size:11px">Smoothed = fearful share pulled toward<br>
+    the city-wide rate, so small samples don't swing</i><br><br>
+    <i style="font-size:11px">Circle size = number of posts<br>
+    Click circles for details</i>
+</div>
+"""
+
+def build_map(summary_df, search_url=SEARCH_URL, concerns=None, quotes=None):
+    # concerns: optional {neighborhood: "followed (4), ..."} from cooccurrence.py
+    # quotes: optional {neighborhood: [snippet, ...]} from SnippetStore.top_quotes
+    concerns = concerns or {}
+    quotes = quotes or {}
+    if "smoothed_ratio" not in summary_df:
+        # summaries written before smoothing was added
+        summary_df = add_risk_intervals(summary_df)
+    m = folium.Map(location=[41.8827, -87.6278], zoom_start=11,
+                   tiles="CartoDB dark_matter")
+
+    for _, row in summary_df.iterrows():
+        n = row["neighborhood"]
+        if n not in neighborhood_coords:
+            continue
+
+        lat, lon = neighborhood_coords[n]
+        color = row["color"]
+        total = row["total_posts"]
+        neg = row["negative_fear"]
+        pos = row["positive_reassuring"]
+        neutral = row["neutral_concern"]
+        risk = row["risk_rating"]
+        ratio = row["negative_ratio"]
+        smoothed, low, high = row["smoothed_ratio"], row["ci_low"], row["ci_high"]
+        concern_line = f"<b>Top concerns:</b> {concerns[n]}<br>" if n in concerns else ""
+        quote_lines = ""
+        if quotes.get(n):
+            quote_lines = "<br><b>Fearful posts say:</b>" + "".join(quote_html(q) for q in quotes[n])
+
+        # scale circle size by number of posts (more data = bigger circle)
+        radius = 5 + (total / 10)
+
+        folium.CircleMarker(
+            location=[lat, lon],
+            radius=radius,
+            color=color,
+            fill=True,
+            fill_color=color,
+            fill_opacity=0.65,
+            popup=folium.Popup(
+                f"<b style='font-size:14px'>{n}</b><br><br>"
+                f"<b>Risk Rating:</b> {risk}<br>"
+                f"<b>Total Posts:</b> {total}<br>"
+                f"😨 Fearful: {neg} posts<br>"
+                f"⚠️ Concerned: {neutral} posts<br>"
+                f"✅ Reassuring: {pos} posts<br>"
+                f"<b>Fear Ratio:</b> {ratio}<br>"
+                f"<b>Smoothed:</b> {smoothed:.2f} (90% CI {low:.2f}–{high:.2f})<br>"
+                f"{concern_line}{quote_lines}<br>"
+                f"{posts_link(search_url, 'Show posts', neighborhood=n)} &middot; "
+                f"{posts_link(search_url, 'Fearful posts', neighborhood=n, sentiment='Negative/Fear')}",
+                max_width=300 if quote_lines else 220
+            ),
+            tooltip=f"{n} — {risk}"
+        ).add_to(m)
+
+    m.get_root().html.add_child(folium.Element(legend_html))
+    return m
@@ -0,0 +1,215 @@
+import argparse
+import os
+import re
+import zlib
+
+import numpy as np
+import pandas as pd
+
+from instrumentation import stage
+
+# ---- NEAR-DUPLICATE POSTS (MinHash + LSH) ----
+# Cross-posts and reworded reposts show up once per subreddit and inflate
+# neighborhood counts. Each post's combined text becomes a set of word
+# shingles, summarized by a MinHash signature whose agreement rate with
+# another signature estimates their Jaccard similarity. Signatures are cut
+# into bands; posts that share any band bucket are candidates, candidates
+# above SIMILARITY are linked, and the connected groups are clusters. That's
+# roughly linear in the number of posts instead of comparing every pair.
+#
+# Signatures are saved in near_dupe_signatures.npz keyed by url and a hash of
+# the post's text, so a rerun only hashes posts that are new or were edited.
+# Posts no longer in the input are dropped from the store and from the
+# clustering. Output is post_clusters.csv (url, cluster_id, cluster_size);
+# the aggregation counts each cluster once per neighborhood.
+#
+#   python near_dupes.py
+#   python near_dupes.py --show 10      # print the largest clusters
+
+INPUT_PATH = "chicago_safety_located.csv"
+SIGNATURES_PATH = "near_dupe_signatures.npz"
+OUTPUT_PATH = "post_clusters.csv"
+
+SHINGLE_WORDS = 3
+NUM_PERM = 128
+BANDS, ROWS = 16, 8            # BANDS * ROWS == NUM_PERM; ~0.7 Jaccard threshold
+SIMILARITY = 0.7
+SEED = 20240601
+# buckets bigger than this are checked against their first member only
+MAX_BUCKET = 200
+
+PRIME = np.uint64((1 << 31) - 1)
+EMPTY = np.uint32(PRIME)        # signature value of a post with no shingles
+
+_rng = np.random.default_rng(SEED)
+PERM_A = _rng.integers(1, int(PRIME), size=NUM_PERM, dtype=np.uint64)
+PERM_B = _rng.integers(0, int(PRIME), size=NUM_PERM, dtype=np.uint64)
+
+TOKEN_RE = re.compile(r"[a-z0-9']+")
+
+
+# ---- SIGNATURES ----
+def shingle_hashes(text):
+    words = TOKEN_RE.findall(str(text).lower())
+    if len(words) < SHINGLE_WORDS:
+        grams = [" ".join(words)] if words else []
+    else:
+        grams = {" ".join(words[i:i + SHINGLE_WORDS]) for i in range(len(words) - SHINGLE_WORDS + 1)}
+    return np.fromiter((zlib.crc32(g.encode("utf-8")) for g in grams), dtype=np.uint64)
+
+
+def minhash(text):
+    hashes = shingle_hashes(text) % PRIME
+    if not len(hashes):
+        return np.full(NUM_PERM, EMPTY, dtype=np.uint32)
+    # (a * x + b) mod p for every shingle x and permutation (a, b); a, x < 2^31
+    # so the product fits in uint64
+    values = (hashes[:, None] * PERM_A[None, :] + PERM_B[None, :]) % PRIME
+    return values.min(axis=0).astype(np.uint32)
+
+
+def load_signatures(path=SIGNATURES_PATH):
+    # -> (urls, text hashes, signatures)
+    empty = [], np.zeros(0, dtype=np.uint64), np.zeros((0, NUM_PERM), dtype=np.uint32)
+    if not os.path.exists(path):
+        return empty
+    data = np.load(path, allow_pickle=False)
+    # signatures made with different parameters aren't comparable, and ones
+    # saved without text hashes can't tell an edited post from an old one
+    if (int(data["seed"]) != SEED or data["signatures"].shape[1] != NUM_PERM
+            or "text_hashes" not in data):
+        return empty
+    return data["urls"].tolist(), data["text_hashes"], data["signatures"]
+
+
+def save_signatures(urls, text_hashes, signatures, path=SIGNATURES_PATH):
+    tmp = path + ".tmp.npz"
+    np.savez_compressed(tmp, urls=np.array(urls, dtype=str), text_hashes=text_hashes,
+                        signatures=signatures, seed=SEED)
+    os.replace(tmp, path)
+
+
+def read_posts(path):
+    # one row per url with its combined text and a hash of it
+    df = pd.read_csv(path, usecols=["title", "text", "url"]).drop_duplicates("url", keep="last")
+    df["combined"] = df["title"].fillna("") + " " + df["text"].fillna("")
+    df["text_hash"] = pd.util.hash_pandas_object(df[["title", "text"]], index=False).to_numpy()
+    return df
+
+
+def update_signatures(df, urls, text_hashes, signatures):
+    # -> the signatures of exactly the posts in df: stored ones whose text is
+    # unchanged, in stored order so cluster ids stay put, then new or edited
+    # posts hashed now; posts missing from df are dropped
+    current = dict(zip(df["url"], df["text_hash"]))
+    keep = np.array([current.get(url) == h for url, h in zip(urls, text_hashes.tolist())], dtype=bool)
+    kept = set(np.asarray(urls, dtype=object)[keep]) if len(urls) else set()
+    new = df[~df["url"].isin(kept)]
+    urls = [url for url, k in zip(urls, keep) if k] + new["url"].tolist()
+    text_hashes = np.concatenate([text_hashes[keep], new["text_hash"].to_numpy(dtype=np.uint64)])
+    fresh = [minhash(text) for text in new["combined"]]
+    signatures = np.vstack([signatures[keep]] + fresh) if fresh else signatures[keep]
+    return urls, text_hashes, signatures, len(new)
+
+
+# ---- LSH CLUSTERING ----
+class UnionFind:
+    def __init__(self, n):
+        self.parent = np.arange(n)
+
+    def find(self, i):
+        root = i
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while self.parent[i] != root:
+            self.parent[i], i = root, self.parent[i]
+        return root
+
+    def union(self, i, j):
+        ri, rj = self.find(i), self.find(j)
+        if ri != rj:
+            # the smaller index becomes the root, so cluster ids are stable
+            # as posts are appended
+            self.parent[max(ri, rj)] = min(ri, rj)
+
+
+def similar(signatures, anchor, others):
+    return (signatures[others] == signatures[anchor]).mean(axis=1) >= SIMILARITY
+
+
+def cluster(signatures):
+    n = len(signatures)
+    uf = UnionFind(n)
+    hashable = np.flatnonzero(signatures[:, 0] != EMPTY)
+    for b in range(BANDS):
+        band = np.ascontiguousarray(signatures[hashable, b * ROWS:(b + 1) * ROWS])
+        _, bucket, sizes = np.unique(band.view(np.dtype((np.void, band.dtype.itemsize * ROWS))).ravel(),
+                                     return_inverse=True, return_counts=True)
+        shared = sizes[bucket] > 1
+        if not shared.any():
+            continue
+        members = hashable[shared]
+        order = np.argsort(bucket[shared], kind="stable")
+        members, keys = members[order], bucket[shared][order]
+        starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+        for group in np.split(members, starts[1:]):
+            anchors = group[:1] if len(group) > MAX_BUCKET else group[:-1]
+            for k, anchor in enumerate(anchors):
+                others = group[k + 1:]
+                for other in others[similar(signatures, anchor, others)]:
+                    uf.union(anchor, other)
+    return np.array([uf.find(i) for i in range(n)])
+
+
+def write_clusters(urls, roots, path=OUTPUT_PATH):
+    out = pd.DataFrame({"url": urls, "cluster_id": roots})
+    out["cluster_size"] = out.groupby("cluster_id")["url"].transform("size")
+    out.to_csv(path, index=False)
+    return out
+
+
+def load_clusters(path=OUTPUT_PATH, min_size=2):
+    # url -> cluster_id for posts in clusters of at least min_size, or None
+    # when dedup hasn't been run; a post left out is its own cluster, so the
+    # default keeps only real near-duplicates in memory
+    if not os.path.exists(path):
+        return None
+    clusters = pd.read_csv(path, usecols=["url", "cluster_id", "cluster_size"])
+    clusters = clusters[clusters["cluster_size"] >= min_size]
+    return dict(zip(clusters["url"], clusters["cluster_id"]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cluster near-duplicate posts with MinHash LSH")
+    parser.add_argument("--input", default=INPUT_PATH)
+    parser.add_argument("--signatures", default=SIGNATURES_PATH)
+    parser.add_argument("--output", default=OUTPUT_PATH)
+    parser.add_argument("--show", type=int, default=5, help="print this many of the largest clusters")
+    args = parser.parse_args()
+
+    df = read_posts(args.input)
+
+    urls, text_hashes, signatures = load_signatures(args.signatures)
+    with stage("dedupe.minhash") as s:
+        urls, text_hashes, signatures, added = update_signatures(df, urls, text_hashes, signatures)
+        s.add(added)
+    save_signatures(urls, text_hashes, signatures, args.signatures)
+    print(f"Signatures: {len(urls)} stored, {added} new or edited")
+
+    with stage("dedupe.lsh", items=len(urls)):
+        roots = cluster(signatures)
+    clusters = write_clusters(urls, roots, args.output)
+
+    dupes = clusters[clusters["cluster_size"] > 1]
+    print(f"{dupes['cluster_id'].nunique()} near-duplicate clusters covering {len(dupes)} posts")
+    titles = dict(zip(df["url"], df["title"]))
+    largest = sorted(dupes.groupby("cluster_id"), key=lambda g: -len(g[1]))[:args.show]
+    for cid, group in largest:
+        print(f"  cluster {cid} ({len(group)} posts)")
+        for url in group["url"].head(3):
+            print(f"    - {str(titles.get(url, url))[:90]}")
+    print(f"Saved {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,333 @@
+import argparse
+import heapq
+import html
+import json
+import math
+import os
+import threading
+import time
+from functools import lru_cache, partial
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlparse
+
+import pandas as pd
+
+from aggregation import add_risk_intervals
+from neighborhoods import neighborhood_coords
+from search_index import INDEX_PATH, SearchIndex
+
+# Small local query service over the neighborhood summaries.
+#   GET /nearest?lat=41.88&lon=-87.63&k=5
+#   GET /neighborhood/Englewood
+#   GET /search?q=followed+home&neighborhood=Uptown&sentiment=Negative/Fear&flag=followed&k=10
+#       (add &format=html for a readable page; the map popups link here)
+#
+#   python neighborhood_service.py --port 8000
+
+SENTIMENT_SUMMARY = "neighborhood_sentiment_summary.csv"
+SAFETY_SUMMARY = "neighborhood_safety_summary.csv"
+
+# centroids are projected onto a flat plane so the KD-tree can use plain
+# euclidean distance; at city scale the error is negligible
+REF_LAT = 41.85
+LON_SCALE = math.cos(math.radians(REF_LAT))
+EARTH_RADIUS_KM = 6371.0
+
+MAX_K = 50
+MAX_SEARCH_K = 100
+CACHE_SIZE = 4096
+RELOAD_CHECK_SECONDS = 1.0
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = (math.sin((lat2 - lat1) / 2) ** 2
+         + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+# ---- KD-TREE OVER CENTROIDS ----
+class KDTree:
+    def __init__(self, points):
+        # points: list of (x, y, name)
+        self.size = len(points)
+        self.root = self._build(list(points), 0)
+
+    def _build(self, points, depth):
+        if not points:
+            return None
+        axis = depth % 2
+        points.sort(key=lambda p: p[axis])
+        mid = len(points) // 2
+        return (points[mid], axis,
+                self._build(points[:mid], depth + 1),
+                self._build(points[mid + 1:], depth + 1))
+
+    def query(self, x, y, k):
+        # max-heap of the k best candidates, stored as (-dist2, name)
+        best = []
+
+        def visit(node):
+            if node is None:
+                return
+            point, axis, left, right = node
+            d2 = (point[0] - x) ** 2 + (point[1] - y) ** 2
+            if len(best) < k:
+                heapq.heappush(best, (-d2, point[2]))
+            elif d2 < -best[0][0]:
+                heapq.heapreplace(best, (-d2, point[2]))
+
+            diff = (x if axis == 0 else y) - point[axis]
+            near, far = (left, right) if diff < 0 else (right, left)
+            visit(near)
+            # only cross the split plane if it is closer than the current k-th best
+            if len(best) < k or diff * diff < -best[0][0]:
+                visit(far)
+
+        visit(self.root)
+        return [name for _, name in sorted(best, key=lambda b: -b[0])]
+
+
+def project(lat, lon):
+    return lon * LON_SCALE, lat
+
+
+# ---- IN-MEMORY STORE ----
+class Summaries:
+    # one loaded version of the summary files with its tree and caches; a
+    # reload builds a new one and replaces it whole, so a request sees either
+    # the old records and tree or the new ones, never a mix
+    def __init__(self, records):
+        for n, rec in records.items():
+            if n in neighborhood_coords:
+                rec["lat"], rec["lon"] = neighborhood_coords[n]
+        points = [project(rec["lat"], rec["lon"]) + (n,)
+                  for n, rec in records.items() if "lat" in rec]
+        self.records = records
+        self.by_lower = {n.lower(): n for n in records}
+        self.tree = KDTree(points)
+        self.nearest = lru_cache(maxsize=CACHE_SIZE)(self._nearest)
+        self.lookup = lru_cache(maxsize=CACHE_SIZE)(self._lookup)
+
+    def _nearest(self, lat, lon, k):
+        x, y = project(lat, lon)
+        results = []
+        for n in self.tree.query(x, y, k):
+            rec = dict(self.records[n])
+            rec["distance_km"] = round(haversine_km(lat, lon, rec["lat"], rec["lon"]), 3)
+            results.append(rec)
+        return json.dumps({"lat": lat, "lon": lon, "k": k, "results": results})
+
+    def _lookup(self, name):
+        n = self.by_lower.get(name.strip().lower())
+        if n is None:
+            return None
+        return json.dumps(self.records[n])
+
+
+class NeighborhoodStore:
+    def __init__(self, sentiment_path=SENTIMENT_SUMMARY, safety_path=SAFETY_SUMMARY,
+                 index_path=INDEX_PATH):
+        self.paths = [sentiment_path, safety_path]
+        self.index_path = index_path
+        self.lock = threading.Lock()
+        self.last_check = 0.0
+        self.mtimes = None
+        self.index_mtime = None
+        self.summaries = Summaries({})
+        self.search = self._bind_search(None)
+        self.load()
+        self.load_index()
+
+    def _file_mtimes(self):
+        return tuple(os.path.getmtime(p) if os.path.exists(p) else None
+                     for p in self.paths)
+
+    def _index_mtime(self):
+        return os.path.getmtime(self.index_path) if os.path.exists(self.index_path) else None
+
+    def load(self):
+        # a file caught mid-write (or otherwise unreadable) keeps the current
+        # data; its mtime is remembered so it's only retried once it changes
+        self.mtimes = self._file_mtimes()
+        try:
+            summaries = Summaries(self._read_records())
+        except Exception as e:
+            print(f"Could not load the summaries, keeping the previous ones: {e!r}")
+            return
+        self.summaries = summaries
+        print(f"Loaded {len(summaries.records)} neighborhoods ({summaries.tree.size} with coordinates)")
+
+    def _read_records(self):
+        sentiment_path, safety_path = self.paths
+        records = {}
+        if os.path.exists(sentiment_path):
+            summary = pd.read_csv(sentiment_path)
+            if "smoothed_ratio" not in summary:
+                # summaries written before smoothing; rated like the dashboard does
+                summary = add_risk_intervals(summary)
+            for row in summary.to_dict("records"):
+                records[row["neighborhood"]] = row
+        if os.path.exists(safety_path):
+            for row in pd.read_csv(safety_path).to_dict("records"):
+                rec = records.setdefault(row["neighborhood"], {"neighborhood": row["neighborhood"]})
+                rec["safety_concern_score"] = row["total_safety_score"]
+                rec["safety_num_posts"] = row["num_posts"]
+        return records
+
+    def _bind_search(self, index):
+        return lru_cache(maxsize=CACHE_SIZE)(partial(self._search, index))
+
+    def load_index(self):
+        # the search index is reloaded on its own, it's much bigger than the
+        # summaries; the cache is bound to the index it was built for, so a
+        # request racing the swap can't mix the two
+        self.index_mtime = mtime = self._index_mtime()
+        try:
+            index = SearchIndex.load(self.index_path) if mtime else None
+        except Exception as e:
+            print(f"Could not load the search index, keeping the previous one: {e!r}")
+            return
+        self.search = self._bind_search(index)
+        if index is not None:
+            print(f"Loaded search index ({len(index)} posts)")
+
+    def maybe_reload(self):
+        now = time.monotonic()
+        if now - self.last_check < RELOAD_CHECK_SECONDS:
+            return
+        # one request thread does the check and any reload; the others don't
+        # wait for it and keep answering from the current data until the swap
+        if not self.lock.acquire(blocking=False):
+            return
+        try:
+            if now - self.last_check < RELOAD_CHECK_SECONDS:
+                return
+            if self._file_mtimes() != self.mtimes:
+                print("Summary files changed, reloading...")
+                self.load()
+            if self._index_mtime() != self.index_mtime:
+                print("Search index changed, reloading...")
+                self.load_index()
+        finally:
+            self.last_check = now
+            self.lock.release()
+
+    @staticmethod
+    def _search(index, query, k, neighborhood, sentiment, flag):
+        if index is None:
+            return None
+        results = index.search(query, k, neighborhood, sentiment, flag)
+        return {"query": query, "neighborhood": neighborhood, "sentiment": sentiment,
+                "flag": flag, "k": k, "results": results}
+
+
+# ---- HTTP ----
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    store = None
+
+    def send_json(self, status, body):
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def send_error_json(self, status, message):
+        self.send_json(status, json.dumps({"error": message}))
+
+    def send_html(self, status, body):
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        store = self.store
+        store.maybe_reload()
+        url = urlparse(self.path)
+
+        if url.path == "/nearest":
+            params = parse_qs(url.query)
+            try:
+                lat = float(params["lat"][0])
+                lon = float(params["lon"][0])
+                k = int(params.get("k", ["5"])[0])
+            except (KeyError, ValueError):
+                return self.send_error_json(400, "expected numeric lat, lon and optional k")
+            # float() also accepts nan / inf
+            if not (math.isfinite(lat) and math.isfinite(lon)
+                    and -90 <= lat <= 90 and -180 <= lon <= 180):
+                return self.send_error_json(400, "lat must be in [-90, 90] and lon in [-180, 180]")
+            k = max(1, min(k, MAX_K))
+            # round to ~10m so nearby repeat queries share cache entries
+            return self.send_json(200, store.summaries.nearest(round(lat, 4), round(lon, 4), k))
+
+        if url.path == "/search":
+            params = parse_qs(url.query)
+            get = lambda name: params.get(name, [""])[0].strip() or None
+            try:
+                k = int(params.get("k", ["10"])[0])
+            except ValueError:
+                return self.send_error_json(400, "k must be an integer")
+            k = max(1, min(k, MAX_SEARCH_K))
+            found = store.search(get("q") or "", k, get("neighborhood"), get("sentiment"), get("flag"))
+            if found is None:
+                return self.send_error_json(503, "no search index; run search_index.py build")
+            if get("format") == "html":
+                return self.send_html(200, render_results(found))
+            return self.send_json(200, json.dumps(found))
+
+        if url.path.startswith("/neighborhood/"):
+            body = store.summaries.lookup(unquote(url.path[len("/neighborhood/"):]))
+            if body is None:
+                return self.send_error_json(404, "unknown neighborhood")
+            return self.send_json(200, body)
+
+        self.send_error_json(404, "not found")
+
+    def log_message(self, format, *args):
+        pass
+
+
+def render_results(found):
+    parts = [f'"{found["query"]}"'] if found["query"] else []
+    parts += [f"{name}: {found[name]}" for name in ("neighborhood", "sentiment", "flag") if found[name]]
+    heading = " &middot; ".join(html.escape(p) for p in parts)
+    items = []
+    for r in found["results"]:
+        day = time.strftime("%Y-%m-%d", time.gmtime(r["date"]))
+        items.append(
+            f"<li><a href='{html.escape(r['url'])}' target='_blank'>{html.escape(r['title'])}</a>"
+            f"<div class='meta'>{html.escape(r['sentiment'])} &middot; r/{html.escape(r['subreddit'])}"
+            f" &middot; {day} &middot; {html.escape(', '.join(r['neighborhoods']))}</div>"
+            f"<div>{html.escape(r['preview'])}</div></li>")
+    return ("<!DOCTYPE html><html><head><meta charset='UTF-8'><title>HerSafe posts</title>"
+            "<style>body{background:#0f0f1a;color:#eee;font-family:Arial;padding:20px;max-width:900px}"
+            "a{color:#8ab4f8}li{margin-bottom:14px}.meta{color:#999;font-size:0.85em}</style></head>"
+            f"<body><h2>Posts &middot; {heading}</h2><ol>{''.join(items) or 'No matching posts'}</ol></body></html>")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HerSafe neighborhood lookup service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+
+    Handler.store = NeighborhoodStore()
+    server = ThreadingHTTPServer((args.host, args.port), Handler)
+    print(f"Serving on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
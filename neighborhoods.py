@@ -0,0 +1,159 @@
+# ---- CHICAGO NEIGHBORHOODS ----
+chicago_neighborhoods = [
+    "Loop", "River North", "Gold Coast", "Lincoln Park", "Lakeview",
+    "Wicker Park", "Bucktown", "Logan Square", "Pilsen", "Bridgeport",
+    "Hyde Park", "Woodlawn", "Englewood", "West Englewood", "Auburn Gresham",
+    "Chatham", "South Shore", "Bronzeville", "Douglas", "Grand Boulevard",
+    "Washington Park", "Grand Crossing", "Roseland", "Pullman", "Hegewisch",
+    "Rogers Park", "Edgewater", "Uptown", "Ravenswood", "North Center",
+    "Irving Park", "Avondale", "Humboldt Park", "Garfield Park", "West Garfield Park",
+    "East Garfield Park", "Austin", "West Town", "Ukrainian Village", "Noble Square",
+    "Little Village", "Back of the Yards", "McKinley Park", "Brighton Park",
+    "Clearing", "Archer Heights", "Gage Park", "Chicago Lawn", "West Lawn",
+    "Marquette Park", "Ashburn", "Beverly", "Morgan Park", "Mount Greenwood",
+    "Norwood Park", "Jefferson Park", "Forest Glen", "North Park", "Albany Park",
+    "Portage Park", "Dunning", "Belmont Cragin", "Hermosa", "Montclare",
+    "Galewood", "Cragin", "Riverdale", "Calumet Heights", "South Chicago",
+    "East Side", "South Deering", "Millennium Park", "Navy Pier", "Magnificent Mile",
+    "South Loop", "Near North Side", "Near West Side", "Streeterville",
+    "Andersonville", "Boystown", "Printer's Row", "Greektown", "Chinatown",
+    "Little Italy", "University Village", "Fulton Market", "West Loop",
+    "Fulton Park", "Washington Heights", "Fernwood"
+]
+
+# names that only count if Chicago is mentioned nearby
+ambiguous = ["Austin", "Clearing", "Beverly", "Douglas", "Pullman",
+             "Riverdale", "Fernwood", "Ashburn"]
+
+# ---- SAFETY KEYWORDS ----
+safety_keywords = [
+    "unsafe", "harassment", "harassed", "followed", "scared", "scary",
+    "avoid", "dangerous", "danger", "attack", "attacked", "mugged",
+    "robbery", "threat", "threatened", "afraid", "fear", "dark",
+    "alone", "sketchy", "catcall", "catcalled", "creepy", "stalked",
+    "knife", "gun", "shooting", "assault", "uncomfortable", "uneasy",
+    "intimidating", "grabbed", "chased", "aggressive", "threatening",
+    "suspicious", "worried", "terrified", "horrified", "traumatized"
+]
+
+# ---- CHICAGO NEIGHBORHOOD COORDINATES ----
+# approximate centroids, shared by the map, dashboard and lookup service
+neighborhood_coords = {
+    "Loop": (41.8827, -87.6278),
+    "River North": (41.8936, -87.6338),
+    "Gold Coast": (41.9031, -87.6285),
+    "Lincoln Park": (41.9214, -87.6513),
+    "Lakeview": (41.9430, -87.6431),
+    "Wicker Park": (41.9082, -87.6796),
+    "Bucktown": (41.9178, -87.6827),
+    "Logan Square": (41.9214, -87.7068),
+    "Pilsen": (41.8557, -87.6600),
+    "Bridgeport": (41.8345, -87.6440),
+    "Hyde Park": (41.7943, -87.5907),
+    "Woodlawn": (41.7734, -87.5960),
+    "Englewood": (41.7795, -87.6438),
+    "West Englewood": (41.7762, -87.6640),
+    "Auburn Gresham": (41.7442, -87.6513),
+    "Chatham": (41.7484, -87.6125),
+    "South Shore": (41.7606, -87.5671),
+    "Bronzeville": (41.8281, -87.6153),
+    "Washington Park": (41.7895, -87.6200),
+    "Grand Crossing": (41.7617, -87.6062),
+    "Roseland": (41.7006, -87.6200),
+    "Rogers Park": (42.0083, -87.6647),
+    "Edgewater": (41.9794, -87.6592),
+    "Uptown": (41.9651, -87.6572),
+    "Ravenswood": (41.9731, -87.6741),
+    "Irving Park": (41.9538, -87.7133),
+    "Avondale": (41.9399, -87.7133),
+    "Humboldt Park": (41.8999, -87.7227),
+    "Garfield Park": (41.8799, -87.7227),
+    "West Garfield Park": (41.8799, -87.7400),
+    "East Garfield Park": (41.8799, -87.7133),
+    "Austin": (41.8999, -87.7700),
+    "West Town": (41.8963, -87.6672),
+    "Ukrainian Village": (41.8932, -87.6763),
+    "Little Village": (41.8287, -87.7178),
+    "Back of the Yards": (41.8057, -87.6572),
+    "McKinley Park": (41.8296, -87.6726),
+    "Albany Park": (41.9681, -87.7227),
+    "Portage Park": (41.9586, -87.7650),
+    "Belmont Cragin": (41.9399, -87.7650),
+    "Hermosa": (41.9196, -87.7227),
+    "Norwood Park": (41.9860, -87.8065),
+    "Clearing": (41.7851, -87.7650),
+    "South Loop": (41.8673, -87.6278),
+    "Near North Side": (41.9000, -87.6338),
+    "Near West Side": (41.8746, -87.6672),
+    "Streeterville": (41.8920, -87.6200),
+    "Andersonville": (41.9794, -87.6672),
+    "Chinatown": (41.8504, -87.6326),
+    "West Loop": (41.8827, -87.6479),
+    "Fulton Market": (41.8868, -87.6513),
+    "Fulton Park": (41.8799, -87.7650),
+    "South Chicago": (41.7317, -87.5671),
+    "North Park": (41.9794, -87.7133),
+    "Grand Boulevard": (41.8107, -87.6153),
+    "Washington Heights": (41.7200, -87.6400),
+    "Cragin": (41.9196, -87.7650),
+    "Printer's Row": (41.8757, -87.6278),
+    "North Center": (41.9538, -87.6726),
+    "Navy Pier": (41.8919, -87.6051),
+    "Magnificent Mile": (41.8956, -87.6243),
+    "Millennium Park": (41.8826, -87.6226),
+    "Boystown": (41.9440, -87.6490),
+    "Greektown": (41.8785, -87.6490),
+    "Little Italy": (41.8746, -87.6600),
+}
+
+# ---- COMMUNITY AREAS ----
+# the city's 77 community areas, numbered as in the 311 data's community_area
+community_areas = {
+    1: "Rogers Park", 2: "West Ridge", 3: "Uptown", 4: "Lincoln Square",
+    5: "North Center", 6: "Lake View", 7: "Lincoln Park", 8: "Near North Side",
+    9: "Edison Park", 10: "Norwood Park", 11: "Jefferson Park", 12: "Forest Glen",
+    13: "North Park", 14: "Albany Park", 15: "Portage Park", 16: "Irving Park",
+    17: "Dunning", 18: "Montclare", 19: "Belmont Cragin", 20: "Hermosa",
+    21: "Avondale", 22: "Logan Square", 23: "Humboldt Park", 24: "West Town",
+    25: "Austin", 26: "West Garfield Park", 27: "East Garfield Park", 28: "Near West Side",
+    29: "North Lawndale", 30: "South Lawndale", 31: "Lower West Side", 32: "Loop",
+    33: "Near South Side", 34: "Armour Square", 35: "Douglas", 36: "Oakland",
+    37: "Fuller Park", 38: "Grand Boulevard", 39: "Kenwood", 40: "Washington Park",
+    41: "Hyde Park", 42: "Woodlawn", 43: "South Shore", 44: "Chatham",
+    45: "Avalon Park", 46: "South Chicago", 47: "Burnside", 48: "Calumet Heights",
+    49: "Roseland", 50: "Pullman", 51: "South Deering", 52: "East Side",
+    53: "West Pullman", 54: "Riverdale", 55: "Hegewisch", 56: "Garfield Ridge",
+    57: "Archer Heights", 58: "Brighton Park", 59: "McKinley Park", 60: "Bridgeport",
+    61: "New City", 62: "West Elsdon", 63: "Gage Park", 64: "Clearing",
+    65: "West Lawn", 66: "Chicago Lawn", 67: "West Englewood", 68: "Englewood",
+    69: "Greater Grand Crossing", 70: "Ashburn", 71: "Auburn Gresham", 72: "Beverly",
+    73: "Washington Heights", 74: "Mount Greenwood", 75: "Morgan Park", 76: "O'Hare",
+    77: "Edgewater",
+}
+
+# community area each tagged neighborhood lies in (the main one, for names
+# that straddle a boundary)
+neighborhood_community_area = {
+    "Loop": 32, "River North": 8, "Gold Coast": 8, "Lincoln Park": 7, "Lakeview": 6,
+    "Wicker Park": 24, "Bucktown": 22, "Logan Square": 22, "Pilsen": 31, "Bridgeport": 60,
+    "Hyde Park": 41, "Woodlawn": 42, "Englewood": 68, "West Englewood": 67,
+    "Auburn Gresham": 71, "Chatham": 44, "South Shore": 43, "Bronzeville": 38,
+    "Douglas": 35, "Grand Boulevard": 38, "Washington Park": 40, "Grand Crossing": 69,
+    "Roseland": 49, "Pullman": 50, "Hegewisch": 55, "Rogers Park": 1, "Edgewater": 77,
+    "Uptown": 3, "Ravenswood": 4, "North Center": 5, "Irving Park": 16, "Avondale": 21,
+    "Humboldt Park": 23, "Garfield Park": 27, "West Garfield Park": 26,
+    "East Garfield Park": 27, "Austin": 25, "West Town": 24, "Ukrainian Village": 24,
+    "Noble Square": 24, "Little Village": 30, "Back of the Yards": 61, "McKinley Park": 59,
+    "Brighton Park": 58, "Clearing": 64, "Archer Heights": 57, "Gage Park": 63,
+    "Chicago Lawn": 66, "West Lawn": 65, "Marquette Park": 66, "Ashburn": 70,
+    "Beverly": 72, "Morgan Park": 75, "Mount Greenwood": 74, "Norwood Park": 10,
+    "Jefferson Park": 11, "Forest Glen": 12, "North Park": 13, "Albany Park": 14,
+    "Portage Park": 15, "Dunning": 17, "Belmont Cragin": 19, "Hermosa": 20,
+    "Montclare": 18, "Galewood": 25, "Cragin": 19, "Riverdale": 54, "Calumet Heights": 48,
+    "South Chicago": 46, "East Side": 52, "South Deering": 51, "Millennium Park": 32,
+    "Navy Pier": 8, "Magnificent Mile": 8, "South Loop": 33, "Near North Side": 8,
+    "Near West Side": 28, "Streeterville": 8, "Andersonville": 77, "Boystown": 6,
+    "Printer's Row": 32, "Greektown": 28, "Chinatown": 34, "Little Italy": 28,
+    "University Village": 28, "Fulton Market": 28, "West Loop": 28,
+    "Washington Heights": 73, "Fernwood": 49,
+}
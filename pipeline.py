@@ -0,0 +1,251 @@
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import instrumentation
+
+# Runs the analysis scripts as a DAG. Each stage declares the files it reads,
+# the code it depends on and the files it writes; a stage is skipped when the
+# fingerprint of its inputs + code matches the last successful run and all of
+# its outputs still exist. Stages whose dependencies are done run in parallel.
+# A stage can also require external files (e.g. the 311 extract); while one
+# is missing the stage is reported as skipped instead of being run.
+#
+#   python pipeline.py                  # run whatever is stale
+#   python pipeline.py --dry-run        # show what would run
+#   python pipeline.py --only dashboard --force
+#   python pipeline.py --profile sentiment.inference
+#   python pipeline.py --memory         # also record per-stage peak memory
+#
+# Each run writes a JSON timing (and, with --memory, memory) report to run_reports/<run_id>.json
+# (see instrumentation.py).
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+STATE_PATH = os.path.join(ROOT, ".pipeline_state.json")
+
+
+class Stage:
+    def __init__(self, name, cmd, inputs, outputs, code=(), requires=()):
+        self.name = name
+        self.cmd = cmd
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        # inputs no stage produces and without which there's nothing to do
+        self.requires = list(requires)
+        # the script itself is always part of the stage's code
+        self.code = [cmd[0]] + [c for c in code if c != cmd[0]]
+
+
+STAGES = [
+    Stage("extract", ["analysis.py"],
+          inputs=["chicago_safety_reddit.csv"],
+          outputs=["chicago_safety_located.csv", "post_matrices.npz",
+                   "neighborhood_top_concerns.csv", "neighborhood_snippets.csv"],
+          code=["tagging.py", "neighborhoods.py", "cooccurrence.py", "snippets.py"]),
+    Stage("dedupe", ["near_dupes.py"],
+          inputs=["chicago_safety_located.csv"],
+          outputs=["post_clusters.csv"]),
+    Stage("sentiment", ["sentiment-analysis.py"],
+          inputs=["chicago_safety_located.csv", "post_clusters.csv"],
+          outputs=["chicago_safety_sentiment.csv", "neighborhood_sentiment_summary.csv"],
+          code=["sentiment.py", "aggregation.py", "near_dupes.py"]),
+    Stage("map", ["safety-map.py"],
+          inputs=["neighborhood_sentiment_summary.csv", "neighborhood_top_concerns.csv",
+                  "neighborhood_snippets.csv", "chicago_safety_sentiment.csv"],
+          outputs=["hersafe_chicago_map.html"],
+          code=["map_builder.py", "neighborhoods.py", "cooccurrence.py", "aggregation.py",
+                "snippets.py"]),
+    Stage("search", ["search_index.py", "build"],
+          inputs=["chicago_safety_sentiment.csv"],
+          outputs=["search_index.pkl"]),
+    Stage("rolling", ["rolling_risk.py"],
+          inputs=["chicago_safety_sentiment.csv"],
+          outputs=["neighborhood_rolling_risk.csv"]),
+    Stage("correlate", ["correlation_311.py"],
+          inputs=["chicago_311_requests.csv", "chicago_safety_sentiment.csv"],
+          outputs=["correlation_311.csv"],
+          code=["neighborhoods.py", "post_table.py", "temporal_cube.py"],
+          requires=["chicago_311_requests.csv"]),
+    Stage("dashboard", ["dashboard.py"],
+          inputs=["neighborhood_sentiment_summary.csv", "neighborhood_rolling_risk.csv",
+                  "neighborhood_top_concerns.csv", "correlation_311.csv"],
+          outputs=["hersafe_dashboard.html"],
+          code=["aggregation.py", "neighborhoods.py"]),
+    Stage("charts", ["visualizations.py"],
+          inputs=["chicago_safety_sentiment.csv", "neighborhood_sentiment_summary.csv"],
+          outputs=["wordclouds.png", "time_analysis.png", "chart_bubble.html",
+                   "chart_sentiment_breakdown.html", "chart_heatmap.html",
+                   "chart_fearrate.html", "temporal_cube.csv"],
+          code=["temporal_cube.py", "post_table.py", "aggregation.py"]),
+]
+
+
+# ---- FINGERPRINTS ----
+def file_digest(path):
+    h = hashlib.sha256()
+    with open(os.path.join(ROOT, path), "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def fingerprint(stage):
+    h = hashlib.sha256()
+    h.update(json.dumps(stage.cmd).encode("utf-8"))
+    for kind, paths in (("in", stage.inputs), ("code", stage.code)):
+        for path in sorted(paths):
+            digest = file_digest(path) if os.path.exists(os.path.join(ROOT, path)) else "missing"
+            h.update(f"{kind}:{path}:{digest}\n".encode("utf-8"))
+    return h.hexdigest()
+
+
+def load_state():
+    if not os.path.exists(STATE_PATH):
+        return {}
+    with open(STATE_PATH) as f:
+        return json.load(f)
+
+
+def save_state(state):
+    tmp = STATE_PATH + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+    os.replace(tmp, STATE_PATH)
+
+
+def missing_requirements(stage):
+    return [p for p in stage.requires if not os.path.exists(os.path.join(ROOT, p))]
+
+
+def is_fresh(stage, fp, state):
+    if state.get(stage.name) != fp:
+        return False
+    return all(os.path.exists(os.path.join(ROOT, p)) for p in stage.outputs)
+
+
+# ---- DAG ----
+def dependencies(stages):
+    producer = {out: s.name for s in stages for out in s.outputs}
+    return {s.name: {producer[i] for i in s.inputs if i in producer and producer[i] != s.name}
+            for s in stages}
+
+
+def select(stages, only):
+    if not only:
+        return stages
+    names = {n.strip() for n in only.split(",") if n.strip()}
+    unknown = names - {s.name for s in stages}
+    if unknown:
+        sys.exit(f"unknown stage(s): {', '.join(sorted(unknown))}")
+    return [s for s in stages if s.name in names]
+
+
+def run_stage(stage, env):
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable] + stage.cmd, cwd=ROOT, env=env,
+                            capture_output=True, text=True)
+    elapsed = time.perf_counter() - start
+    return result, elapsed
+
+
+def run(stages, jobs, force=False, dry_run=False, profile="", memory=False):
+    run_id = time.strftime("%Y%m%d-%H%M%S") + "-pipeline"
+    env = dict(os.environ, HERSAFE_RUN_ID=run_id)
+    if profile:
+        env["HERSAFE_PROFILE"] = profile
+    if memory:
+        env["HERSAFE_TRACEMALLOC"] = "1"
+    report = []
+
+    deps = dependencies(STAGES)
+    selected = {s.name for s in stages}
+    by_name = {s.name: s for s in stages}
+    state = load_state()
+
+    done, failed = set(), set()
+    pending = [s.name for s in stages]
+    running = {}
+
+    def ready(name):
+        # dependencies outside the selection are treated as already built
+        return all(d in done or d not in selected for d in deps[name])
+
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        while pending or running:
+            for name in list(pending):
+                if any(d in failed for d in deps[name]):
+                    pending.remove(name)
+                    failed.add(name)
+                    report.append({"stage": name, "status": "upstream_failed"})
+                    print(f"[{name}] skipped, upstream stage failed")
+                elif ready(name):
+                    pending.remove(name)
+                    stage = by_name[name]
+                    fp = fingerprint(stage)
+                    missing = missing_requirements(stage)
+                    if missing:
+                        # downstream stages treat its outputs as optional
+                        print(f"[{name}] skipped, {', '.join(missing)} not found")
+                        report.append({"stage": name, "status": "skipped"})
+                        done.add(name)
+                    elif not force and is_fresh(stage, fp, state):
+                        print(f"[{name}] up to date")
+                        report.append({"stage": name, "status": "up_to_date"})
+                        done.add(name)
+                    elif dry_run:
+                        print(f"[{name}] would run: {' '.join(stage.cmd)}")
+                        done.add(name)
+                    else:
+                        print(f"[{name}] running {' '.join(stage.cmd)}")
+                        running[pool.submit(run_stage, stage, env)] = (name, fp)
+
+            if not running:
+                continue
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                name, fp = running.pop(future)
+                result, elapsed = future.result()
+                report.append({"stage": name, "wall_s": round(elapsed, 3),
+                               "status": "ok" if result.returncode == 0 else "failed"})
+                if result.returncode == 0:
+                    state[name] = fp
+                    save_state(state)
+                    done.add(name)
+                    print(f"[{name}] done in {elapsed:.1f}s")
+                else:
+                    failed.add(name)
+                    print(f"[{name}] FAILED after {elapsed:.1f}s (exit {result.returncode})")
+                    print(result.stdout[-2000:] + result.stderr[-2000:])
+
+    if not dry_run:
+        path = instrumentation.merge_run(run_id, report)
+        print(f"Run report saved to {os.path.relpath(path, ROOT)}")
+    return not failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the HerSafe analysis pipeline")
+    parser.add_argument("--only", default="", help="comma-separated stages: "
+                        + ",".join(s.name for s in STAGES))
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1,
+                        help="stages allowed to run at once")
+    parser.add_argument("--force", action="store_true", help="ignore fingerprints")
+    parser.add_argument("--dry-run", action="store_true")
+    parser.add_argument("--profile", default="", metavar="STAGE",
+                        help="run this instrumented stage under cProfile, e.g. sentiment.inference")
+    parser.add_argument("--memory", action="store_true",
+                        help="record each stage's tracemalloc peak (slows the run down)")
+    args = parser.parse_args()
+
+    ok = run(select(STAGES, args.only), max(1, args.jobs), args.force, args.dry_run, args.profile,
+             args.memory)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+import argparse
+import ast
+import os
+
+import numpy as np
+import pandas as pd
+
+# ---- COMPACT POST TABLE ----
+# The sentiment CSV keeps title, text, a full combined copy of both, and the
+# neighborhood / keyword lists as Python-list strings; read into pandas every
+# one of those is a Python object per row. Most consumers only need ids,
+# neighborhoods, flags, sentiment and timestamps, so PostTable keeps just
+# those, as flat arrays:
+#
+#   date                    int64 unix seconds
+#   sentiment, subreddit    pandas Categoricals (int8 codes + a few labels)
+#   neighborhoods           int32 codes into table.neighborhood_names; post i
+#                           owns neighborhoods[neighborhood_offsets[i]:
+#                           neighborhood_offsets[i + 1]]
+#   keywords                same layout over table.keyword_names
+#
+# Post i is row i of the CSV. Title and text stay on disk and are read on
+# demand for the rows asked for (table.text / table.combined).
+#
+#   python post_table.py                 # compare with the full DataFrame
+
+SENTIMENT_PATH = "chicago_safety_sentiment.csv"
+CHUNKSIZE = 50_000
+
+LIST_COLUMNS = ["neighborhoods_mentioned", "safety_flags"]
+CATEGORY_COLUMNS = ["sentiment", "subreddit"]
+BASE_COLUMNS = ["date", "url", "safety_score", "cluster_id"] + CATEGORY_COLUMNS + LIST_COLUMNS
+
+
+class _Vocabulary:
+    def __init__(self):
+        self.names = []
+        self.index = {}
+
+    def codes(self, names):
+        for name in names:
+            if name not in self.index:
+                self.index[name] = len(self.names)
+                self.names.append(name)
+        return [self.index[name] for name in names]
+
+
+def _encode_lists(strings, vocabulary):
+    # list strings -> (lengths, flat codes); each distinct string is parsed
+    # once, and most posts share their list with many others
+    inverse, uniques = pd.factorize(strings.fillna("[]"))
+    parsed = [vocabulary.codes(ast.literal_eval(s)) for s in uniques]
+    unique_lengths = np.array([len(p) for p in parsed], dtype=np.int64)
+    unique_starts = np.zeros(len(parsed), dtype=np.int64)
+    np.cumsum(unique_lengths[:-1], out=unique_starts[1:])
+    unique_flat = np.fromiter((c for p in parsed for c in p), dtype=np.int32,
+                              count=int(unique_lengths.sum()))
+
+    # gather each row's slice of unique_flat without a per-row loop
+    lengths = unique_lengths[inverse]
+    row_starts = np.zeros(len(lengths), dtype=np.int64)
+    np.cumsum(lengths[:-1], out=row_starts[1:])
+    offsets = np.repeat(unique_starts[inverse] - row_starts, lengths) + np.arange(lengths.sum())
+    return lengths, unique_flat[offsets]
+
+
+def _offsets(lengths):
+    offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    return offsets
+
+
+class PostTable:
+    def __init__(self, path, date, url, safety_score, cluster_id, sentiment, subreddit,
+                 neighborhood_names, neighborhood_offsets, neighborhoods,
+                 keyword_names, keyword_offsets, keywords):
+        self.path = path
+        self.mtime = os.path.getmtime(path)
+        self.date = date
+        self.url = url
+        self.safety_score = safety_score
+        # -1 where the post has no near-duplicate cluster (or dedup wasn't run)
+        self.cluster_id = cluster_id
+        self.sentiment = sentiment
+        self.subreddit = subreddit
+        self.neighborhood_names = neighborhood_names
+        self.neighborhood_offsets = neighborhood_offsets
+        self.neighborhoods = neighborhoods
+        self.keyword_names = keyword_names
+        self.keyword_offsets = keyword_offsets
+        self.keywords = keywords
+
+    def __len__(self):
+        return len(self.date)
+
+    @classmethod
+    def load(cls, path=SENTIMENT_PATH, chunksize=CHUNKSIZE):
+        vocabularies = {col: _Vocabulary() for col in LIST_COLUMNS}
+        parts = {key: [] for key in ["date", "url", "safety_score", "cluster_id"] + CATEGORY_COLUMNS}
+        lists = {col: ([], []) for col in LIST_COLUMNS}
+
+        reader = pd.read_csv(path, usecols=lambda c: c in BASE_COLUMNS, chunksize=chunksize,
+                             dtype={col: "category" for col in CATEGORY_COLUMNS})
+        for chunk in reader:
+            parts["date"].append(chunk["date"].to_numpy(dtype=np.int64))
+            parts["url"].append(chunk["url"].to_numpy(dtype=object))
+            parts["safety_score"].append(chunk["safety_score"].to_numpy(dtype=np.int32))
+            cluster = chunk["cluster_id"] if "cluster_id" in chunk else pd.Series(-1, index=chunk.index)
+            parts["cluster_id"].append(cluster.fillna(-1).to_numpy(dtype=np.int64))
+            for col in CATEGORY_COLUMNS:
+                parts[col].append(chunk[col] if col in chunk else pd.Series(pd.Categorical([None] * len(chunk))))
+            for col, vocabulary in vocabularies.items():
+                lengths, codes = _encode_lists(chunk[col], vocabulary)
+                lists[col][0].append(lengths)
+                lists[col][1].append(codes)
+
+        def joined(arrays, dtype):
+            return np.concatenate(arrays) if arrays else np.zeros(0, dtype=dtype)
+
+        def categorical(series):
+            if not series:
+                return pd.Categorical([])
+            return pd.api.types.union_categoricals([s.array for s in series])
+
+        def flat(col):
+            lengths, codes = lists[col]
+            return (vocabularies[col].names, _offsets(joined(lengths, np.int64)),
+                    joined(codes, np.int32))
+
+        return cls(path,
+                   joined(parts["date"], np.int64), joined(parts["url"], object),
+                   joined(parts["safety_score"], np.int32), joined(parts["cluster_id"], np.int64),
+                   categorical(parts["sentiment"]), categorical(parts["subreddit"]),
+                   *flat("neighborhoods_mentioned"), *flat("safety_flags"))
+
+    # ---- FLAT LISTS ----
+    def neighborhood_pairs(self):
+        # (post index, neighborhood code) for every mention
+        posts = np.repeat(np.arange(len(self), dtype=np.int64), np.diff(self.neighborhood_offsets))
+        return posts, self.neighborhoods
+
+    def neighborhoods_of(self, i):
+        start, end = self.neighborhood_offsets[i], self.neighborhood_offsets[i + 1]
+        return [self.neighborhood_names[c] for c in self.neighborhoods[start:end]]
+
+    def keywords_of(self, i):
+        start, end = self.keyword_offsets[i], self.keyword_offsets[i + 1]
+        return [self.keyword_names[c] for c in self.keywords[start:end]]
+
+    def nbytes(self):
+        arrays = [self.date, self.safety_score, self.cluster_id, self.neighborhood_offsets,
+                  self.neighborhoods, self.keyword_offsets, self.keywords]
+        total = sum(a.nbytes for a in arrays)
+        total += int(pd.Series(self.url).memory_usage(deep=True, index=False))
+        total += sum(int(pd.Series(c).memory_usage(deep=True, index=False))
+                     for c in (self.sentiment, self.subreddit))
+        return total
+
+    # ---- LAZY TEXT ----
+    def text(self, rows=None, columns=("title", "text")):
+        # the given columns for the given post indices (or all posts), read
+        # back from the CSV in chunks; index is the post index
+        if os.path.getmtime(self.path) != self.mtime:
+            raise ValueError(f"{self.path} changed since the post table was loaded")
+        wanted = None if rows is None else np.zeros(len(self), dtype=bool)
+        if wanted is not None:
+            wanted[np.asarray(rows)] = True
+        out, start = [], 0
+        for chunk in pd.read_csv(self.path, usecols=list(columns), chunksize=CHUNKSIZE):
+            chunk.index = pd.RangeIndex(start, start + len(chunk))
+            start += len(chunk)
+            out.append(chunk if wanted is None else chunk[wanted[chunk.index]])
+        return pd.concat(out)[list(columns)] if out else pd.DataFrame(columns=list(columns))
+
+    def combined(self, rows=None):
+        text = self.text(rows)
+        return text["title"].fillna("") + " " + text["text"].fillna("")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load the posts as a compact PostTable")
+    parser.add_argument("--input", default=SENTIMENT_PATH)
+    args = parser.parse_args()
+
+    full = pd.read_csv(args.input)
+    table = PostTable.load(args.input)
+    full_bytes = int(full.memory_usage(deep=True).sum())
+    print(f"Posts: {len(table)}, {len(table.neighborhood_names)} neighborhoods, "
+          f"{len(table.keyword_names)} keywords")
+    print(f"  DataFrame:  {full_bytes / 1e6:.2f} MB")
+    print(f"  PostTable:  {table.nbytes() / 1e6:.2f} MB ({table.nbytes() / full_bytes:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,306 @@
+import argparse
+import ast
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from instrumentation import stage
+
+# ---- ROLLING-WINDOW NEIGHBORHOOD RISK ----
+# neighborhood_sentiment_summary.csv is all-time; this keeps recent-activity
+# aggregates that are updated incrementally as new posts arrive:
+#
+#   - a ring of daily (fearful, total) post counts per neighborhood covering
+#     the last RING_DAYS days, from which the 7/30/90-day fear ratios are read
+#   - exponentially decayed (fearful, total) counters per half-life, which
+#     are scaled down by 0.5 ** (days / half_life) when the clock advances
+#
+# The state is saved to rolling_risk_state.json. The posts already counted
+# go to a binary sidecar, rolling_risk_state.npz: one uint64 hash per url and
+# one of its sentiment, neighborhoods and cluster, 16 bytes a post. Each run
+# only ingests urls it hasn't seen, whatever their date, and deriving the
+# table is a fixed number of array sums per neighborhood. When the input
+# isn't append-only -- a counted post was relabelled, retagged, reclustered
+# or dropped, or a new near-duplicate predates its cluster's counted post --
+# the state is rebuilt from the whole CSV instead.
+#
+# Near-duplicate clusters (cluster_id, see near_dupes.py) count once per
+# neighborhood, at the cluster's earliest post, as in aggregation.py.
+#
+#   python rolling_risk.py             # ingest new posts, write the CSV
+#   python rolling_risk.py --rebuild   # start over from the whole sentiment CSV
+#
+# "Now" is the newest post's day (UTC), not the wall clock, so the windows
+# stay meaningful for a scrape that ended a while ago.
+
+SENTIMENT_PATH = "chicago_safety_sentiment.csv"
+STATE_PATH = "rolling_risk_state.json"
+# the counted posts, next to the state file: rolling_risk_state.npz
+POSTS_SUFFIX = ".npz"
+OUTPUT_PATH = "neighborhood_rolling_risk.csv"
+
+FEAR = "Negative/Fear"
+WINDOWS = [7, 30, 90]
+RING_DAYS = max(WINDOWS)
+HALF_LIVES = np.array([7.0, 30.0])
+
+# rising: the 30-day fear ratio is at least this far above the 90-day one,
+# with enough recent posts for that to mean something
+RISING_DELTA = 0.10
+RISING_MIN_POSTS = 3
+# below this decayed weight (one post ~4 half-lives old) a ratio is just noise
+DECAYED_MIN_WEIGHT = 0.05
+
+
+class RollingRisk:
+    def __init__(self):
+        self.neighborhoods = []
+        self.index = {}
+        # daily[n, day % RING_DAYS] = (fearful, total)
+        self.daily = np.zeros((0, RING_DAYS, 2), dtype=np.int64)
+        # decayed[n, h] = (fearful, total) weighted by half-life HALF_LIVES[h]
+        self.decayed = np.zeros((0, len(HALF_LIVES), 2))
+        self.as_of_day = None
+        # url hashes of the counted posts, sorted, and the matching hash of
+        # what was counted for each (see read_posts); None if unknown
+        self.url_hashes = np.zeros(0, dtype=np.uint64)
+        self.signatures = np.zeros(0, dtype=np.uint64)
+        # bumped on every save, and stored in both files, so a state file and
+        # a posts file from different runs aren't used together
+        self.generation = 0
+        # "cluster|neighborhood" -> [date, url] of the post counted for it
+        self.incidents = {}
+
+    # ---- PERSISTENCE ----
+    @staticmethod
+    def posts_path(path):
+        return os.path.splitext(path)[0] + POSTS_SUFFIX
+
+    @classmethod
+    def load(cls, path=STATE_PATH):
+        state = cls()
+        if not os.path.exists(path):
+            return state
+        with open(path) as f:
+            data = json.load(f)
+        state.neighborhoods = data["neighborhoods"]
+        state.index = {n: i for i, n in enumerate(state.neighborhoods)}
+        n = len(state.neighborhoods)
+        state.daily = np.array(data["daily"], dtype=np.int64).reshape(n, RING_DAYS, 2)
+        state.decayed = np.array(data["decayed"], dtype=float).reshape(n, len(HALF_LIVES), 2)
+        state.as_of_day = data["as_of_day"]
+        state.incidents = data.get("incidents", {})
+        state.generation = data.get("generation", 0)
+        # states saved before the posts file, or next to one from another
+        # run, don't know what they counted and have to be rebuilt
+        state.url_hashes = state.signatures = None
+        posts_path = cls.posts_path(path)
+        if "generation" in data and os.path.exists(posts_path):
+            posts = np.load(posts_path, allow_pickle=False)
+            if int(posts["generation"]) == state.generation:
+                state.url_hashes, state.signatures = posts["url_hashes"], posts["signatures"]
+        return state
+
+    def save(self, path=STATE_PATH):
+        self.generation += 1
+        posts_tmp = self.posts_path(path) + ".tmp" + POSTS_SUFFIX
+        np.savez(posts_tmp, url_hashes=self.url_hashes, signatures=self.signatures,
+                 generation=self.generation)
+        os.replace(posts_tmp, self.posts_path(path))
+        data = {
+            "as_of_day": self.as_of_day,
+            "neighborhoods": self.neighborhoods,
+            "daily": self.daily.tolist(),
+            "decayed": self.decayed.tolist(),
+            "incidents": self.incidents,
+            "generation": self.generation,
+        }
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp, path)
+
+    # ---- UPDATES ----
+    def _rows_for(self, names):
+        for name in names:
+            if name not in self.index:
+                self.index[name] = len(self.neighborhoods)
+                self.neighborhoods.append(name)
+        grow = len(self.neighborhoods) - len(self.daily)
+        if grow:
+            self.daily = np.concatenate([self.daily, np.zeros((grow, RING_DAYS, 2), dtype=np.int64)])
+            self.decayed = np.concatenate([self.decayed, np.zeros((grow, len(HALF_LIVES), 2))])
+        return np.array([self.index[n] for n in names], dtype=np.int64)
+
+    def advance(self, day):
+        # move "now" forward: clear the ring slots being reused and decay
+        if self.as_of_day is None:
+            self.as_of_day = day
+            return
+        gap = day - self.as_of_day
+        if gap <= 0:
+            return
+        for d in range(self.as_of_day + 1, self.as_of_day + 1 + min(gap, RING_DAYS)):
+            self.daily[:, d % RING_DAYS] = 0
+        self.decayed *= (0.5 ** (gap / HALF_LIVES))[None, :, None]
+        self.as_of_day = day
+
+    def counted(self, df):
+        # mask of the rows of df whose url is already counted
+        return np.isin(df["url_hash"].to_numpy(), self.url_hashes)
+
+    def is_append_only(self, df):
+        # False when ingesting df on top of this state would differ from a
+        # rebuild: a counted post changed or disappeared, or a new post of a
+        # counted cluster is earlier than the post that was counted for it
+        if self.url_hashes is None:
+            return False
+        counted = self.counted(df)
+        known = df[counted]
+        if len(known) != len(self.url_hashes):
+            return False
+        stored = self.signatures[np.searchsorted(self.url_hashes, known["url_hash"].to_numpy())]
+        if (known["signature"].to_numpy() != stored).any():
+            return False
+        new = incident_keys(df[~counted])
+        new = new[new["incident"].isin(self.incidents)]
+        return all((date, url) >= tuple(self.incidents[key])
+                   for key, date, url in zip(new["incident"], new["date"], new["url"]))
+
+    def update(self, df):
+        # df comes from read_posts: url, date (unix seconds), sentiment,
+        # neighborhoods_mentioned (as lists), url_hash, signature and maybe
+        # cluster_id; urls already counted are skipped, new ones can be of
+        # any date
+        df = df[~self.counted(df)]
+        if df.empty:
+            return 0
+
+        self.advance(int(df["date"].max()) // 86400)
+
+        # one mention per (cluster, neighborhood), at the cluster's earliest
+        # post; unclustered posts have no incident key and all count
+        posts = incident_keys(df).sort_values(["date", "url"], kind="mergesort")
+        incident = posts["incident"]
+        posts = posts[~(incident.notna() & (incident.duplicated() | incident.isin(self.incidents)))]
+        first = posts[posts["incident"].notna()]
+        for key, date, url in zip(first["incident"], first["date"], first["url"]):
+            self.incidents[key] = [float(date), url]
+        if not posts.empty:
+            rows = self._rows_for(posts["neighborhoods_mentioned"].tolist())
+            day = posts["date"].to_numpy(dtype=np.int64) // 86400
+            fear = (posts["sentiment"] == FEAR).to_numpy(dtype=np.int64)
+
+            recent = day > self.as_of_day - RING_DAYS
+            slots = day[recent] % RING_DAYS
+            np.add.at(self.daily, (rows[recent], slots, 0), fear[recent])
+            np.add.at(self.daily, (rows[recent], slots, 1), 1)
+
+            weight = 0.5 ** ((self.as_of_day - day)[:, None] / HALF_LIVES[None, :])
+            np.add.at(self.decayed[:, :, 0], rows, weight * fear[:, None])
+            np.add.at(self.decayed[:, :, 1], rows, weight)
+
+        url_hashes = np.concatenate([self.url_hashes, df["url_hash"].to_numpy(dtype=np.uint64)])
+        signatures = np.concatenate([self.signatures, df["signature"].to_numpy(dtype=np.uint64)])
+        order = np.argsort(url_hashes, kind="stable")
+        self.url_hashes, self.signatures = url_hashes[order], signatures[order]
+        return len(df)
+
+    # ---- DERIVED TABLE ----
+    def window_counts(self, days):
+        slots = (self.as_of_day - np.arange(days)) % RING_DAYS
+        return self.daily[:, slots].sum(axis=1)
+
+    def table(self):
+        out = pd.DataFrame({"neighborhood": self.neighborhoods})
+        if not self.neighborhoods:
+            return out
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            for days in WINDOWS:
+                counts = self.window_counts(days)
+                out[f"posts_{days}d"] = counts[:, 1]
+                out[f"fear_ratio_{days}d"] = np.round(counts[:, 0] / counts[:, 1], 3)
+            for h, half_life in enumerate(HALF_LIVES):
+                fear, total = self.decayed[:, h, 0], self.decayed[:, h, 1]
+                ratio = np.where(total >= DECAYED_MIN_WEIGHT, fear / total, np.nan)
+                out[f"decayed_ratio_hl{half_life:.0f}d"] = np.round(ratio, 3)
+
+        out["trend_7d"] = (out["fear_ratio_7d"] - out["fear_ratio_30d"]).round(3)
+        out["trend_30d"] = (out["fear_ratio_30d"] - out["fear_ratio_90d"]).round(3)
+        out["rising"] = (out["posts_30d"] >= RISING_MIN_POSTS) & (out["trend_30d"] >= RISING_DELTA)
+        out["as_of"] = pd.to_datetime(self.as_of_day, unit="D").strftime("%Y-%m-%d")
+        return out.sort_values(["rising", "trend_30d", "neighborhood"],
+                               ascending=[False, False, True], ignore_index=True)
+
+
+def incident_keys(df):
+    # one row per (post, neighborhood) with incident = "cluster|neighborhood"
+    # for posts in a near-duplicate cluster, NaN otherwise
+    columns = ["url", "date", "sentiment", "neighborhoods_mentioned"]
+    posts = df[columns + (["cluster_id"] if "cluster_id" in df else [])]
+    posts = posts.explode("neighborhoods_mentioned", ignore_index=True)
+    posts = posts.dropna(subset=["neighborhoods_mentioned"])
+    if "cluster_id" in posts:
+        cluster = posts["cluster_id"].astype("Int64").astype(str)
+        posts["incident"] = (cluster + "|" + posts["neighborhoods_mentioned"]).where(posts["cluster_id"].notna())
+    else:
+        posts["incident"] = np.nan
+    return posts
+
+
+def read_posts(path):
+    # every post, with a uint64 hash of its url and of the fields that decide
+    # how it's counted, so a changed label or cluster is noticed without
+    # keeping the text or the urls around
+    header = pd.read_csv(path, nrows=0).columns
+    columns = ["url", "date", "sentiment", "neighborhoods_mentioned"]
+    df = pd.read_csv(path, usecols=columns + (["cluster_id"] if "cluster_id" in header else []))
+    df = df.drop_duplicates("url", keep="last")
+    hashed = df[["sentiment", "neighborhoods_mentioned"]].assign(
+        cluster_id=df["cluster_id"].astype("Int64") if "cluster_id" in df else pd.NA)
+    df["signature"] = pd.util.hash_pandas_object(hashed, index=False).to_numpy()
+    df["url_hash"] = pd.util.hash_pandas_object(df["url"], index=False).to_numpy()
+    df["neighborhoods_mentioned"] = df["neighborhoods_mentioned"].apply(ast.literal_eval)
+    return df
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Update rolling-window neighborhood risk")
+    parser.add_argument("--input", default=SENTIMENT_PATH)
+    parser.add_argument("--state", default=STATE_PATH)
+    parser.add_argument("--output", default=OUTPUT_PATH)
+    parser.add_argument("--rebuild", action="store_true", help="ignore the saved state")
+    args = parser.parse_args()
+
+    state = RollingRisk() if args.rebuild else RollingRisk.load(args.state)
+
+    with stage("rolling.ingest") as s:
+        posts = read_posts(args.input)
+        if not state.is_append_only(posts):
+            print("Earlier posts changed since the last run, rebuilding")
+            state = RollingRisk()
+        ingested = state.update(posts)
+        s.add(ingested)
+    print(f"New posts ingested: {ingested}")
+
+    with stage("rolling.derive", items=len(state.neighborhoods)):
+        table = state.table()
+    state.save(args.state)
+    table.to_csv(args.output, index=False)
+
+    if table.empty:
+        print("No posts yet")
+        return
+    rising = table[table["rising"]]
+    print(f"As of {table['as_of'].iloc[0]}: {len(rising)} neighborhoods with rising risk")
+    for _, row in rising.iterrows():
+        print(f"  {row['neighborhood']}: 30d fear {row['fear_ratio_30d']:.0%} "
+              f"vs 90d {row['fear_ratio_90d']:.0%} ({int(row['posts_30d'])} posts)")
+    print(f"Saved {args.output}")
+
+
+if __name__ == "__main__":
+    main()
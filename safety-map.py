@@ -0,0 +1,19 @@
+import pandas as pd
+from cooccurrence import load_concerns
+from instrumentation import stage
+from map_builder import build_map
+from snippets import load_snippets
+
+# ---- LOAD SUMMARY ----
+summary_df = pd.read_csv("neighborhood_sentiment_summary.csv")
+concerns = load_concerns()  # written by analysis.py, None if missing
+snippets = load_snippets()  # likewise
+quotes = snippets.top_quotes() if snippets is not None else None
+
+# ---- BUILD MAP ----
+print("Building map...")
+with stage("map.build", items=len(summary_df)):
+    m = build_map(summary_df, concerns=concerns, quotes=quotes)
+    m.save("hersafe_chicago_map.html")
+
+print("Map saved! Open hersafe_chicago_map.html in your browser.")
@@ -0,0 +1,433 @@
+import argparse
+import ast
+import math
+import os
+import pickle
+import re
+import threading
+import time
+from array import array
+
+import numpy as np
+import pandas as pd
+
+from instrumentation import stage
+
+# ---- FULL-TEXT SEARCH OVER POSTS ----
+# Inverted index over title + text with positional postings, ranked with
+# BM25. Per-value posting lists for neighborhood, sentiment and safety flag
+# let a query be restricted without touching the posts themselves.
+#
+#   python search_index.py build                      # bring the index up to date
+#   python search_index.py query "followed home" --neighborhood Uptown
+#   python search_index.py query '"red line" night' --sentiment Negative/Fear -k 5
+#
+# Quoted phrases must appear word for word; other words are ranked with
+# BM25. A query with only filters returns the newest matching posts.
+#
+# The index is pickled to search_index.pkl with a hash of each post's text
+# and of its labels (sentiment, neighborhoods, flags). Building only
+# tokenizes urls it doesn't have yet; posts whose labels changed, e.g. after
+# rerunning sentiment, just move between filter lists. If an indexed post's
+# text changed or it is gone from the CSV, the index is rebuilt from scratch.
+# neighborhood_service.py serves the same index at /search.
+
+SENTIMENT_PATH = "chicago_safety_sentiment.csv"
+INDEX_PATH = "search_index.pkl"
+
+K1, B = 1.2, 0.75
+PREVIEW_CHARS = 200
+DEFAULT_K = 10
+# score candidates one by one when filters leave fewer than 1/8 of the docs
+SPARSE_FRACTION = 8
+IMPACT_CACHE_TERMS = 512
+
+TOKEN_RE = re.compile(r"[a-z0-9']+")
+FILTERS = ["neighborhood", "sentiment", "flag"]
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(str(text).lower())
+
+
+PHRASE_RE = re.compile(r'"([^"]*)"')
+
+
+def parse_query(query):
+    # -> (loose words, list of phrases); a phrase is a list of words
+    phrases = [tokenize(p) for p in PHRASE_RE.findall(query)]
+    words = tokenize(PHRASE_RE.sub(" ", query))
+    # a one-word "phrase" is just a word
+    words += [p[0] for p in phrases if len(p) == 1]
+    return words, [p for p in phrases if len(p) > 1]
+
+
+class Postings:
+    # one term's postings: parallel doc / term-frequency / position-start
+    # arrays plus every position in doc order
+    __slots__ = ("docs", "tfs", "starts", "positions")
+
+    def __init__(self):
+        self.docs = array("I")
+        self.tfs = array("I")
+        self.starts = array("I")
+        self.positions = array("I")
+
+    def add(self, doc, positions):
+        self.docs.append(doc)
+        self.tfs.append(len(positions))
+        self.starts.append(len(self.positions))
+        self.positions.extend(positions)
+
+    def doc_positions(self, i):
+        end = self.starts[i + 1] if i + 1 < len(self.starts) else len(self.positions)
+        return self.positions[self.starts[i]:end]
+
+
+class SearchIndex:
+    def __init__(self):
+        self.urls = []
+        self.doc_ids = {}
+        self.titles = []
+        self.previews = []
+        self.subreddits = []
+        self.sentiments = []
+        self.neighborhoods = []
+        self.flags = []
+        self.dates = array("q")
+        # per-doc hashes of the indexed text and of the labels (see read_posts)
+        self.text_hashes = array("Q")
+        self.label_hashes = array("Q")
+        self.lengths = array("I")
+        self.total_length = 0
+        self.postings = {}
+        # filter name -> lowercased value -> sorted doc ids
+        self.filters = {name: {} for name in FILTERS}
+        # term -> (doc count, BM25 impacts); the service's request threads
+        # share it, so it's only changed under the lock. Not pickled.
+        self._impacts = {}
+        self._impact_lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.urls)
+
+    # ---- PERSISTENCE ----
+    # only builtins and arrays are pickled, so the file loads the same whether
+    # it was written by this script or by an importer
+    @classmethod
+    def load(cls, path=INDEX_PATH):
+        index = cls()
+        if not os.path.exists(path):
+            return index
+        with open(path, "rb") as f:
+            state = pickle.load(f)
+        postings = state.pop("postings")
+        index.__dict__.update(state)
+        for term, arrays in postings.items():
+            p = index.postings[term] = Postings()
+            p.docs, p.tfs, p.starts, p.positions = arrays
+        return index
+
+    def save(self, path=INDEX_PATH):
+        state = {k: v for k, v in self.__dict__.items() if not k.startswith("_")}
+        state["postings"] = {term: (p.docs, p.tfs, p.starts, p.positions)
+                             for term, p in self.postings.items()}
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+
+    # ---- BUILDING ----
+    def add_post(self, url, title, text, subreddit, date, sentiment, neighborhoods, flags,
+                 text_hash=0, label_hash=0):
+        if url in self.doc_ids:
+            return False
+        doc = len(self.urls)
+        self.doc_ids[url] = doc
+        self.urls.append(url)
+        title = "" if pd.isna(title) else str(title)
+        text = "" if pd.isna(text) else str(text)
+        self.titles.append(title)
+        self.previews.append(text[:PREVIEW_CHARS])
+        self.subreddits.append(subreddit)
+        self.sentiments.append(sentiment)
+        self.neighborhoods.append(list(neighborhoods))
+        self.flags.append(list(flags))
+        self.dates.append(int(date))
+        self.text_hashes.append(int(text_hash))
+        self.label_hashes.append(int(label_hash))
+
+        tokens = tokenize(title + " " + text)
+        self.lengths.append(len(tokens))
+        self.total_length += len(tokens)
+        positions = {}
+        for pos, token in enumerate(tokens):
+            positions.setdefault(token, []).append(pos)
+        for token, pos in positions.items():
+            postings = self.postings.get(token)
+            if postings is None:
+                postings = self.postings[token] = Postings()
+            postings.add(doc, pos)
+
+        values = {"neighborhood": neighborhoods, "sentiment": [sentiment], "flag": flags}
+        for name, vals in values.items():
+            for v in set(vals):
+                self.filters[name].setdefault(str(v).lower(), array("I")).append(doc)
+        return True
+
+    def add_posts(self, df):
+        added = 0
+        for row in zip(df["url"], df["title"], df["text"], df["subreddit"], df["date"],
+                       df["sentiment"], df["neighborhoods_mentioned"], df["safety_flags"],
+                       df["text_hash"], df["label_hash"]):
+            added += self.add_post(*row)
+        return added
+
+    def relabel_posts(self, df):
+        # move already indexed posts whose labels changed to their new filter
+        # lists; postings and BM25 stats only depend on the text, so stay
+        docs = [self.doc_ids[url] for url in df["url"]]
+        moves = {name: {} for name in FILTERS}
+        for doc, sentiment, neighborhoods, flags, label_hash in zip(
+                docs, df["sentiment"], df["neighborhoods_mentioned"], df["safety_flags"],
+                df["label_hash"]):
+            old = {"neighborhood": self.neighborhoods[doc], "sentiment": [self.sentiments[doc]],
+                   "flag": self.flags[doc]}
+            new = {"neighborhood": neighborhoods, "sentiment": [sentiment], "flag": flags}
+            for name in FILTERS:
+                before = {str(v).lower() for v in old[name]}
+                after = {str(v).lower() for v in new[name]}
+                for v in before - after:
+                    moves[name].setdefault(v, (set(), set()))[0].add(doc)
+                for v in after - before:
+                    moves[name].setdefault(v, (set(), set()))[1].add(doc)
+            self.sentiments[doc] = sentiment
+            self.neighborhoods[doc] = list(neighborhoods)
+            self.flags[doc] = list(flags)
+            self.label_hashes[doc] = int(label_hash)
+        # each touched list is rebuilt once, kept sorted
+        for name, values in moves.items():
+            for v, (removed, added) in values.items():
+                ids = set(self.filters[name].get(v, ())) - removed | added
+                if ids:
+                    self.filters[name][v] = array("I", sorted(ids))
+                else:
+                    self.filters[name].pop(v, None)
+        return len(docs)
+
+    # ---- QUERYING ----
+    @staticmethod
+    def _ids(arr):
+        return np.frombuffer(arr, dtype=np.uint32) if len(arr) else np.zeros(0, dtype=np.uint32)
+
+    def filter_docs(self, **filters):
+        # intersection of the requested filter posting lists, or None if unfiltered
+        docs = None
+        for name in FILTERS:
+            value = filters.get(name)
+            if not value:
+                continue
+            ids = self._ids(self.filters[name].get(str(value).lower(), array("I")))
+            docs = ids if docs is None else np.intersect1d(docs, ids, assume_unique=True)
+        return docs
+
+    def _impact(self, term):
+        # BM25 contribution of the term to each doc in its postings; cached
+        # until the index grows, since the doc count and avgdl feed into it
+        cache = self._impacts
+        n = len(self)
+        hit = cache.get(term)
+        if hit is not None and hit[0] == n:
+            return hit[1]
+        p = self.postings[term]
+        docs = self._ids(p.docs)
+        tf = self._ids(p.tfs).astype(np.float32)
+        lengths = self._ids(self.lengths)[docs].astype(np.float32)
+        idf = math.log(1 + (n - len(docs) + 0.5) / (len(docs) + 0.5))
+        impact = idf * tf * (K1 + 1) / (tf + K1 * (1 - B + B * lengths * n / self.total_length))
+        with self._impact_lock:
+            while cache and len(cache) >= IMPACT_CACHE_TERMS:
+                cache.pop(next(iter(cache)), None)
+            cache[term] = (n, impact)
+        return impact
+
+    def score(self, terms, docs=None):
+        # -> (docs, BM25 scores) for docs matching any term, limited to the
+        # candidate docs if given
+        terms = [t for t in set(terms) if t in self.postings]
+        if docs is not None and len(docs) * SPARSE_FRACTION < len(self):
+            # few candidates: look each one up in the postings instead of
+            # scoring every doc
+            scores = np.zeros(len(docs), dtype=np.float32)
+            for term in terms:
+                pdocs = self._ids(self.postings[term].docs)
+                at = np.minimum(np.searchsorted(pdocs, docs), len(pdocs) - 1)
+                hit = pdocs[at] == docs
+                scores[hit] += self._impact(term)[at[hit]]
+        else:
+            full = np.zeros(len(self), dtype=np.float32)
+            for term in terms:
+                full[self._ids(self.postings[term].docs)] += self._impact(term)
+            if docs is None:
+                docs = np.flatnonzero(full)
+            scores = full[docs]
+        keep = scores > 0
+        return docs[keep], scores[keep]
+
+    def has_phrase(self, doc, phrase):
+        starts = None
+        for offset, term in enumerate(phrase):
+            p = self.postings[term]
+            pdocs = self._ids(p.docs)
+            i = int(np.searchsorted(pdocs, doc))
+            if i == len(pdocs) or pdocs[i] != doc:
+                return False
+            shifted = {pos - offset for pos in p.doc_positions(i)}
+            starts = shifted if starts is None else starts & shifted
+            if not starts:
+                return False
+        return True
+
+    @staticmethod
+    def _top(values, m):
+        # indices of the m largest values, largest first
+        if m >= len(values):
+            return np.argsort(-values, kind="stable")
+        part = np.argpartition(-values, m)[:m]
+        return part[np.argsort(-values[part], kind="stable")]
+
+    def search(self, query="", k=DEFAULT_K, neighborhood=None, sentiment=None, flag=None):
+        words, phrases = parse_query(query)
+        if any(t not in self.postings for phrase in phrases for t in phrase):
+            return []
+        docs = self.filter_docs(neighborhood=neighborhood, sentiment=sentiment, flag=flag)
+
+        terms = words + [t for phrase in phrases for t in phrase]
+        if not terms:
+            if docs is None or not len(docs):
+                return []
+            # filters only: newest first
+            dates = np.frombuffer(self.dates, dtype=np.int64)[docs]
+            return [self.result(int(docs[i]), None) for i in self._top(dates, k)]
+
+        docs, scores = self.score(terms, docs)
+        if not phrases:
+            return [self.result(int(docs[i]), float(scores[i])) for i in self._top(scores, k)]
+
+        # phrases: check positions on the best-scoring docs first, widening
+        # the window until k docs match or every candidate has been checked
+        found, checked, window = [], set(), k * 4
+        while True:
+            top = self._top(scores, window)
+            for i in top:
+                if i in checked:
+                    continue
+                checked.add(i)
+                if all(self.has_phrase(int(docs[i]), phrase) for phrase in phrases):
+                    found.append(i)
+                    if len(found) == k:
+                        break
+            if len(found) == k or len(top) == len(docs):
+                break
+            window *= 4
+        found.sort(key=lambda i: -scores[i])
+        return [self.result(int(docs[i]), float(scores[i])) for i in found]
+
+    def result(self, doc, score):
+        return {
+            "url": self.urls[doc],
+            "title": self.titles[doc],
+            "score": round(score, 3) if score is not None else None,
+            "subreddit": self.subreddits[doc],
+            "date": int(self.dates[doc]),
+            "sentiment": self.sentiments[doc],
+            "neighborhoods": self.neighborhoods[doc],
+            "preview": self.previews[doc],
+        }
+
+
+def read_posts(path):
+    # list columns stay unparsed here, see parse_lists; the hashes are over
+    # the raw CSV values
+    df = pd.read_csv(path, usecols=["title", "text", "subreddit", "date", "url", "sentiment",
+                                    "neighborhoods_mentioned", "safety_flags"])
+    df = df.drop_duplicates("url", keep="last")
+    hash_of = lambda cols: pd.util.hash_pandas_object(df[cols], index=False).to_numpy()
+    df["text_hash"] = hash_of(["title", "text", "subreddit", "date"])
+    df["label_hash"] = hash_of(["sentiment", "neighborhoods_mentioned", "safety_flags"])
+    return df
+
+
+def parse_lists(df):
+    df = df.copy()
+    for col in ("neighborhoods_mentioned", "safety_flags"):
+        df[col] = df[col].apply(ast.literal_eval)
+    return df
+
+
+def build(input_path=SENTIMENT_PATH, index_path=INDEX_PATH):
+    # -> (index, posts added, posts relabelled)
+    index = SearchIndex.load(index_path)
+    df = read_posts(input_path)
+    known = df["url"].isin(index.doc_ids)
+    docs = df.loc[known, "url"].map(index.doc_ids).to_numpy(dtype=np.int64)
+    # copies, not views: the arrays grow below
+    text_hashes = np.array(index.text_hashes, dtype=np.uint64)
+    label_hashes = np.array(index.label_hashes, dtype=np.uint64)
+    # a post's text changed or it was dropped (or the index predates the
+    # hashes): postings can't be edited in place, so start over
+    if (known.sum() != len(index) or len(text_hashes) != len(index)
+            or (df.loc[known, "text_hash"].to_numpy() != text_hashes[docs]).any()):
+        print("Indexed posts changed or were removed, rebuilding the index")
+        index, known, docs = SearchIndex(), np.zeros(len(df), dtype=bool), docs[:0]
+        label_hashes = label_hashes[:0]
+    relabelled = df[known]
+    relabelled = relabelled[relabelled["label_hash"].to_numpy() != label_hashes[docs]]
+    with stage("search.index", memory=False) as s:
+        s.add(index.add_posts(parse_lists(df[~known])))
+        s.add(index.relabel_posts(parse_lists(relabelled)))
+    index.save(index_path)
+    return index, int((~known).sum()), len(relabelled)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or query the post search index")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    build_cmd = sub.add_parser("build", help="index new posts and pick up relabelled ones")
+    build_cmd.add_argument("--input", default=SENTIMENT_PATH)
+    build_cmd.add_argument("--index", default=INDEX_PATH)
+
+    query_cmd = sub.add_parser("query", help="search the index")
+    query_cmd.add_argument("query", nargs="?", default="")
+    query_cmd.add_argument("--neighborhood")
+    query_cmd.add_argument("--sentiment")
+    query_cmd.add_argument("--flag")
+    query_cmd.add_argument("-k", type=int, default=DEFAULT_K)
+    query_cmd.add_argument("--index", default=INDEX_PATH)
+    args = parser.parse_args()
+
+    if args.command == "build":
+        index, added, relabelled = build(args.input, args.index)
+        print(f"Indexed {added} new posts, updated labels on {relabelled} "
+              f"({len(index)} total, {len(index.postings)} terms)")
+        print(f"Saved {args.index}")
+        return
+
+    if not os.path.exists(args.index):
+        parser.error(f"{args.index} not found; run 'python search_index.py build' first")
+    index = SearchIndex.load(args.index)
+    start = time.perf_counter()
+    results = index.search(args.query, args.k, args.neighborhood, args.sentiment, args.flag)
+    elapsed = (time.perf_counter() - start) * 1000
+    print(f"{len(results)} results in {elapsed:.1f} ms\n")
+    for r in results:
+        score = f"{r['score']:.2f}" if r["score"] is not None else "-"
+        day = time.strftime("%Y-%m-%d", time.gmtime(r["date"]))
+        print(f"[{score}] {r['title']}")
+        print(f"    {r['sentiment']} · r/{r['subreddit']} · {day} · {', '.join(r['neighborhoods'])}")
+        print(f"    {r['url']}")
+
+
+if __name__ == "__main__":
+    main()
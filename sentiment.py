@@ -0,0 +1,43 @@
+# Sentiment model loading and batched scoring, shared by sentiment-analysis.py,
+# the streaming path and the benchmarks (which pass a tiny stand-in model).
+# A model is any callable with the Hugging Face pipeline interface:
+# model(list_of_texts, batch_size=n) -> [{"label": ..., "score": ...}, ...]
+
+MODEL_NAME = "cardiffnlp/twitter-roberta-base-sentiment"
+BATCH_SIZE = 32
+
+label_map = {
+    "LABEL_0": "Negative/Fear",
+    "LABEL_1": "Neutral/Concern",
+    "LABEL_2": "Positive/Reassuring"
+}
+
+def load_model():
+    from transformers import pipeline
+    return pipeline(
+        "sentiment-analysis",
+        model=MODEL_NAME,
+        truncation=True,
+        max_length=512
+    )
+
+def _convert(result):
+    return label_map.get(result["label"], result["label"]), round(result["score"], 3)
+
+def get_sentiment(text, model):
+    try:
+        return _convert(model([str(text)[:512]])[0])
+    except Exception:
+        return "Neutral/Concern", 0.0
+
+def score_texts(texts, model, batch_size=BATCH_SIZE):
+    # one batched call; if it fails, fall back to per-post scoring so a single
+    # bad post only loses its own label
+    texts = [str(t)[:512] for t in texts]
+    try:
+        results = [_convert(r) for r in model(texts, batch_size=batch_size)]
+    except Exception:
+        results = [get_sentiment(t, model) for t in texts]
+    labels = [label for label, _ in results]
+    confidences = [conf for _, conf in results]
+    return labels, confidences
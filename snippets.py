@@ -0,0 +1,135 @@
+import argparse
+import os
+import re
+
+import pandas as pd
+
+# ---- NEIGHBORHOOD MENTION SNIPPETS ----
+# The tagging stage already knows where each neighborhood matched (see
+# tagging.find_neighborhood_mentions), so in the same pass it cuts a short
+# context window around the match and saves one row per (neighborhood, post)
+# to neighborhood_snippets.csv:
+#
+#   neighborhood, url, start, end      match offsets in the post's combined text
+#   snippet                            ~CONTEXT_CHARS either side, whitespace squashed
+#   mention_start, mention_end         the match inside snippet, for highlighting
+#   safety_score
+#
+# SnippetStore joins sentiment from the sentiment CSV by url and ranks each
+# neighborhood's snippets once, so "top fearful quotes for Englewood" is a
+# dict lookup and a slice; nothing rereads or regex-scans the post text.
+#
+#   python snippets.py Englewood          # top fearful quotes for one area
+
+SNIPPETS_PATH = "neighborhood_snippets.csv"
+SENTIMENT_PATH = "chicago_safety_sentiment.csv"
+CONTEXT_CHARS = 100
+TOP_N = 3
+FEAR = "Negative/Fear"
+
+SNIPPET_COLUMNS = ["neighborhood", "url", "start", "end", "snippet",
+                   "mention_start", "mention_end", "safety_score"]
+
+WHITESPACE_RE = re.compile(r"\s+")
+
+
+# ---- EXTRACTION ----
+def context_window(text, start, end, width=CONTEXT_CHARS):
+    # snippet around text[start:end], cut at word boundaries; returns the
+    # snippet and where the mention sits inside it
+    left = max(0, start - width)
+    if left > 0:
+        space = text.find(" ", left, start)
+        left = space + 1 if space != -1 else left
+    right = min(len(text), end + width)
+    if right < len(text):
+        space = text.rfind(" ", end, right)
+        right = space if space != -1 else right
+
+    before = WHITESPACE_RE.sub(" ", text[left:start])
+    after = WHITESPACE_RE.sub(" ", text[end:right])
+    if left > 0:
+        before = "…" + before.lstrip()
+    if right < len(text):
+        after = after.rstrip() + "…"
+    mention = text[start:end]
+    return before + mention + after, len(before), len(before) + len(mention)
+
+
+def build_snippets(df, mentions):
+    # df: url, combined, safety_score; mentions: (neighborhood, start, end)
+    # lists from the tagging pass, aligned with df's rows
+    rows = []
+    for url, text, safety_score, found in zip(df["url"], df["combined"], df["safety_score"], mentions):
+        for neighborhood, start, end in found:
+            snippet, mention_start, mention_end = context_window(text, start, end)
+            rows.append((neighborhood, url, start, end, snippet, mention_start, mention_end,
+                         int(safety_score)))
+    return pd.DataFrame(rows, columns=SNIPPET_COLUMNS)
+
+
+# ---- STORE ----
+class SnippetStore:
+    def __init__(self, snippets):
+        # snippets: SNIPPET_COLUMNS plus sentiment / confidence (may be NaN)
+        ranked = snippets.sort_values(["neighborhood", "confidence", "safety_score", "url"],
+                                      ascending=[True, False, False, True], kind="mergesort")
+        records = ranked.to_dict("records")
+        self.by_post = {(r["neighborhood"], r["url"]): r for r in records}
+        # (neighborhood, sentiment) -> snippets, most confident first
+        self.ranked = {}
+        for r in records:
+            self.ranked.setdefault((r["neighborhood"], r["sentiment"]), []).append(r)
+
+    @classmethod
+    def load(cls, path=SNIPPETS_PATH, sentiment_path=SENTIMENT_PATH):
+        snippets = pd.read_csv(path)
+        if os.path.exists(sentiment_path):
+            labels = pd.read_csv(sentiment_path, usecols=["url", "sentiment", "confidence"])
+            snippets = snippets.merge(labels.drop_duplicates("url"), on="url", how="left")
+        else:
+            snippets["sentiment"], snippets["confidence"] = None, float("nan")
+        return cls(snippets)
+
+    def get(self, neighborhood, url):
+        return self.by_post.get((neighborhood, url))
+
+    def top(self, neighborhood, n=TOP_N, sentiment=FEAR):
+        return self.ranked.get((neighborhood, sentiment), [])[:n]
+
+    def top_quotes(self, n=TOP_N, sentiment=FEAR):
+        # neighborhood -> its top n snippets, for the map popups
+        quotes = {}
+        for (neighborhood, s), records in self.ranked.items():
+            if s == sentiment:
+                quotes[neighborhood] = records[:n]
+        return quotes
+
+
+def load_snippets(path=SNIPPETS_PATH, sentiment_path=SENTIMENT_PATH):
+    # SnippetStore, or None when the tagging stage hasn't written snippets yet
+    if not os.path.exists(path):
+        return None
+    return SnippetStore.load(path, sentiment_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Top quotes mentioning a neighborhood")
+    parser.add_argument("neighborhood")
+    parser.add_argument("--sentiment", default=FEAR)
+    parser.add_argument("-n", type=int, default=5)
+    parser.add_argument("--snippets", default=SNIPPETS_PATH)
+    args = parser.parse_args()
+
+    store = load_snippets(args.snippets)
+    if store is None:
+        raise SystemExit(f"{args.snippets} not found; run analysis.py first")
+    quotes = store.top(args.neighborhood, args.n, args.sentiment)
+    print(f"{args.neighborhood}: {len(quotes)} {args.sentiment} quotes")
+    for q in quotes:
+        print(f"  - {q['snippet']}")
+        print(f"    {q['url']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+import argparse
+import os
+
+import pandas as pd
+
+from aggregation import NeighborhoodAggregator
+from cooccurrence import CONCERNS_PATH, MATRICES_PATH, MatrixBuilder
+from instrumentation import stage
+from near_dupes import OUTPUT_PATH as CLUSTERS_PATH, load_clusters
+from sentiment import BATCH_SIZE, load_model, score_texts
+from snippets import SNIPPETS_PATH, build_snippets
+from tagging import extract_safety_flags, find_neighborhood_mentions
+
+# Constant-memory alternative to running analysis.py + sentiment-analysis.py.
+# Reads the raw posts in chunks, tags each chunk, scores the located posts in
+# batches, appends the results to the located / sentiment CSVs and feeds the
+# running neighborhood counters. Only one chunk of posts is resident at a
+# time, so peak memory doesn't grow with the corpus. The post x neighborhood
+# / keyword matrices (cooccurrence.py) are the exception: they need every
+# located post's url and nonzero indices, so they grow by one url and a few
+# ints per located post until they're written with the concerns at the end.
+#
+#   python streaming.py
+#   python streaming.py --input big_dump.csv --chunksize 5000
+#
+# Near-duplicate clusters from post_clusters.csv are applied the same way as
+# in sentiment-analysis.py, and the summary is identical to the batch path
+# (test_streaming.py checks this). The located CSV is in input order rather
+# than sorted by safety_score, since sorting needs every row.
+#
+# With post_clusters.csv present, memory isn't completely flat: the url ->
+# cluster map and the aggregator's per-(cluster, neighborhood) incidents
+# grow with the number of posts in multi-post clusters. Singleton posts are
+# left out of both (see near_dupes.load_clusters), so this is bounded by how
+# many near-duplicates the corpus has, not by its size.
+
+CHUNKSIZE = 2000
+INPUT_PATH = "chicago_safety_reddit.csv"
+LOCATED_PATH = "chicago_safety_located.csv"
+SENTIMENT_PATH = "chicago_safety_sentiment.csv"
+SUMMARY_PATH = "neighborhood_sentiment_summary.csv"
+
+
+def tag_chunk(chunk):
+    # located posts plus their snippet rows (see snippets.py)
+    chunk["combined"] = chunk["title"].fillna("") + " " + chunk["text"].fillna("")
+    mentions = pd.Series([find_neighborhood_mentions(text, sub) for text, sub
+                          in zip(chunk["combined"], chunk["subreddit"])], index=chunk.index)
+    chunk["neighborhoods_mentioned"] = mentions.apply(lambda found: [n for n, _, _ in found])
+    chunk["safety_flags"] = [extract_safety_flags(text) for text in chunk["combined"]]
+    chunk["safety_score"] = chunk["safety_flags"].apply(len)
+    located = chunk[chunk["neighborhoods_mentioned"].apply(len) > 0].copy()
+    return located, build_snippets(located, mentions[located.index])
+
+
+def score_chunk(located, model, batch_size=BATCH_SIZE):
+    texts = located["combined"].tolist()
+    sentiments, confidences = [], []
+    for start in range(0, len(texts), batch_size):
+        labels, confs = score_texts(texts[start:start + batch_size], model, batch_size)
+        sentiments.extend(labels)
+        confidences.extend(confs)
+    located["sentiment"] = sentiments
+    located["confidence"] = confidences
+    return located
+
+
+def append_csv(df, path, first):
+    df.to_csv(path, mode="w" if first else "a", header=first, index=False)
+
+
+def stream_pipeline(model, input_path=INPUT_PATH, located_path=LOCATED_PATH,
+                    sentiment_path=SENTIMENT_PATH, summary_path=SUMMARY_PATH,
+                    snippets_path=SNIPPETS_PATH, clusters_path=CLUSTERS_PATH,
+                    matrices_path=MATRICES_PATH, concerns_path=CONCERNS_PATH,
+                    chunksize=CHUNKSIZE, batch_size=BATCH_SIZE, progress=True):
+    aggregator = NeighborhoodAggregator()
+    matrices = MatrixBuilder()
+    clusters = load_clusters(clusters_path)
+    # write to temp files so a failed run doesn't leave half a CSV in place
+    located_tmp, sentiment_tmp = located_path + ".tmp", sentiment_path + ".tmp"
+    snippets_tmp = snippets_path + ".tmp"
+    total = located_total = 0
+    first = True
+
+    with stage("stream.run") as s:
+        for chunk in pd.read_csv(input_path, chunksize=chunksize):
+            located, snippets = tag_chunk(chunk)
+            append_csv(located, located_tmp, first)
+            append_csv(snippets, snippets_tmp, first)
+            matrices.update(located)
+            located = score_chunk(located, model, batch_size)
+            if clusters is not None:
+                located["cluster_id"] = located["url"].map(clusters).astype("Int64")
+            append_csv(located, sentiment_tmp, first)
+            aggregator.update(located)
+
+            first = False
+            total += len(chunk)
+            located_total += len(located)
+            s.add(len(chunk))
+            if progress:
+                print(f"  {total} posts read, {located_total} located")
+
+    if first:
+        raise ValueError(f"{input_path} has no rows")
+    os.replace(located_tmp, located_path)
+    os.replace(sentiment_tmp, sentiment_path)
+    os.replace(snippets_tmp, snippets_path)
+    matrices.write(matrices_path, concerns_path)
+
+    summary_df = aggregator.summary()
+    summary_df.to_csv(summary_path, index=False)
+    return total, located_total, summary_df
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tag, score and summarize posts in constant memory")
+    parser.add_argument("--input", default=INPUT_PATH)
+    parser.add_argument("--chunksize", type=int, default=CHUNKSIZE, help="posts read per chunk")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="posts per model call")
+    args = parser.parse_args()
+
+    with stage("stream.model_load", memory=False):
+        model = load_model()
+
+    total, located, summary_df = stream_pipeline(model, input_path=args.input,
+                                                 chunksize=args.chunksize,
+                                                 batch_size=args.batch_size)
+
+    print(f"\nTotal posts: {total}")
+    print(f"Posts with Chicago neighborhoods: {located}")
+    print(f"Neighborhoods summarized: {len(summary_df)}")
+    print("\nDone! Files updated:")
+    print(f"  - {LOCATED_PATH}")
+    print(f"  - {SENTIMENT_PATH}")
+    print(f"  - {SUMMARY_PATH}")
+    print(f"  - {SNIPPETS_PATH}")
+    print(f"  - {MATRICES_PATH}")
+    print(f"  - {CONCERNS_PATH}")
+    print("Run safety-map.py to rebuild hersafe_chicago_map.html")
+
+
+if __name__ == "__main__":
+    main()
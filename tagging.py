@@ -0,0 +1,66 @@
+import re
+
+from neighborhoods import ambiguous, chicago_neighborhoods, safety_keywords
+
+# Neighborhood and safety-keyword tagging shared by analysis.py, the streaming
+# path and the benchmarks. Patterns are compiled once; a cheap lowercase
+# substring test runs before each word-boundary regex so most of the ~90
+# neighborhood patterns are never evaluated for a given post.
+
+def _word_pattern(term):
+    return re.compile(r'\b' + re.escape(term) + r'\b', re.IGNORECASE)
+
+NEIGHBORHOOD_PATTERNS = [(n, n.lower(), _word_pattern(n)) for n in chicago_neighborhoods]
+KEYWORD_PATTERNS = [(kw, kw.lower(), _word_pattern(kw)) for kw in safety_keywords]
+AMBIGUOUS = set(ambiguous)
+
+# ---- CHICAGO CONTEXT CHECK ----
+def is_chicago_relevant(text, subreddit, neighborhood):
+    text_lower = text.lower()
+    subreddit_lower = str(subreddit).lower()
+
+    # always trust chicago-specific subreddits
+    if any(s in subreddit_lower for s in ["chicago", "askchicago"]):
+        return True
+
+    # ambiguous names need explicit Chicago mention in text
+    if neighborhood in AMBIGUOUS:
+        return any(w in text_lower for w in ["chicago", " chi ", "illinois", " il "])
+
+    # for all others, if Chicago mentioned anywhere trust it
+    if "chicago" in text_lower:
+        return True
+
+    return False
+
+# ---- EXTRACTION FUNCTIONS ----
+def find_neighborhood_mentions(text, subreddit):
+    # (neighborhood, start, end) of each neighborhood's first match; the
+    # offsets index into text, so snippets.py can cut context without searching
+    if not isinstance(text, str):
+        return []
+    lower = text.lower()
+    found = []
+    for neighborhood, name_lower, pattern in NEIGHBORHOOD_PATTERNS:
+        if name_lower not in lower:
+            continue
+        match = pattern.search(text)
+        if match and is_chicago_relevant(text, subreddit, neighborhood):
+            found.append((neighborhood, match.start(), match.end()))
+    return found
+
+def find_neighborhoods(text, subreddit):
+    return [n for n, _, _ in find_neighborhood_mentions(text, subreddit)]
+
+def extract_neighborhoods(row):
+    return find_neighborhoods(row["combined"], row["subreddit"])
+
+def extract_neighborhood_mentions(row):
+    return find_neighborhood_mentions(row["combined"], row["subreddit"])
+
+def extract_safety_flags(text):
+    if not isinstance(text, str):
+        return []
+    lower = text.lower()
+    return [kw for kw, kw_lower, pattern in KEYWORD_PATTERNS
+            if kw_lower in lower and pattern.search(text)]
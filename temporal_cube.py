@@ -0,0 +1,124 @@
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+
+import post_table
+from post_table import PostTable
+
+# ---- TEMPORAL AGGREGATE CUBE ----
+# Post counts by (neighborhood, sentiment, hour, weekday), computed once from
+# the sentiment CSV and saved. The time charts read slices of this cube
+# instead of regrouping the raw posts on every render.
+#
+# Rows with neighborhood == ALL count every post exactly once; the per-
+# neighborhood rows count a post once for each neighborhood it mentions.
+#
+# Hours and weekdays are on the Chicago wall clock (TIMEZONE), the same clock
+# correlation_311.py bins 311 requests on, so "Night (8pm-4am)" means one
+# thing everywhere. The dates themselves are stored as UTC unix seconds.
+#
+# A hash of the code that builds the cube is saved next to it, so editing
+# this module or post_table.py also forces a rebuild.
+
+SENTIMENT_PATH = "chicago_safety_sentiment.csv"
+CUBE_PATH = "temporal_cube.csv"
+ALL = "__all__"
+TIMEZONE = "America/Chicago"
+
+DAY_ORDER = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+# time-of-day buckets as a 24-entry lookup table, indexed by hour
+BUCKET_LABELS = ["Day (4am-4pm)", "Evening (4pm-8pm)", "Night (8pm-4am)"]
+DAY, EVENING, NIGHT = 0, 1, 2
+HOUR_BUCKET = np.array([NIGHT] * 4 + [DAY] * 12 + [EVENING] * 4 + [NIGHT] * 4, dtype=np.int8)
+
+
+def time_bucket(hours):
+    # vectorized: hours is any int array-like in 0..23
+    return HOUR_BUCKET[np.asarray(hours, dtype=np.int64)]
+
+
+def local_seconds(unix_seconds):
+    # UTC unix seconds -> seconds since the epoch on the Chicago wall clock
+    local = pd.to_datetime(np.asarray(unix_seconds, dtype=np.int64), unit="s", utc=True)
+    local = local.tz_convert(TIMEZONE).tz_localize(None)
+    return local.to_numpy(dtype="datetime64[s]").astype(np.int64)
+
+
+def time_features(dates):
+    # UTC unix seconds -> local (hour, weekday) int arrays, Monday == 0
+    seconds = local_seconds(dates)
+    hour = (seconds // 3600) % 24
+    # 1970-01-01 was a Thursday
+    weekday = (seconds // 86400 + 3) % 7
+    return hour.astype(np.int8), weekday.astype(np.int8)
+
+
+def build_cube(table):
+    # table is a post_table.PostTable; every (sentiment, hour, weekday) cell
+    # is one bincount slot
+    hour, weekday = time_features(table.date)
+    labels = list(table.sentiment.categories)
+    cells = (table.sentiment.codes.astype(np.int64) * 24 + hour) * 7 + weekday
+    size = len(labels) * 24 * 7
+
+    def counts(groups, cell, n_groups):
+        flat = np.bincount(groups * size + cell, minlength=n_groups * size)
+        group, sentiment, hour, weekday = np.unravel_index(
+            np.flatnonzero(flat), (n_groups, len(labels), 24, 7))
+        cube = pd.DataFrame({"group": group,
+                             "sentiment": np.asarray(labels, dtype=object)[sentiment],
+                             "hour": hour.astype(np.int8), "weekday": weekday.astype(np.int8),
+                             "count": flat[flat > 0]})
+        return cube.sort_values(["group", "sentiment", "hour", "weekday"], kind="mergesort")
+
+    overall = counts(np.zeros(len(table), dtype=np.int64), cells, 1)
+    overall = overall.drop(columns="group")
+    overall.insert(0, "neighborhood", ALL)
+
+    posts, codes = table.neighborhood_pairs()
+    per_n = counts(codes.astype(np.int64), cells[posts], len(table.neighborhood_names))
+    per_n.insert(0, "neighborhood", np.asarray(table.neighborhood_names, dtype=object)[per_n.pop("group")])
+    per_n = per_n.sort_values("neighborhood", kind="mergesort")
+
+    return pd.concat([overall, per_n], ignore_index=True)
+
+
+def code_version():
+    h = hashlib.sha256()
+    for path in (__file__, post_table.__file__):
+        with open(path, "rb") as f:
+            h.update(f.read())
+    return h.hexdigest()[:16]
+
+
+def saved_version(cube_path):
+    version_path = cube_path + ".version"
+    if not os.path.exists(version_path):
+        return None
+    with open(version_path) as f:
+        return f.read().strip()
+
+
+def load_cube(sentiment_path=SENTIMENT_PATH, cube_path=CUBE_PATH):
+    # rebuild when the sentiment CSV is newer than the saved cube or the
+    # cube was built by different code
+    version = code_version()
+    if (os.path.exists(cube_path) and saved_version(cube_path) == version
+            and os.path.getmtime(cube_path) >= os.path.getmtime(sentiment_path)):
+        return pd.read_csv(cube_path)
+
+    cube = build_cube(PostTable.load(sentiment_path))
+    cube.to_csv(cube_path, index=False)
+    with open(cube_path + ".version", "w") as f:
+        f.write(version + "\n")
+    print(f"  {cube_path} rebuilt ({len(cube)} cells)")
+    return cube
+
+
+if __name__ == "__main__":
+    if os.path.exists(CUBE_PATH):
+        os.remove(CUBE_PATH)
+    load_cube()
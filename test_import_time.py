@@ -0,0 +1,12 @@
+from check_import_time import BUDGET_MS, MODULE, measure
+
+# visualizations.py must stay cheap to import: the plotting libraries are
+# loaded inside the functions that draw.
+#
+#   python -m pytest test_import_time.py
+
+
+def test_import_stays_lazy():
+    best_ms, eager = measure()
+    assert not eager, f"heavy modules imported at startup by {MODULE}: {', '.join(eager)}"
+    assert best_ms <= BUDGET_MS, f"import {MODULE}: {best_ms:.1f} ms, budget {BUDGET_MS} ms"
@@ -0,0 +1,114 @@
+import math
+import os
+import threading
+
+import numpy as np
+import pytest
+
+import search_index
+from benchmark import generate_corpus
+from search_index import B, K1, build, tokenize
+from tagging import extract_neighborhood_mentions, extract_safety_flags
+
+# The index must rank like BM25 computed by brute force over the tokenized
+# posts, and quoted phrases must match exactly the posts that contain them.
+#
+#   python -m pytest test_search_index.py
+
+os.environ["HERSAFE_REPORTS"] = "0"
+
+SENTIMENTS = ["Negative/Fear", "Neutral/Concern", "Positive/Reassuring"]
+
+
+@pytest.fixture(scope="module")
+def corpus(tmp_path_factory):
+    workdir = tmp_path_factory.mktemp("search")
+    df = generate_corpus(300, seed=3)
+    df["combined"] = df["title"] + " " + df["text"]
+    mentions = df.apply(extract_neighborhood_mentions, axis=1)
+    df["neighborhoods_mentioned"] = mentions.apply(lambda found: [n for n, _, _ in found])
+    df["safety_flags"] = df["combined"].apply(extract_safety_flags)
+    df["sentiment"] = np.random.default_rng(3).choice(SENTIMENTS, size=len(df))
+    df.to_csv(workdir / "posts.csv", index=False)
+    index, _, _ = build(str(workdir / "posts.csv"), str(workdir / "index.pkl"))
+    return df, index
+
+
+def brute_force_scores(df, terms):
+    # url -> BM25 score over every post, straight from the formula
+    docs = [tokenize(f"{t} {x}") for t, x in zip(df["title"], df["text"])]
+    n = len(docs)
+    avgdl = sum(map(len, docs)) / n
+    scores = {}
+    for url, tokens in zip(df["url"], docs):
+        score = 0.0
+        for term in set(terms):
+            df_t = sum(term in d for d in docs)
+            tf = tokens.count(term)
+            if not tf:
+                continue
+            idf = math.log(1 + (n - df_t + 0.5) / (df_t + 0.5))
+            score += idf * tf * (K1 + 1) / (tf + K1 * (1 - B + B * len(tokens) / avgdl))
+        if score > 0:
+            scores[url] = score
+    return scores
+
+
+def contains_phrase(tokens, phrase):
+    return any(tokens[i:i + len(phrase)] == phrase for i in range(len(tokens) - len(phrase) + 1))
+
+
+def common_terms(df, m):
+    counts = {}
+    for text in df["text"]:
+        for token in set(tokenize(text)):
+            counts[token] = counts.get(token, 0) + 1
+    return sorted(counts, key=lambda t: (-counts[t], t))[:m]
+
+
+def test_bm25_matches_brute_force(corpus):
+    df, index = corpus
+    for query in common_terms(df, 40)[::8] + ["followed home", "chicago night"]:
+        expected = brute_force_scores(df, tokenize(query))
+        found = index.search(query, k=len(df))
+        assert {r["url"] for r in found} == set(expected)
+        for r in found:
+            assert r["score"] == pytest.approx(expected[r["url"]], abs=2e-3)
+        assert [r["score"] for r in found] == sorted((r["score"] for r in found), reverse=True)
+
+
+@pytest.mark.parametrize("sentiment", [None, "Negative/Fear"])
+def test_phrases_match_a_scan(corpus, sentiment):
+    df, index = corpus
+    docs = {url: tokenize(f"{t} {x}") for url, t, x in zip(df["url"], df["title"], df["text"])}
+    labels = dict(zip(df["url"], df["sentiment"]))
+    # two-word phrases taken from the posts, plus one that occurs nowhere
+    phrases = [docs[url][i:i + 2] for url, i in zip(df["url"][:12], range(12))]
+    phrases.append(["chicago", "chicago"])
+    for phrase in phrases:
+        expected = {url for url, tokens in docs.items() if contains_phrase(tokens, phrase)
+                    and sentiment in (None, labels[url])}
+        found = index.search(f'"{" ".join(phrase)}"', k=len(df), sentiment=sentiment)
+        assert {r["url"] for r in found} == expected
+
+
+def test_impact_cache_is_thread_safe(corpus, monkeypatch):
+    _, index = corpus
+    monkeypatch.setattr(search_index, "IMPACT_CACHE_TERMS", 2)
+    terms = list(index.postings)[:60]
+    errors = []
+
+    def worker(offset):
+        try:
+            for i in range(300):
+                index.search(terms[(i + offset) % len(terms)])
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not errors
+    assert len(index._impacts) <= 2
@@ -0,0 +1,88 @@
+import os
+
+import pandas as pd
+import pytest
+
+from aggregation import summarize_neighborhoods
+from benchmark import TinySentimentModel, generate_corpus
+from cooccurrence import load_matrices, write_outputs
+from near_dupes import load_clusters
+from sentiment import score_texts
+from streaming import stream_pipeline
+from tagging import extract_neighborhood_mentions, extract_safety_flags
+
+# The streaming path must give the same neighborhood summary as
+# analysis.py + sentiment-analysis.py run over the whole file at once.
+#
+#   python -m pytest test_streaming.py
+
+# the instrumented stages shouldn't leave reports in run_reports/
+os.environ["HERSAFE_REPORTS"] = "0"
+
+
+def write_corpus(workdir, with_clusters):
+    df = generate_corpus(400, seed=1)
+    if with_clusters:
+        # reposts of the first 60 posts, some earlier than the original
+        copies = df.head(60).copy()
+        copies["url"] = copies["url"] + "-repost"
+        copies["date"] = copies["date"] + pd.Series(range(-30, 30), index=copies.index) * 3600
+        df = pd.concat([df, copies], ignore_index=True)
+        cluster_id = list(range(400)) + list(range(60))
+        clusters = pd.DataFrame({"url": df["url"], "cluster_id": cluster_id})
+        clusters["cluster_size"] = clusters.groupby("cluster_id")["url"].transform("size")
+        clusters.to_csv(os.path.join(workdir, "post_clusters.csv"), index=False)
+    df.to_csv(os.path.join(workdir, "raw.csv"), index=False)
+
+
+def batch_summary(workdir, model):
+    # the same steps as analysis.py and sentiment-analysis.py
+    df = pd.read_csv(os.path.join(workdir, "raw.csv"))
+    df["combined"] = df["title"].fillna("") + " " + df["text"].fillna("")
+    mentions = df.apply(extract_neighborhood_mentions, axis=1)
+    df["neighborhoods_mentioned"] = mentions.apply(lambda found: [n for n, _, _ in found])
+    df["safety_flags"] = df["combined"].apply(extract_safety_flags)
+    df["safety_score"] = df["safety_flags"].apply(len)
+    df = df[df["neighborhoods_mentioned"].apply(len) > 0].copy()
+    df = df.sort_values("safety_score", ascending=False)
+    df["sentiment"], df["confidence"] = score_texts(df["combined"].tolist(), model)
+    clusters = load_clusters(os.path.join(workdir, "post_clusters.csv"))
+    if clusters is not None:
+        df["cluster_id"] = df["url"].map(clusters).astype("Int64")
+    return df, summarize_neighborhoods(df)
+
+
+@pytest.mark.parametrize("with_clusters", [False, True])
+def test_stream_matches_batch(tmp_path, with_clusters):
+    workdir = str(tmp_path)
+    write_corpus(workdir, with_clusters)
+    model = TinySentimentModel()
+    path = lambda name: os.path.join(workdir, name)
+
+    total, located, summary = stream_pipeline(
+        model, input_path=path("raw.csv"), located_path=path("located.csv"),
+        sentiment_path=path("sentiment.csv"), summary_path=path("summary.csv"),
+        snippets_path=path("snippets.csv"), clusters_path=path("post_clusters.csv"),
+        matrices_path=path("matrices.npz"), concerns_path=path("concerns.csv"),
+        chunksize=37, batch_size=8, progress=False)
+    posts, expected = batch_summary(workdir, model)
+
+    assert total == 460 if with_clusters else total == 400
+    assert located == len(posts)
+    pd.testing.assert_frame_equal(summary, expected)
+    pd.testing.assert_frame_equal(pd.read_csv(path("summary.csv")), expected, check_dtype=False)
+
+    streamed = pd.read_csv(path("sentiment.csv")).set_index("url").sort_index()
+    posts = posts.set_index("url").sort_index()
+    assert streamed["sentiment"].tolist() == posts["sentiment"].tolist()
+    if with_clusters:
+        assert streamed["cluster_id"].astype("Int64").equals(posts["cluster_id"])
+
+    # matrix rows follow the streamed located CSV; the concerns match the batch ones
+    write_outputs(posts.reset_index(), path("batch.npz"), path("batch_concerns.csv"))
+    pd.testing.assert_frame_equal(pd.read_csv(path("concerns.csv")), pd.read_csv(path("batch_concerns.csv")))
+    urls, P, K, neighborhoods, keywords = load_matrices(path("matrices.npz"))
+    assert urls == pd.read_csv(path("located.csv"))["url"].tolist()
+    _, bP, bK, _, _ = load_matrices(path("batch.npz"))
+    order = pd.Series(range(len(posts)), index=posts.index)[urls].to_numpy()
+    assert (P != bP[order]).nnz == 0 and (K != bK[order]).nnz == 0
@@ -1,38 +1,72 @@
-import pandas as pd
-import ast
+import argparse
+import os
 import re
-import matplotlib.pyplot as plt
-import matplotlib.patches as mpatches
-import seaborn as sns
-from wordcloud import WordCloud
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-from datetime import datetime
-from collections import Counter
+from functools import lru_cache
 import warnings
 warnings.filterwarnings("ignore")
 
-# ---- LOAD DATA ----
-df = pd.read_csv("chicago_safety_sentiment.csv")
-df["neighborhoods_mentioned"] = df["neighborhoods_mentioned"].apply(ast.literal_eval)
-df["safety_flags"] = df["safety_flags"].apply(ast.literal_eval)
-df["combined"] = df["title"].fillna("") + " " + df["text"].fillna("")
-df["date"] = pd.to_datetime(df["date"], unit="s")
-df["hour"] = df["date"].dt.hour
-df["day_of_week"] = df["date"].dt.day_name()
-df["is_night"] = df["hour"].apply(lambda h: "Night (8pm-4am)" if (h >= 20 or h < 4) else "Evening (4pm-8pm)" if h >= 16 else "Day (4am-4pm)")
+# Heavy libraries (pandas, matplotlib, wordcloud, plotly) are imported inside
+# the functions that need them and data is loaded on first use, so importing
+# this module or running --help stays fast and a single chart only pays for
+# what it renders.
+
+SENTIMENT_PATH = "chicago_safety_sentiment.csv"
+SUMMARY_PATH = "neighborhood_sentiment_summary.csv"
 
-summary = pd.read_csv("neighborhood_sentiment_summary.csv")
-summary = summary[summary["risk_rating"] != "Insufficient Data"]
+# ---- LOAD DATA ----
+@lru_cache(maxsize=None)
+def load_posts():
+    # compact table; post text is read from the CSV only when a chart asks
+    from post_table import PostTable
+    return PostTable.load(SENTIMENT_PATH)
+
+@lru_cache(maxsize=None)
+def load_cube():
+    # counts by (neighborhood, sentiment, hour, weekday); see temporal_cube.py
+    import temporal_cube
+    return temporal_cube.load_cube(SENTIMENT_PATH)
+
+@lru_cache(maxsize=None)
+def load_summary():
+    import pandas as pd
+    summary = pd.read_csv(SUMMARY_PATH)
+    # older summaries are rated on the raw ratio; re-rate them on the smoothed one
+    if "smoothed_ratio" not in summary:
+        from aggregation import add_risk_intervals
+        summary = add_risk_intervals(summary)
+    return summary[summary["risk_rating"] != "Insufficient Data"]
+
+def get_pyplot():
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    return plt
+
+# every Plotly chart references this one local bundle instead of embedding
+# its own multi-MB copy of plotly.js
+PLOTLY_BUNDLE = "plotly.min.js"
+
+def write_plotly_bundle(out_dir):
+    from plotly.offline import get_plotlyjs
+    path = os.path.join(out_dir, PLOTLY_BUNDLE)
+    js = get_plotlyjs().encode("utf-8")
+    if os.path.exists(path) and os.path.getsize(path) == len(js):
+        return
+    with open(path, "wb") as f:
+        f.write(js)
+    print(f"  {PLOTLY_BUNDLE} saved!")
+
+def write_chart(fig, out_dir, name):
+    fig.write_html(os.path.join(out_dir, name), include_plotlyjs=PLOTLY_BUNDLE)
+    print(f"  {name} saved!")
+    return name
 
-print("Data loaded! Building visualizations...\n")
+colors = {"Negative/Fear": "#ff6b6b", "Neutral/Concern": "#ffd93d",
+          "Positive/Reassuring": "#6bcb77"}
 
 # ================================================
 # STEP 1 — WORD CLOUDS
 # ================================================
-print("Building word clouds...")
-
 stopwords = set([
     "chicago", "the", "a", "an", "and", "or", "but", "in", "on", "at",
     "to", "for", "of", "with", "is", "it", "this", "that", "was", "are",
@@ -48,281 +82,367 @@ stopwords = set([
     "never", "always", "still", "now", "here", "see", "going", "want"
 ])
 
-fearful_text = " ".join(df[df["sentiment"] == "Negative/Fear"]["combined"].tolist())
-reassuring_text = " ".join(df[df["sentiment"] == "Positive/Reassuring"]["combined"].tolist())
-neutral_text = " ".join(df[df["sentiment"] == "Neutral/Concern"]["combined"].tolist())
-
 def clean_text(text):
     text = re.sub(r'http\S+', '', text)
     text = re.sub(r'[^a-zA-Z\s]', '', text)
     words = text.lower().split()
     return " ".join([w for w in words if w not in stopwords and len(w) > 3])
 
-fig, axes = plt.subplots(1, 3, figsize=(20, 7))
-fig.patch.set_facecolor('#0f0f1a')
-
-configs = [
-    (fearful_text,    "Fearful Posts",      "Reds",    axes[0]),
-    (neutral_text,    "Concerned Posts",    "YlOrBr",  axes[1]),
-    (reassuring_text, "Reassuring Posts",   "Greens",  axes[2]),
-]
-
-for text, title, colormap, ax in configs:
-    cleaned = clean_text(text)
-    if not cleaned.strip():
-        ax.text(0.5, 0.5, "Not enough data", ha="center", va="center",
-                color="white", fontsize=14, transform=ax.transAxes)
-    else:
-        wc = WordCloud(
-            width=600, height=400,
-            background_color="#0f0f1a",
-            colormap=colormap,
-            max_words=80,
-            stopwords=stopwords,
-            collocations=False,
-            prefer_horizontal=0.8
-        ).generate(cleaned)
-        ax.imshow(wc, interpolation="bilinear")
-
-    ax.set_title(title, color="white", fontsize=16, fontweight="bold", pad=15)
-    ax.axis("off")
-    ax.set_facecolor("#0f0f1a")
-
-plt.suptitle("HerSafe Chicago — What People Are Saying",
-             color="white", fontsize=20, fontweight="bold", y=1.02)
-plt.tight_layout()
-plt.savefig("wordclouds.png", dpi=150, bbox_inches="tight",
-            facecolor="#0f0f1a", edgecolor="none")
-plt.close()
-print("  wordclouds.png saved!")
+def render_wordclouds(out_dir):
+    from wordcloud import WordCloud
+    plt = get_pyplot()
+    posts = load_posts()
+    print("Building word clouds...")
+    combined = posts.combined()
+    fearful_text = " ".join(combined[posts.sentiment == "Negative/Fear"].tolist())
+    reassuring_text = " ".join(combined[posts.sentiment == "Positive/Reassuring"].tolist())
+    neutral_text = " ".join(combined[posts.sentiment == "Neutral/Concern"].tolist())
+
+    fig, axes = plt.subplots(1, 3, figsize=(20, 7))
+    fig.patch.set_facecolor('#0f0f1a')
+
+    configs = [
+        (fearful_text,    "Fearful Posts",      "Reds",    axes[0]),
+        (neutral_text,    "Concerned Posts",    "YlOrBr",  axes[1]),
+        (reassuring_text, "Reassuring Posts",   "Greens",  axes[2]),
+    ]
+
+    for text, title, colormap, ax in configs:
+        cleaned = clean_text(text)
+        if not cleaned.strip():
+            ax.text(0.5, 0.5, "Not enough data", ha="center", va="center",
+                    color="white", fontsize=14, transform=ax.transAxes)
+        else:
+            wc = WordCloud(
+                width=600, height=400,
+                background_color="#0f0f1a",
+                colormap=colormap,
+                max_words=80,
+                stopwords=stopwords,
+                collocations=False,
+                prefer_horizontal=0.8
+            ).generate(cleaned)
+            ax.imshow(wc, interpolation="bilinear")
+
+        ax.set_title(title, color="white", fontsize=16, fontweight="bold", pad=15)
+        ax.axis("off")
+        ax.set_facecolor("#0f0f1a")
+
+    plt.suptitle("HerSafe Chicago — What People Are Saying",
+                 color="white", fontsize=20, fontweight="bold", y=1.02)
+    plt.tight_layout()
+    plt.savefig(os.path.join(out_dir, "wordclouds.png"), dpi=150, bbox_inches="tight",
+                facecolor="#0f0f1a", edgecolor="none")
+    plt.close()
+    print("  wordclouds.png saved!")
+    return "wordclouds.png"
 
 # ================================================
 # STEP 2 — TIME ANALYSIS
 # ================================================
-print("Building time analysis charts...")
-
-fig, axes = plt.subplots(2, 2, figsize=(18, 12))
-fig.patch.set_facecolor('#0f0f1a')
-
-for ax in axes.flatten():
-    ax.set_facecolor('#1a1a2e')
-    ax.tick_params(colors='white')
-    ax.spines['bottom'].set_color('#444')
-    ax.spines['left'].set_color('#444')
-    ax.spines['top'].set_visible(False)
-    ax.spines['right'].set_visible(False)
-
-# --- Chart 1: Posts by Hour of Day ---
-ax1 = axes[0, 0]
-fearful_hours = df[df["sentiment"] == "Negative/Fear"]["hour"]
-reassuring_hours = df[df["sentiment"] == "Positive/Reassuring"]["hour"]
-
-ax1.hist(fearful_hours, bins=24, range=(0,24), alpha=0.7,
-         color="#ff6b6b", label="Fearful", edgecolor="none")
-ax1.hist(reassuring_hours, bins=24, range=(0,24), alpha=0.7,
-         color="#6bcb77", label="Reassuring", edgecolor="none")
-ax1.set_title("Posts by Hour of Day", color="white", fontsize=14, fontweight="bold")
-ax1.set_xlabel("Hour (24hr)", color="#aaa")
-ax1.set_ylabel("Number of Posts", color="#aaa")
-ax1.legend(facecolor="#1a1a2e", labelcolor="white")
-ax1.axvspan(20, 24, alpha=0.08, color="yellow", label="Night")
-ax1.axvspan(0, 4, alpha=0.08, color="yellow")
-
-# --- Chart 2: Day/Night Split by Sentiment ---
-ax2 = axes[0, 1]
-time_sentiment = df.groupby(["is_night", "sentiment"]).size().unstack(fill_value=0)
-colors = {"Negative/Fear": "#ff6b6b", "Neutral/Concern": "#ffd93d",
-          "Positive/Reassuring": "#6bcb77"}
-time_sentiment.plot(kind="bar", ax=ax2, color=[colors.get(c, "gray")
-                    for c in time_sentiment.columns], edgecolor="none", width=0.7)
-ax2.set_title("Time of Day vs Sentiment", color="white", fontsize=14, fontweight="bold")
-ax2.set_xlabel("", color="#aaa")
-ax2.set_ylabel("Number of Posts", color="#aaa")
-ax2.tick_params(axis='x', rotation=15)
-ax2.legend(facecolor="#1a1a2e", labelcolor="white", fontsize=9)
-
-# --- Chart 3: Day of Week ---
-ax3 = axes[1, 0]
-day_order = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
-day_sentiment = df.groupby(["day_of_week", "sentiment"]).size().unstack(fill_value=0)
-day_sentiment = day_sentiment.reindex(day_order)
-day_sentiment.plot(kind="bar", ax=ax3, color=[colors.get(c, "gray")
-                   for c in day_sentiment.columns], edgecolor="none", width=0.7)
-ax3.set_title("Day of Week vs Sentiment", color="white", fontsize=14, fontweight="bold")
-ax3.set_xlabel("", color="#aaa")
-ax3.set_ylabel("Number of Posts", color="#aaa")
-ax3.tick_params(axis='x', rotation=30)
-ax3.legend(facecolor="#1a1a2e", labelcolor="white", fontsize=9)
-
-# --- Chart 4: Night Fear Rate by Top Neighborhoods ---
-ax4 = axes[1, 1]
-top_neighborhoods = ["Loop", "Lincoln Park", "Lakeview", "Logan Square",
-                     "Uptown", "Rogers Park", "Hyde Park", "Englewood",
-                     "Austin", "Humboldt Park"]
-
-night_fear = []
-for n in top_neighborhoods:
-    n_df = df[df["neighborhoods_mentioned"].apply(lambda x: n in x)]
-    night_df = n_df[n_df["is_night"] == "Night (8pm-4am)"]
-    if len(night_df) > 0:
-        fear_rate = len(night_df[night_df["sentiment"] == "Negative/Fear"]) / len(night_df)
-    else:
-        fear_rate = 0
-    night_fear.append(fear_rate * 100)
-
-bar_colors = ["#ff6b6b" if f >= 40 else "#ffa94d" if f >= 20 else "#6bcb77"
-              for f in night_fear]
-bars = ax4.barh(top_neighborhoods, night_fear, color=bar_colors, edgecolor="none")
-ax4.set_title("Night-Time Fear Rate by Neighborhood", color="white",
-              fontsize=14, fontweight="bold")
-ax4.set_xlabel("% of Night Posts that are Fearful", color="#aaa")
-ax4.axvline(x=30, color="#ffd93d", linestyle="--", alpha=0.5, linewidth=1)
-
-for i, (bar, val) in enumerate(zip(bars, night_fear)):
-    ax4.text(val + 0.5, bar.get_y() + bar.get_height()/2,
-             f"{val:.0f}%", va="center", color="white", fontsize=9)
-
-plt.suptitle("HerSafe Chicago — Time Analysis of Safety Concerns",
-             color="white", fontsize=18, fontweight="bold", y=1.01)
-plt.tight_layout()
-plt.savefig("time_analysis.png", dpi=150, bbox_inches="tight",
-            facecolor="#0f0f1a", edgecolor="none")
-plt.close()
-print("  time_analysis.png saved!")
+def render_time_analysis(out_dir):
+    import numpy as np
+    from temporal_cube import ALL, BUCKET_LABELS, DAY_ORDER, NIGHT, time_bucket
+    plt = get_pyplot()
+    cube = load_cube()
+    overall = cube[cube["neighborhood"] == ALL].copy()
+    overall["is_night"] = np.array(BUCKET_LABELS)[time_bucket(overall["hour"])]
+    overall["day_of_week"] = np.array(DAY_ORDER)[overall["weekday"]]
+    print("Building time analysis charts...")
+
+    fig, axes = plt.subplots(2, 2, figsize=(18, 12))
+    fig.patch.set_facecolor('#0f0f1a')
+
+    for ax in axes.flatten():
+        ax.set_facecolor('#1a1a2e')
+        ax.tick_params(colors='white')
+        ax.spines['bottom'].set_color('#444')
+        ax.spines['left'].set_color('#444')
+        ax.spines['top'].set_visible(False)
+        ax.spines['right'].set_visible(False)
+
+    # --- Chart 1: Posts by Hour of Day ---
+    ax1 = axes[0, 0]
+    by_hour = overall.groupby(["sentiment", "hour"])["count"].sum().unstack(fill_value=0)
+    by_hour = by_hour.reindex(columns=range(24), fill_value=0)
+    fearful_hours = by_hour.loc["Negative/Fear"] if "Negative/Fear" in by_hour.index else 0
+    reassuring_hours = by_hour.loc["Positive/Reassuring"] if "Positive/Reassuring" in by_hour.index else 0
+
+    ax1.bar(range(24), fearful_hours, width=1, align="edge", alpha=0.7,
+            color="#ff6b6b", label="Fearful", edgecolor="none")
+    ax1.bar(range(24), reassuring_hours, width=1, align="edge", alpha=0.7,
+            color="#6bcb77", label="Reassuring", edgecolor="none")
+    ax1.set_title("Posts by Hour of Day", color="white", fontsize=14, fontweight="bold")
+    ax1.set_xlabel("Hour (24hr, Chicago time)", color="#aaa")
+    ax1.set_ylabel("Number of Posts", color="#aaa")
+    ax1.legend(facecolor="#1a1a2e", labelcolor="white")
+    ax1.axvspan(20, 24, alpha=0.08, color="yellow", label="Night")
+    ax1.axvspan(0, 4, alpha=0.08, color="yellow")
+
+    # --- Chart 2: Day/Night Split by Sentiment ---
+    ax2 = axes[0, 1]
+    time_sentiment = overall.groupby(["is_night", "sentiment"])["count"].sum().unstack(fill_value=0)
+    time_sentiment.plot(kind="bar", ax=ax2, color=[colors.get(c, "gray")
+                        for c in time_sentiment.columns], edgecolor="none", width=0.7)
+    ax2.set_title("Time of Day vs Sentiment", color="white", fontsize=14, fontweight="bold")
+    ax2.set_xlabel("", color="#aaa")
+    ax2.set_ylabel("Number of Posts", color="#aaa")
+    ax2.tick_params(axis='x', rotation=15)
+    ax2.legend(facecolor="#1a1a2e", labelcolor="white", fontsize=9)
+
+    # --- Chart 3: Day of Week ---
+    ax3 = axes[1, 0]
+    day_sentiment = overall.groupby(["day_of_week", "sentiment"])["count"].sum().unstack(fill_value=0)
+    day_sentiment = day_sentiment.reindex(DAY_ORDER)
+    day_sentiment.plot(kind="bar", ax=ax3, color=[colors.get(c, "gray")
+                       for c in day_sentiment.columns], edgecolor="none", width=0.7)
+    ax3.set_title("Day of Week vs Sentiment", color="white", fontsize=14, fontweight="bold")
+    ax3.set_xlabel("", color="#aaa")
+    ax3.set_ylabel("Number of Posts", color="#aaa")
+    ax3.tick_params(axis='x', rotation=30)
+    ax3.legend(facecolor="#1a1a2e", labelcolor="white", fontsize=9)
+
+    # --- Chart 4: Night Fear Rate by Top Neighborhoods ---
+    ax4 = axes[1, 1]
+    top_neighborhoods = ["Loop", "Lincoln Park", "Lakeview", "Logan Square",
+                         "Uptown", "Rogers Park", "Hyde Park", "Englewood",
+                         "Austin", "Humboldt Park"]
+
+    night = cube[cube["neighborhood"].isin(top_neighborhoods)
+                 & (time_bucket(cube["hour"]) == NIGHT)]
+    night_total = night.groupby("neighborhood")["count"].sum()
+    night_fearful = night[night["sentiment"] == "Negative/Fear"].groupby("neighborhood")["count"].sum()
+    night_rate = (night_fearful.reindex(night_total.index, fill_value=0) / night_total)
+    night_fear = [night_rate.get(n, 0) * 100 for n in top_neighborhoods]
+
+    bar_colors = ["#ff6b6b" if f >= 40 else "#ffa94d" if f >= 20 else "#6bcb77"
+                  for f in night_fear]
+    bars = ax4.barh(top_neighborhoods, night_fear, color=bar_colors, edgecolor="none")
+    ax4.set_title("Night-Time Fear Rate by Neighborhood", color="white",
+                  fontsize=14, fontweight="bold")
+    ax4.set_xlabel("% of Night Posts that are Fearful", color="#aaa")
+    ax4.axvline(x=30, color="#ffd93d", linestyle="--", alpha=0.5, linewidth=1)
+
+    for i, (bar, val) in enumerate(zip(bars, night_fear)):
+        ax4.text(val + 0.5, bar.get_y() + bar.get_height()/2,
+                 f"{val:.0f}%", va="center", color="white", fontsize=9)
+
+    plt.suptitle("HerSafe Chicago — Time Analysis of Safety Concerns",
+                 color="white", fontsize=18, fontweight="bold", y=1.01)
+    plt.tight_layout()
+    plt.savefig(os.path.join(out_dir, "time_analysis.png"), dpi=150, bbox_inches="tight",
+                facecolor="#0f0f1a", edgecolor="none")
+    plt.close()
+    print("  time_analysis.png saved!")
+    return "time_analysis.png"
 
 # ================================================
 # STEP 3 — ADVANCED INTERACTIVE VISUALIZATIONS
 # ================================================
-print("Building advanced Plotly visualizations...")
 
 # --- Chart A: Bubble Chart — Fear vs Reassurance per Neighborhood ---
-fig_bubble = px.scatter(
-    summary,
-    x="positive_reassuring",
-    y="negative_fear",
-    size="total_posts",
-    color="risk_rating",
-    hover_name="neighborhood",
-    hover_data={"total_posts": True, "negative_ratio": True,
-                "risk_rating": False, "color": False},
-    color_discrete_map={
-        "High Risk": "#ff6b6b",
-        "Medium Risk": "#ffa94d",
-        "Lower Risk": "#6bcb77"
-    },
-    title="Neighborhood Safety — Fear vs Reassurance (bubble size = total posts)",
-    labels={
-        "positive_reassuring": "Reassuring Posts",
-        "negative_fear": "Fearful Posts",
-        "risk_rating": "Risk Level"
-    }
-)
-fig_bubble.update_layout(
-    template="plotly_dark",
-    paper_bgcolor="#0f0f1a",
-    plot_bgcolor="#1a1a2e",
-    font=dict(color="white"),
-    title_font_size=16
-)
-fig_bubble.write_html("chart_bubble.html")
-print("  chart_bubble.html saved!")
+def render_bubble(out_dir):
+    import plotly.express as px
+    summary = load_summary()
+    fig_bubble = px.scatter(
+        summary,
+        x="positive_reassuring",
+        y="negative_fear",
+        size="total_posts",
+        color="risk_rating",
+        hover_name="neighborhood",
+        hover_data={"total_posts": True, "negative_ratio": True,
+                    "risk_rating": False, "color": False},
+        color_discrete_map={
+            "High Risk": "#ff6b6b",
+            "Medium Risk": "#ffa94d",
+            "Lower Risk": "#6bcb77"
+        },
+        title="Neighborhood Safety — Fear vs Reassurance (bubble size = total posts)",
+        labels={
+            "positive_reassuring": "Reassuring Posts",
+            "negative_fear": "Fearful Posts",
+            "risk_rating": "Risk Level"
+        }
+    )
+    fig_bubble.update_layout(
+        template="plotly_dark",
+        paper_bgcolor="#0f0f1a",
+        plot_bgcolor="#1a1a2e",
+        font=dict(color="white"),
+        title_font_size=16
+    )
+    return write_chart(fig_bubble, out_dir, "chart_bubble.html")
 
 # --- Chart B: Stacked Bar — Sentiment breakdown for top 20 neighborhoods ---
-top20 = summary.nlargest(20, "total_posts").sort_values("negative_ratio", ascending=True)
-
-fig_bar = go.Figure()
-fig_bar.add_trace(go.Bar(
-    name="Fearful", x=top20["neighborhood"], y=top20["negative_fear"],
-    marker_color="#ff6b6b"
-))
-fig_bar.add_trace(go.Bar(
-    name="Concerned", x=top20["neighborhood"], y=top20["neutral_concern"],
-    marker_color="#ffd93d"
-))
-fig_bar.add_trace(go.Bar(
-    name="Reassuring", x=top20["neighborhood"], y=top20["positive_reassuring"],
-    marker_color="#6bcb77"
-))
-fig_bar.update_layout(
-    barmode="stack",
-    title="Sentiment Breakdown — Top 20 Most Mentioned Neighborhoods",
-    template="plotly_dark",
-    paper_bgcolor="#0f0f1a",
-    plot_bgcolor="#1a1a2e",
-    font=dict(color="white"),
-    xaxis_tickangle=-35,
-    legend=dict(bgcolor="#1a1a2e"),
-    title_font_size=16
-)
-fig_bar.write_html("chart_sentiment_breakdown.html")
-print("  chart_sentiment_breakdown.html saved!")
+def render_breakdown(out_dir):
+    import plotly.graph_objects as go
+    summary = load_summary()
+    top20 = summary.nlargest(20, "total_posts").sort_values("negative_ratio", ascending=True)
+
+    fig_bar = go.Figure()
+    fig_bar.add_trace(go.Bar(
+        name="Fearful", x=top20["neighborhood"], y=top20["negative_fear"],
+        marker_color="#ff6b6b"
+    ))
+    fig_bar.add_trace(go.Bar(
+        name="Concerned", x=top20["neighborhood"], y=top20["neutral_concern"],
+        marker_color="#ffd93d"
+    ))
+    fig_bar.add_trace(go.Bar(
+        name="Reassuring", x=top20["neighborhood"], y=top20["positive_reassuring"],
+        marker_color="#6bcb77"
+    ))
+    fig_bar.update_layout(
+        barmode="stack",
+        title="Sentiment Breakdown — Top 20 Most Mentioned Neighborhoods",
+        template="plotly_dark",
+        paper_bgcolor="#0f0f1a",
+        plot_bgcolor="#1a1a2e",
+        font=dict(color="white"),
+        xaxis_tickangle=-35,
+        legend=dict(bgcolor="#1a1a2e"),
+        title_font_size=16
+    )
+    return write_chart(fig_bar, out_dir, "chart_sentiment_breakdown.html")
 
 # --- Chart C: Heatmap — Hour vs Day of Week fear density ---
-pivot = df[df["sentiment"] == "Negative/Fear"].groupby(
-    ["day_of_week", "hour"]
-).size().reset_index(name="count")
-
-pivot_table = pivot.pivot(index="day_of_week", columns="hour", values="count").fillna(0)
-pivot_table = pivot_table.reindex(
-    ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
-)
-
-fig_heat = px.imshow(
-    pivot_table,
-    color_continuous_scale="Reds",
-    title="Fearful Posts Heatmap — Hour vs Day of Week",
-    labels=dict(x="Hour of Day", y="Day of Week", color="Fearful Posts"),
-    aspect="auto"
-)
-fig_heat.update_layout(
-    template="plotly_dark",
-    paper_bgcolor="#0f0f1a",
-    plot_bgcolor="#1a1a2e",
-    font=dict(color="white"),
-    title_font_size=16
-)
-fig_heat.write_html("chart_heatmap.html")
-print("  chart_heatmap.html saved!")
+def render_heatmap(out_dir):
+    import plotly.express as px
+    from temporal_cube import ALL, DAY_ORDER
+    cube = load_cube()
+    fear = cube[(cube["neighborhood"] == ALL) & (cube["sentiment"] == "Negative/Fear")]
+
+    pivot_table = fear.pivot_table(index="weekday", columns="hour", values="count",
+                                   aggfunc="sum", fill_value=0)
+    pivot_table = pivot_table.reindex(index=range(7), columns=range(24), fill_value=0)
+    pivot_table.index = DAY_ORDER
+
+    fig_heat = px.imshow(
+        pivot_table,
+        color_continuous_scale="Reds",
+        title="Fearful Posts Heatmap — Hour vs Day of Week",
+        labels=dict(x="Hour of Day", y="Day of Week", color="Fearful Posts"),
+        aspect="auto"
+    )
+    fig_heat.update_layout(
+        template="plotly_dark",
+        paper_bgcolor="#0f0f1a",
+        plot_bgcolor="#1a1a2e",
+        font=dict(color="white"),
+        title_font_size=16
+    )
+    return write_chart(fig_heat, out_dir, "chart_heatmap.html")
 
 # --- Chart D: Fear ratio trend line across neighborhoods ---
-sorted_df = summary[summary["total_posts"] >= 5].sort_values("negative_ratio", ascending=False)
-
-fig_line = go.Figure()
-fig_line.add_trace(go.Scatter(
-    x=sorted_df["neighborhood"],
-    y=sorted_df["negative_ratio"] * 100,
-    mode="lines+markers",
-    line=dict(color="#ffa94d", width=2),
-    marker=dict(
-        size=sorted_df["total_posts"] / 3,
-        color=sorted_df["negative_ratio"],
-        colorscale="RdYlGn_r",
-        showscale=True,
-        colorbar=dict(title="Fear Ratio")
-    ),
-    hovertemplate="<b>%{x}</b><br>Fear Rate: %{y:.1f}%<extra></extra>"
-))
-fig_line.add_hline(y=50, line_dash="dash", line_color="#ff6b6b",
-                   annotation_text="High Risk threshold (50%)")
-fig_line.add_hline(y=30, line_dash="dash", line_color="#ffa94d",
-                   annotation_text="Medium Risk threshold (30%)")
-fig_line.update_layout(
-    title="Fear Rate Across Neighborhoods (min 5 posts, marker size = post count)",
-    xaxis_tickangle=-40,
-    template="plotly_dark",
-    paper_bgcolor="#0f0f1a",
-    plot_bgcolor="#1a1a2e",
-    font=dict(color="white"),
-    yaxis_title="Fear Rate %",
-    title_font_size=16
-)
-fig_line.write_html("chart_fearrate.html")
-print("  chart_fearrate.html saved!")
-
-print("\n✓ All visualizations complete! Open these files in your browser:")
-print("  - wordclouds.png")
-print("  - time_analysis.png")
-print("  - chart_bubble.html")
-print("  - chart_sentiment_breakdown.html")
-print("  - chart_heatmap.html")
-print("  - chart_fearrate.html")
\ No newline at end of file
+def render_fearrate(out_dir):
+    import plotly.graph_objects as go
+    summary = load_summary()
+    # the risk ratings use the smoothed ratio, so the chart and its
+    # thresholds do too; the bars are the 90% interval
+    sorted_df = summary[summary["total_posts"] >= 5].sort_values("smoothed_ratio", ascending=False)
+
+    fig_line = go.Figure()
+    fig_line.add_trace(go.Scatter(
+        x=sorted_df["neighborhood"],
+        y=sorted_df["smoothed_ratio"] * 100,
+        error_y=dict(type="data", symmetric=False,
+                     array=(sorted_df["ci_high"] - sorted_df["smoothed_ratio"]) * 100,
+                     arrayminus=(sorted_df["smoothed_ratio"] - sorted_df["ci_low"]) * 100,
+                     color="#888", thickness=1),
+        customdata=sorted_df[["negative_ratio", "total_posts"]] * [100, 1],
+        mode="lines+markers",
+        line=dict(color="#ffa94d", width=2),
+        marker=dict(
+            size=sorted_df["total_posts"] / 3,
+            color=sorted_df["smoothed_ratio"],
+            colorscale="RdYlGn_r",
+            showscale=True,
+            colorbar=dict(title="Smoothed<br>Fear Ratio")
+        ),
+        hovertemplate="<b>%{x}</b><br>Smoothed fear rate: %{y:.1f}%"
+                      "<br>Raw: %{customdata[0]:.1f}% of %{customdata[1]} posts<extra></extra>"
+    ))
+    fig_line.add_hline(y=50, line_dash="dash", line_color="#ff6b6b",
+                       annotation_text="High Risk threshold (smoothed 50%, interval low end 30%)")
+    fig_line.add_hline(y=30, line_dash="dash", line_color="#ffa94d",
+                       annotation_text="Medium Risk threshold (smoothed 30%)")
+    fig_line.update_layout(
+        title="Smoothed Fear Rate Across Neighborhoods (min 5 posts, 90% interval, marker size = post count)",
+        xaxis_tickangle=-40,
+        template="plotly_dark",
+        paper_bgcolor="#0f0f1a",
+        plot_bgcolor="#1a1a2e",
+        font=dict(color="white"),
+        yaxis_title="Smoothed Fear Rate %",
+        title_font_size=16
+    )
+    return write_chart(fig_line, out_dir, "chart_fearrate.html")
+
+# ---- RENDER TASKS ----
+# each task is independent and writes exactly one output file
+TASKS = {
+    "wordclouds": render_wordclouds,
+    "time": render_time_analysis,
+    "bubble": render_bubble,
+    "breakdown": render_breakdown,
+    "heatmap": render_heatmap,
+    "fearrate": render_fearrate,
+}
+PLOTLY_TASKS = {"bubble", "breakdown", "heatmap", "fearrate"}
+POST_TASKS = {"wordclouds"}
+CUBE_TASKS = {"time", "heatmap"}
+SUMMARY_TASKS = {"bubble", "breakdown", "fearrate"}
+
+def run_task(name, out_dir):
+    import instrumentation
+    with instrumentation.stage(f"charts.{name}"):
+        output = TASKS[name](out_dir)
+    # pool workers never run atexit hooks, so write their timings now
+    instrumentation.flush()
+    return output
+
+def main():
+    parser = argparse.ArgumentParser(description="Render HerSafe charts")
+    parser.add_argument("--only", default="",
+                        help="comma-separated subset of: " + ",".join(TASKS))
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="parallel render processes (1 = run in-process)")
+    parser.add_argument("--out-dir", default=".")
+    args = parser.parse_args()
+
+    selected = [t.strip() for t in args.only.split(",") if t.strip()] or list(TASKS)
+    unknown = [t for t in selected if t not in TASKS]
+    if unknown:
+        parser.error(f"unknown chart(s): {', '.join(unknown)}")
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    # load shared data once up front so forked workers inherit it
+    from instrumentation import stage
+    if POST_TASKS.intersection(selected):
+        with stage("charts.load_posts"):
+            load_posts()
+    if CUBE_TASKS.intersection(selected):
+        with stage("charts.load_cube"):
+            load_cube()
+    if SUMMARY_TASKS.intersection(selected):
+        with stage("charts.load_summary"):
+            load_summary()
+    print("Data loaded! Building visualizations...\n")
+    if PLOTLY_TASKS.intersection(selected):
+        write_plotly_bundle(args.out_dir)
+
+    workers = max(1, min(args.workers or 1, len(selected)))
+    if workers == 1:
+        outputs = [run_task(name, args.out_dir) for name in selected]
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            outputs = list(pool.map(run_task, selected, [args.out_dir] * len(selected)))
+
+    print("\n✓ All visualizations complete! Open these files in your browser:")
+    for name in outputs:
+        print(f"  - {name}")
+
+if __name__ == "__main__":
+    main()